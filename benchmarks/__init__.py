@@ -0,0 +1 @@
+# See COPYRIGHT file at the top of the source tree.
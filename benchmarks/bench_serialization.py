@@ -0,0 +1,158 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Benchmarks of the serialization and scoring hot paths.
+
+Benchmark classes follow the conventions of airspeed velocity (asv):
+``time_*`` methods are timed for every combination of ``params``, after
+calling ``setup`` with the same parameters. Run them with ``run.py`` in this
+directory. Jobs and metrics are made with the deterministic generators of
+`lsst.validate.base.synthetic`.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (Datum, Job, Metric, load_metrics,
+                                make_synthetic_job,
+                                write_synthetic_metrics_yaml)
+
+
+METRICS_YAML = os.path.join(os.path.dirname(__file__), os.pardir, 'tests',
+                            'data', 'metrics.yaml')
+
+
+class JobJson(object):
+    """Serialize a `Job` to a JSON document."""
+
+    params = ([10, 100, 1000], [0, 1000])
+    param_names = ['n_measurements', 'blob_size']
+
+    def setup(self, n_measurements, blob_size):
+        self.job = make_synthetic_job(n_measurements=n_measurements,
+                                      blob_size=blob_size)
+
+    def time_json(self, n_measurements, blob_size):
+        self.job.json
+
+    def time_dumps(self, n_measurements, blob_size):
+        json.dumps(self.job.json)
+
+
+class JobFromJson(object):
+    """Rebuild a `Job` from a JSON document."""
+
+    params = ([10, 100, 1000], [0, 1000])
+    param_names = ['n_measurements', 'blob_size']
+
+    def setup(self, n_measurements, blob_size):
+        self.doc = json.loads(json.dumps(
+            make_synthetic_job(n_measurements=n_measurements,
+                               blob_size=blob_size).json))
+
+    def time_from_json(self, n_measurements, blob_size):
+        Job.from_json(self.doc)
+
+
+class JobLookup(object):
+    """Look up measurements in a `Job`."""
+
+    params = [10, 100, 1000]
+    param_names = ['n_measurements']
+
+    def setup(self, n_measurements):
+        self.job = make_synthetic_job(n_measurements=n_measurements)
+
+    def time_get_measurement(self, n_measurements):
+        self.job.get_measurement('SYN0001', filter_name='f00')
+
+
+class LargeBlobJson(object):
+    """Serialize and rebuild a `Job` with large blobs."""
+
+    params = [100000, 1000000]
+    param_names = ['blob_size']
+
+    def setup(self, blob_size):
+        self.job = make_synthetic_job(n_measurements=4, n_metrics=4,
+                                      blob_size=blob_size, n_blobs=1)
+        self.doc = json.loads(json.dumps(self.job.json))
+
+    def time_json(self, blob_size):
+        self.job.json
+
+    def time_from_json(self, blob_size):
+        # Blob datums are decoded lazily; decode them all
+        for blob in Job.from_json(self.doc).blobs:
+            for datum in blob.datums.values():
+                datum.quantity
+
+    def time_from_json_lazy(self, blob_size):
+        Job.from_json(self.doc)
+
+
+class DatumFromJson(object):
+    """Rebuild array `Datum`\ s from JSON."""
+
+    params = [1, 1000, 100000]
+    param_names = ['size']
+
+    def setup(self, size):
+        values = np.random.RandomState(0).normal(size=size)
+        self.doc = Datum(values * u.mmag, label='values').json
+
+    def time_from_json(self, size):
+        Datum.from_json(self.doc)
+
+
+class MetricYaml(object):
+    """Load metric definitions from YAML."""
+
+    def setup(self):
+        self.metric_names = list(load_metrics(METRICS_YAML))
+
+    def time_load_metrics(self):
+        load_metrics(METRICS_YAML)
+
+    def time_from_yaml(self):
+        Metric.from_yaml('AF1', yaml_path=METRICS_YAML)
+
+
+class SyntheticMetricYaml(object):
+    """Load many metric definitions with dependency chains from YAML."""
+
+    params = ([10, 100], [0, 9])
+    param_names = ['n_metrics', 'dependency_depth']
+
+    def setup(self, n_metrics, dependency_depth):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'metrics.yaml')
+        write_synthetic_metrics_yaml(self.path, n_metrics=n_metrics,
+                                     dependency_depth=dependency_depth)
+
+    def teardown(self, n_metrics, dependency_depth):
+        shutil.rmtree(self.tmp_dir)
+
+    def time_load_metrics(self, n_metrics, dependency_depth):
+        load_metrics(self.path)
+
+
+class CheckSpec(object):
+    """Score measurements against specifications."""
+
+    params = [1, 100, 1000]
+    param_names = ['n_measurements']
+
+    def setup(self, n_measurements):
+        self.metrics = load_metrics(METRICS_YAML)
+        filters = ('u', 'g', 'r', 'i', 'z', 'y')
+        self.values = [(float(i % 10) * u.mmag, filters[i % 6])
+                       for i in range(n_measurements)]
+
+    def time_check_spec(self, n_measurements):
+        metric = self.metrics['PA1']
+        for quantity, filter_name in self.values:
+            metric.check_spec(quantity, 'design', filter_name=filter_name)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+"""Run the benchmarks offline, record baselines and compare against them.
+
+Benchmarks are the ``time_*`` methods of the classes in the ``bench_*.py``
+modules of this directory, written in the style of airspeed velocity (asv):
+a class may define ``params`` (a list of values, or a list of lists of values
+for several parameters), ``param_names``, ``setup`` and ``teardown``.
+
+Examples
+--------
+Record a baseline, then compare a later run against it::
+
+    python benchmarks/run.py --save benchmarks/baseline.json
+    python benchmarks/run.py --compare benchmarks/baseline.json
+
+Like asv, each benchmark is timed in several fresh processes
+(``--processes``), since timings vary more between processes than within
+one, and its result is the median of all timing repeats. The comparison
+exits with status 1 if any benchmark's median is slower than the
+baseline's by more than the ``--threshold`` ratio, and all its timings are
+slower than all the baseline's.
+"""
+
+import argparse
+import glob
+import importlib
+import itertools
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover(pattern=None):
+    """Find benchmarks.
+
+    Parameters
+    ----------
+    pattern : `str`, optional
+        Regular expression; only benchmarks whose names match are returned.
+
+    Returns
+    -------
+    benchmarks : `list` of `tuple`
+        ``(name, cls, method_name, params)`` for each benchmark and
+        combination of parameters.
+    """
+    sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+    benchmarks = []
+    for path in sorted(glob.glob(os.path.join(BENCHMARK_DIR, 'bench_*.py'))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module('benchmarks.' + module_name)
+        for cls_name in sorted(dir(module)):
+            cls = getattr(module, cls_name)
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            methods = sorted(m for m in dir(cls) if m.startswith('time_'))
+            for method_name, params in itertools.product(
+                    methods, _param_combinations(cls)):
+                name = '{0}.{1}.{2}'.format(module_name, cls_name,
+                                            method_name)
+                if params:
+                    name += '({0})'.format(', '.join(repr(p) for p in params))
+                if pattern is None or re.search(pattern, name):
+                    benchmarks.append((name, cls, method_name, params))
+    return benchmarks
+
+
+def _param_combinations(cls):
+    """Combinations of the parameters of a benchmark class."""
+    params = getattr(cls, 'params', None)
+    if params is None:
+        return [()]
+    if not params or not isinstance(params[0], (list, tuple)):
+        # A single parameter
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def time_benchmark(cls, method_name, params, repeat=5, min_time=0.2):
+    """Time one benchmark.
+
+    Parameters
+    ----------
+    cls : `type`
+        Benchmark class.
+    method_name : `str`
+        Name of the ``time_*`` method.
+    params : `tuple`
+        Parameters passed to ``setup`` and the method.
+    repeat : `int`, optional
+        Number of timing repeats.
+    min_time : `float`, optional
+        Minimum duration of each repeat, in seconds.
+
+    Returns
+    -------
+    samples : `list` of `float`
+        Time of one call, in seconds, in each repeat.
+    """
+    instance = cls()
+    if hasattr(instance, 'setup'):
+        instance.setup(*params)
+    try:
+        method = getattr(instance, method_name)
+        timer = timeit.Timer(lambda: method(*params))
+        number = 1
+        while True:
+            elapsed = timer.timeit(number)
+            if elapsed >= min_time or number >= 1000000:
+                break
+            number *= 10 if elapsed < min_time / 10. else 2
+        elapsed = [elapsed] + timer.repeat(repeat - 1, number)
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*params)
+    return [e / number for e in elapsed]
+
+
+def run(pattern=None, repeat=5, min_time=0.2, processes=2,
+        stream=sys.stdout):
+    """Run benchmarks.
+
+    Parameters
+    ----------
+    pattern : `str`, optional
+        Regular expression selecting benchmarks (see `discover`).
+    repeat : `int`, optional
+        Number of timing repeats per benchmark and process.
+    min_time : `float`, optional
+        Minimum duration of each repeat, in seconds.
+    processes : `int`, optional
+        Number of fresh processes each benchmark is timed in. With ``1``,
+        benchmarks are timed in this process.
+    stream : file-like, optional
+        Stream the median times are written to.
+
+    Returns
+    -------
+    results : `dict`
+        Results document, with environment information, a ``results``
+        `dict` of median times in seconds keyed by benchmark name, and a
+        ``samples`` `dict` of the times of all repeats.
+    """
+    samples = {}
+    if processes <= 1:
+        for name, cls, method_name, params in discover(pattern):
+            samples[name] = time_benchmark(cls, method_name, params,
+                                           repeat=repeat, min_time=min_time)
+    else:
+        for _ in range(processes):
+            for name, times in _run_process(pattern, repeat,
+                                            min_time).items():
+                samples.setdefault(name, []).extend(times)
+    results = {}
+    for name in sorted(samples):
+        results[name] = float(np.median(samples[name]))
+        stream.write('{0:<70} {1:>12}\n'.format(
+            name, format_time(results[name])))
+        stream.flush()
+    return {'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'results': results,
+            'samples': samples}
+
+
+def _run_process(pattern, repeat, min_time):
+    """Time benchmarks in a fresh process, returning their samples."""
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        argv = [sys.executable, os.path.abspath(__file__), '--processes',
+                '1', '--repeat', str(repeat), '--min-time', str(min_time),
+                '--save', path]
+        if pattern is not None:
+            argv.extend(['--bench', pattern])
+        subprocess.run(argv, check=True, stdout=subprocess.DEVNULL)
+        with open(path) as f:
+            return json.load(f)['samples']
+    finally:
+        os.remove(path)
+
+
+def compare(baseline, current, threshold=1.5, stream=sys.stdout):
+    """Write a report comparing results against a baseline.
+
+    Parameters
+    ----------
+    baseline : `dict`
+        Baseline results document.
+    current : `dict`
+        Current results document.
+    threshold : `float`, optional
+        Ratio of current to baseline median times above which a benchmark
+        is reported as a regression (and below whose inverse it is reported
+        as an improvement), provided that the timings of the two runs do not
+        overlap.
+    stream : file-like, optional
+        Stream the report is written to.
+
+    Returns
+    -------
+    regressions : `list` of `str`
+        Names of the benchmarks that regressed.
+    """
+    regressions = []
+    stream.write('{0:<70} {1:>12} {2:>12} {3:>7}\n'.format(
+        'benchmark', 'baseline', 'current', 'ratio'))
+    for name in sorted(current['results']):
+        seconds = current['results'][name]
+        base = baseline['results'].get(name)
+        if base is None:
+            stream.write('{0:<70} {1:>12} {2:>12} {3:>7}\n'.format(
+                name, '-', format_time(seconds), 'new'))
+            continue
+        ratio = seconds / base
+        # Without samples, the medians are the only timings
+        base_samples = baseline.get('samples', {}).get(name, [base])
+        samples = current.get('samples', {}).get(name, [seconds])
+        flag = ''
+        if ratio > threshold and min(samples) > max(base_samples):
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif ratio < 1. / threshold and max(samples) < min(base_samples):
+            flag = '  improved'
+        stream.write('{0:<70} {1:>12} {2:>12} {3:>7.2f}{4}\n'.format(
+            name, format_time(base), format_time(seconds), ratio, flag))
+    stream.write('{0:d} regression(s) above {1:.2f}x\n'.format(
+        len(regressions), threshold))
+    return regressions
+
+
+def format_time(seconds):
+    """Format a duration with a suitable unit."""
+    for unit, scale in (('s', 1.), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{0:.3f} {1}'.format(seconds / scale, unit)
+    return '{0:.3f} ns'.format(seconds / 1e-9)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run the validate_base benchmarks.')
+    parser.add_argument('--bench', '-b', default=None,
+                        help='Regular expression selecting benchmarks.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Timing repeats per benchmark and process '
+                             '(default: 5).')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Minimum seconds per repeat (default: 0.2).')
+    parser.add_argument('--processes', type=int, default=2,
+                        help='Fresh processes each benchmark is timed in '
+                             '(default: 2).')
+    parser.add_argument('--save', default=None,
+                        help='Write results to this JSON file.')
+    parser.add_argument('--compare', default=None,
+                        help='Compare results with this baseline JSON file.')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='Ratio of median times flagged as a regression '
+                             '(default: 1.5).')
+    args = parser.parse_args(argv)
+
+    results = run(pattern=args.bench, repeat=args.repeat,
+                  min_time=args.min_time, processes=args.processes)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, results, threshold=args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
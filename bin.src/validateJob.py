@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# See COPYRIGHT file at the top of the source tree.
+"""Inspect, convert, merge and score validate_base job files."""
+
+import sys
+
+from lsst.validate.base.cli import main
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -14,5 +14,24 @@ from .datum import *  # noqa: F403
 from .spec import *  # noqa: F403
 from .metric import *  # noqa: F403
 from .measurement import *  # noqa: F403
+from .schema import *  # noqa: F403
+from .growable import *  # noqa: F403
+from .sharedmem import *  # noqa: F403
+from .sketch import *  # noqa: F403
 from .blob import *  # noqa: F403
 from .job import *  # noqa: F403
+from .blobstore import *  # noqa: F403
+from .executor import *  # noqa: F403
+from .asyncrunner import *  # noqa: F403
+from .scheduler import *  # noqa: F403
+from .cache import *  # noqa: F403
+from .performance import *  # noqa: F403
+from .accumulators import *  # noqa: F403
+from .catalog import *  # noqa: F403
+from .synthetic import *  # noqa: F403
+from .counters import *  # noqa: F403
+from .memory import *  # noqa: F403
+from .tracing import *  # noqa: F403
+from .jobfile import *  # noqa: F403
+from .rescore import *  # noqa: F403
+from .history import *  # noqa: F403
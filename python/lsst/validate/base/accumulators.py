@@ -0,0 +1,462 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Mergeable streaming accumulators of statistics.
+
+Accumulators compute statistics of data that are fed chunk by chunk, such
+as catalogs that do not fit in memory. Accumulators of the same kind can be
+merged, for example after being filled in separate worker processes, and
+their statistics are stored in a measurement with ``finalize_into``.
+"""
+
+__all__ = ['Moments', 'WeightedMoments', 'Rms', 'Histogram']
+
+from collections import OrderedDict
+
+import numpy as np
+import astropy.units as u
+
+
+class _Accumulator(object):
+    """Base class of accumulators.
+
+    Subclasses implement `update`, `merge` and `finalize`, and name the
+    statistic used as the measurement's quantity in ``_default_statistic``.
+    """
+
+    _default_statistic = None
+
+    def __init__(self, unit=None):
+        self.unit = None if unit is None else u.Unit(unit)
+
+    def _to_values(self, values):
+        """Convert a chunk of values to a flat `float` array in the
+        accumulator's units, adopting the units of the first chunk if
+        necessary.
+        """
+        if isinstance(values, u.Quantity):
+            if self.unit is None:
+                self.unit = values.unit
+            values = values.to_value(self.unit)
+        elif self.unit is None:
+            # Plain numbers are taken to be in the accumulator's units
+            self.unit = u.dimensionless_unscaled
+        return np.asarray(values, dtype=float).ravel()
+
+    def _merge_scale(self, other):
+        """Factor converting ``other``'s values to this accumulator's units.
+        """
+        if type(other) is not type(self):
+            raise TypeError('Cannot merge {0} into {1}'.format(
+                type(other).__name__, type(self).__name__))
+        if other.unit is None:
+            return 1.
+        if self.unit is None:
+            self.unit = other.unit
+            return 1.
+        return other.unit.to(self.unit)
+
+    @property
+    def _unit(self):
+        """Units of the statistics (dimensionless if nothing was added)."""
+        if self.unit is None:
+            return u.dimensionless_unscaled
+        return self.unit
+
+    def finalize_into(self, measurement, statistic=None, extras=None,
+                      prefix=''):
+        """Store statistics in a measurement.
+
+        Parameters
+        ----------
+        measurement : `MeasurementBase`-type
+            Measurement to update.
+        statistic : `str`, optional
+            Name of the statistic (a key of `finalize`) assigned to the
+            measurement's ``quantity``. Defaults to the main statistic of the
+            accumulator (e.g., ``'mean'`` for `Moments`). Set to an empty
+            string to leave the quantity unchanged.
+        extras : `list` of `str`, optional
+            Names of statistics registered as measurement extras. By default
+            all statistics other than ``statistic`` are registered.
+        prefix : `str`, optional
+            Prefix of the names of the extras.
+
+        Returns
+        -------
+        statistics : `collections.OrderedDict`
+            Output of `finalize`.
+        """
+        stats = self.finalize()
+        if statistic is None:
+            statistic = self._default_statistic
+        if extras is None:
+            extras = [k for k in stats if k != statistic]
+        if statistic:
+            measurement.quantity = stats[statistic]
+        for name in extras:
+            measurement.register_extra(prefix + name, quantity=stats[name])
+        return stats
+
+
+class Moments(_Accumulator):
+    """Streaming count, mean and variance.
+
+    Chunks are combined with the parallel variant of Welford's algorithm
+    (Chan et al.), which is numerically stable for large counts.
+
+    Parameters
+    ----------
+    unit : `str` or `astropy.units.Unit`, optional
+        Units of the statistics. By default, the units of the first chunk
+        of values are used.
+    ignore_nan : `bool`, optional
+        If `True`, NaN values are skipped.
+
+    Examples
+    --------
+    ::
+
+        moments = Moments()
+        for chunk in catalog_chunks:
+            moments.update(chunk['mag_diff'])
+        moments.finalize_into(measurement)
+    """
+
+    _default_statistic = 'mean'
+
+    def __init__(self, unit=None, ignore_nan=True):
+        _Accumulator.__init__(self, unit=unit)
+        self.ignore_nan = ignore_nan
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+
+    def update(self, values):
+        """Add a chunk of values.
+
+        Parameters
+        ----------
+        values : `astropy.units.Quantity` or array_like
+            Values. Plain numbers are in the accumulator's units.
+        """
+        values = self._to_values(values)
+        if self.ignore_nan:
+            values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean()
+        m2 = np.sum((values - mean)**2)
+        self._combine(n, mean, m2)
+
+    def _combine(self, n, mean, m2):
+        """Combine the moments of another set of values."""
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta**2 * self.count * n / total
+        self.count = total
+
+    def merge(self, other):
+        """Merge the values of another `Moments` accumulator.
+
+        Parameters
+        ----------
+        other : `Moments`
+            Accumulator to merge. It is not modified.
+
+        Returns
+        -------
+        self : `Moments`
+            This accumulator.
+        """
+        scale = self._merge_scale(other)
+        if other.count > 0:
+            self._combine(other.count, other.mean * scale,
+                          other.m2 * scale**2)
+        return self
+
+    def finalize(self, ddof=0):
+        """Compute the statistics.
+
+        Parameters
+        ----------
+        ddof : `int`, optional
+            Delta degrees of freedom of the variance.
+
+        Returns
+        -------
+        statistics : `collections.OrderedDict`
+            ``count`` (`int`), ``mean``, ``variance`` and ``std``
+            (`astropy.units.Quantity`). Statistics are NaN if there are not
+            enough values.
+        """
+        unit = self._unit
+        if self.count > ddof:
+            variance = self.m2 / (self.count - ddof)
+        else:
+            variance = np.nan
+        mean = self.mean if self.count > 0 else np.nan
+        return OrderedDict([('count', self.count),
+                            ('mean', mean * unit),
+                            ('variance', variance * unit**2),
+                            ('std', np.sqrt(variance) * unit)])
+
+
+class WeightedMoments(_Accumulator):
+    """Streaming weighted mean and variance.
+
+    Chunks are combined with West's weighted incremental algorithm. The
+    variance is the weighted population variance,
+    ``sum(w * (x - mean)**2) / sum(w)``.
+
+    Parameters
+    ----------
+    unit : `str` or `astropy.units.Unit`, optional
+        Units of the statistics. By default, the units of the first chunk
+        of values are used.
+    ignore_nan : `bool`, optional
+        If `True`, values or weights that are NaN are skipped.
+    """
+
+    _default_statistic = 'mean'
+
+    def __init__(self, unit=None, ignore_nan=True):
+        _Accumulator.__init__(self, unit=unit)
+        self.ignore_nan = ignore_nan
+        self.count = 0
+        self.sum_weights = 0.
+        self.mean = 0.
+        self.s = 0.
+
+    def update(self, values, weights):
+        """Add a chunk of weighted values.
+
+        Parameters
+        ----------
+        values : `astropy.units.Quantity` or array_like
+            Values. Plain numbers are in the accumulator's units.
+        weights : array_like
+            Non-negative weights, such as inverse variances.
+        """
+        values = self._to_values(values)
+        weights = np.asarray(weights, dtype=float).ravel()
+        if self.ignore_nan:
+            good = ~(np.isnan(values) | np.isnan(weights))
+            values = values[good]
+            weights = weights[good]
+        sum_weights = weights.sum()
+        if sum_weights <= 0:
+            return
+        mean = np.sum(weights * values) / sum_weights
+        s = np.sum(weights * (values - mean)**2)
+        self._combine(len(values), sum_weights, mean, s)
+
+    def _combine(self, n, sum_weights, mean, s):
+        """Combine the moments of another set of weighted values."""
+        total = self.sum_weights + sum_weights
+        delta = mean - self.mean
+        self.mean += delta * sum_weights / total
+        self.s += s + delta**2 * self.sum_weights * sum_weights / total
+        self.sum_weights = total
+        self.count += n
+
+    def merge(self, other):
+        """Merge the values of another `WeightedMoments` accumulator.
+
+        Parameters
+        ----------
+        other : `WeightedMoments`
+            Accumulator to merge. It is not modified.
+
+        Returns
+        -------
+        self : `WeightedMoments`
+            This accumulator.
+        """
+        scale = self._merge_scale(other)
+        if other.sum_weights > 0:
+            self._combine(other.count, other.sum_weights, other.mean * scale,
+                          other.s * scale**2)
+        return self
+
+    def finalize(self):
+        """Compute the statistics.
+
+        Returns
+        -------
+        statistics : `collections.OrderedDict`
+            ``count`` and ``sum_weights``, and the weighted ``mean``,
+            ``variance`` and ``std`` (`astropy.units.Quantity`). Statistics
+            are NaN if the sum of weights is zero.
+        """
+        unit = self._unit
+        if self.sum_weights > 0:
+            mean = self.mean
+            variance = self.s / self.sum_weights
+        else:
+            mean = variance = np.nan
+        return OrderedDict([('count', self.count),
+                            ('sum_weights', self.sum_weights * u.one),
+                            ('mean', mean * unit),
+                            ('variance', variance * unit**2),
+                            ('std', np.sqrt(variance) * unit)])
+
+
+class Rms(_Accumulator):
+    """Streaming root-mean-square.
+
+    Parameters
+    ----------
+    unit : `str` or `astropy.units.Unit`, optional
+        Units of the statistic. By default, the units of the first chunk of
+        values are used.
+    ignore_nan : `bool`, optional
+        If `True`, NaN values are skipped.
+    """
+
+    _default_statistic = 'rms'
+
+    def __init__(self, unit=None, ignore_nan=True):
+        _Accumulator.__init__(self, unit=unit)
+        self.ignore_nan = ignore_nan
+        self.count = 0
+        self.sum_squares = 0.
+
+    def update(self, values):
+        """Add a chunk of values.
+
+        Parameters
+        ----------
+        values : `astropy.units.Quantity` or array_like
+            Values. Plain numbers are in the accumulator's units.
+        """
+        values = self._to_values(values)
+        if self.ignore_nan:
+            values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.sum_squares += np.dot(values, values)
+
+    def merge(self, other):
+        """Merge the values of another `Rms` accumulator.
+
+        Parameters
+        ----------
+        other : `Rms`
+            Accumulator to merge. It is not modified.
+
+        Returns
+        -------
+        self : `Rms`
+            This accumulator.
+        """
+        scale = self._merge_scale(other)
+        self.count += other.count
+        self.sum_squares += other.sum_squares * scale**2
+        return self
+
+    def finalize(self):
+        """Compute the statistic.
+
+        Returns
+        -------
+        statistics : `collections.OrderedDict`
+            ``count`` (`int`) and ``rms`` (`astropy.units.Quantity`, NaN if
+            there are no values).
+        """
+        if self.count > 0:
+            rms = np.sqrt(self.sum_squares / self.count)
+        else:
+            rms = np.nan
+        return OrderedDict([('count', self.count),
+                            ('rms', rms * self._unit)])
+
+
+class Histogram(_Accumulator):
+    """Streaming histogram with fixed bins.
+
+    Parameters
+    ----------
+    edges : `astropy.units.Quantity` or array_like
+        Monotonically increasing bin edges. Plain numbers are in units of
+        ``unit``.
+    unit : `str` or `astropy.units.Unit`, optional
+        Units of the edges if they are not an `astropy.units.Quantity`.
+    """
+
+    _default_statistic = ''
+
+    def __init__(self, edges, unit=None):
+        _Accumulator.__init__(self, unit=unit)
+        self.edges = self._to_values(edges)
+        if len(self.edges) < 2 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError('Histogram edges must be increasing')
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.nan_count = 0
+
+    def update(self, values):
+        """Add a chunk of values.
+
+        Parameters
+        ----------
+        values : `astropy.units.Quantity` or array_like
+            Values. Plain numbers are in the histogram's units.
+        """
+        values = self._to_values(values)
+        nan = np.isnan(values)
+        self.nan_count += int(np.count_nonzero(nan))
+        values = values[~nan]
+        # Bin index of each value; the last bin includes its upper edge,
+        # as in numpy.histogram
+        index = np.searchsorted(self.edges, values, side='right') - 1
+        index[values == self.edges[-1]] = len(self.counts) - 1
+        self.underflow += int(np.count_nonzero(index < 0))
+        self.overflow += int(np.count_nonzero(index >= len(self.counts)))
+        inside = index[(index >= 0) & (index < len(self.counts))]
+        self.counts += np.bincount(inside, minlength=len(self.counts))
+
+    def merge(self, other):
+        """Merge the counts of another `Histogram` with the same bins.
+
+        Parameters
+        ----------
+        other : `Histogram`
+            Histogram to merge. It is not modified.
+
+        Returns
+        -------
+        self : `Histogram`
+            This histogram.
+
+        Raises
+        ------
+        ValueError
+            Raised if the histograms have different bins.
+        """
+        scale = self._merge_scale(other)
+        if not np.allclose(other.edges * scale, self.edges, rtol=1e-12,
+                           atol=0.):
+            raise ValueError('Cannot merge histograms with different bins')
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.nan_count += other.nan_count
+        return self
+
+    def finalize(self):
+        """Get the histogram.
+
+        Returns
+        -------
+        statistics : `collections.OrderedDict`
+            ``counts`` (`int` array with the dimensionless unit), ``edges``
+            (`astropy.units.Quantity`), and the numbers of values below
+            (``underflow``), above (``overflow``) the bins, and NaN values
+            (``nan_count``).
+        """
+        return OrderedDict([('counts', self.counts.copy() * u.one),
+                            ('edges', self.edges * self._unit),
+                            ('underflow', self.underflow),
+                            ('overflow', self.overflow),
+                            ('nan_count', self.nan_count)])
@@ -0,0 +1,209 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['AsyncMeasurementBase', 'AsyncMeasurementRunner']
+
+import abc
+import asyncio
+
+from .measurement import MeasurementBase
+from .job import Job
+
+
+class AsyncMeasurementBase(MeasurementBase):
+    """Base class for measurements whose inputs are read asynchronously.
+
+    Subclasses split the work of a measurement into two hooks that are
+    called by `AsyncMeasurementRunner`:
+
+    - `read_inputs`, a coroutine that reads the measurement's inputs (such
+      as catalogs on a shared filesystem). The runner overlaps the
+      `read_inputs` calls of several measurements.
+    - `measure`, which computes the measurement from those inputs and sets
+      its `quantity`.
+
+    The constructor of a subclass should only register parameters and store
+    what is needed to locate the inputs.
+
+    .. seealso::
+
+       The :ref:`validate-base-measurement-class` page shows how to create
+       measurement classes using `MeasurementBase`.
+    """
+
+    async def read_inputs(self):
+        """Read the inputs of the measurement.
+
+        Override this coroutine to read inputs without blocking the event
+        loop, for example with `asyncio.to_thread` or an asynchronous I/O
+        library.
+
+        Returns
+        -------
+        inputs : obj
+            Inputs passed to `measure`. The default implementation returns
+            `None`.
+        """
+        return None
+
+    @abc.abstractmethod
+    def measure(self, inputs):
+        """Compute the measurement from its inputs.
+
+        Override this method to set the measurement's `quantity` (and any
+        extras or blobs). It may also be a coroutine function.
+
+        Parameters
+        ----------
+        inputs : obj
+            Inputs returned by `read_inputs`.
+        """
+        pass
+
+
+class AsyncMeasurementRunner(object):
+    """Run I/O-bound measurements concurrently with `asyncio` and register
+    them in a `Job`.
+
+    Measurements are described by *factories*: callables, such as
+    `AsyncMeasurementBase` subclasses, that make a measurement (or a `list`
+    of measurements) from their arguments. Factories may also be coroutine
+    functions. For each `AsyncMeasurementBase` that is made, the runner
+    awaits its `~AsyncMeasurementBase.read_inputs` hook and then calls its
+    `~AsyncMeasurementBase.measure` hook. Measurements are registered as
+    they finish.
+
+    Parameters
+    ----------
+    max_concurrency : `int`, optional
+        Maximum number of measurements in progress at a time.
+    timeout : `float`, optional
+        Time limit, in seconds, for making each measurement (its factory and
+        hooks). By default there is no limit. The limit interrupts
+        measurements while they await; it cannot interrupt a synchronous
+        `~AsyncMeasurementBase.measure`.
+
+    Attributes
+    ----------
+    failures : `list`
+        ``(factory, args, kwargs, exception)`` tuples for the measurements
+        that failed or timed out during the last `run`. Failed measurements
+        are not registered; the others are.
+
+    Examples
+    --------
+    Measure each visit, reading at most eight catalogs at a time::
+
+        runner = AsyncMeasurementRunner(max_concurrency=8, timeout=600.)
+        for visit in visits:
+            runner.submit(VisitMeasurement, butler, visit)
+        job = runner.run()
+    """
+
+    def __init__(self, max_concurrency=8, timeout=None):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.failures = []
+        self._tasks = []
+
+    def submit(self, factory, *args, **kwargs):
+        """Add a measurement to be run by `run`.
+
+        Parameters
+        ----------
+        factory : callable
+            Callable (or coroutine function) that returns a
+            `MeasurementBase`-type object, or a `list` of them, when called as
+            ``factory(*args, **kwargs)``.
+        *args
+            Positional arguments of ``factory``.
+        **kwargs
+            Keyword arguments of ``factory``.
+        """
+        self._tasks.append((factory, args, kwargs))
+
+    def run(self, job=None):
+        """Run all submitted measurements in a new event loop.
+
+        Parameters
+        ----------
+        job : `Job`, optional
+            Job to register measurements in. By default, a new `Job` is
+            created.
+
+        Returns
+        -------
+        job : `Job`
+            The job containing the measurements (and their blobs).
+        """
+        return asyncio.run(self.run_async(job=job))
+
+    async def run_async(self, job=None):
+        """Run all submitted measurements in the running event loop.
+
+        Use this coroutine instead of `run` from code that already runs in
+        an event loop.
+
+        Parameters
+        ----------
+        job : `Job`, optional
+            Job to register measurements in. By default, a new `Job` is
+            created.
+
+        Returns
+        -------
+        job : `Job`
+            The job containing the measurements (and their blobs).
+        """
+        if job is None:
+            job = Job()
+        tasks, self._tasks = self._tasks, []
+        self.failures = []
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(*[self._run_task(task, job, semaphore)
+                               for task in tasks])
+        return job
+
+    async def _run_task(self, task, job, semaphore):
+        """Make the measurements of a task and register them in the job."""
+        async with semaphore:
+            try:
+                if self.timeout is None:
+                    measurements = await _make_measurements(task)
+                else:
+                    measurements = await asyncio.wait_for(
+                        _make_measurements(task), self.timeout)
+            except Exception as e:
+                factory, args, kwargs = task
+                self.failures.append((factory, args, kwargs, e))
+                return
+        for m in measurements:
+            job.register_measurement(m)
+
+
+async def _make_measurements(task):
+    """Make the measurements of a ``(factory, args, kwargs)`` task.
+
+    Returns
+    -------
+    measurements : `list`
+        Completed measurements.
+    """
+    factory, args, kwargs = task
+    result = factory(*args, **kwargs)
+    if asyncio.iscoroutine(result):
+        result = await result
+    if isinstance(result, MeasurementBase):
+        result = [result]
+
+    measurements = list(result)
+    pending = [m for m in measurements if isinstance(m, AsyncMeasurementBase)]
+    # Overlap the input I/O of all measurements made by the factory
+    all_inputs = await asyncio.gather(*[m.read_inputs() for m in pending])
+    for m, inputs in zip(pending, all_inputs):
+        measured = m.measure(inputs)
+        if asyncio.iscoroutine(measured):
+            await measured
+    return measurements
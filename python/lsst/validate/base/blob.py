@@ -3,11 +3,20 @@
 __all__ = ['BlobBase', 'DeserializedBlob']
 
 import abc
+from collections.abc import MutableMapping
+import hashlib
 import uuid
 
+import astropy.units as u
+
 from .jsonmixin import JsonSerializationMixin
 from .datummixin import DatumAttributeMixin
 from .datum import Datum
+from .growable import GrowableArrayDatum
+from .sharedmem import SharedArrayDatum
+from .sketch import QuantileSketchDatum
+from .summary import summarize_array
+from .views import VIEW_KINDS
 
 
 class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
@@ -27,17 +36,49 @@ class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
     subclass. Keys in `datums` and attributes share the same names.
     """
 
+    content_addressed = False
+    """If `True`, the blob's `identifier` is a hash of its content (`name`
+    and `datums`) rather than a random UUID4.
+
+    Content-addressed blobs with identical data share an identifier, so a
+    `Job` (or a `BlobStore`) only stores them once. Set this as a class
+    attribute of a `BlobBase` subclass.
+    """
+
+    summarize_arrays = False
+    """If `True`, the JSON serialization of the blob includes `summaries`
+    of its array datums.
+
+    Summaries let consumers show statistics of large arrays without decoding
+    them. Set this as a class attribute of a `BlobBase` subclass.
+    """
+
+    summary_quantiles = (0.05, 0.25, 0.5, 0.75, 0.95)
+    """Quantiles computed for `summaries` (`tuple` of `float`)."""
+
     def __init__(self):
         self.datums = {}
+        self._view_specs = {}
         self._id = uuid.uuid4().hex
+        self._content_hash = None
 
     def __getattr__(self, key):
-        if key in self.datums:
-            return self.datums[key].quantity
+        # datums is read from __dict__ so that lookups made before it
+        # exists (e.g., while unpickling) raise AttributeError.
+        datums = self.__dict__.get('datums')
+        if datums is not None and key in datums:
+            return datums[key].quantity
         else:
             raise AttributeError("%r object has no attribute %r" %
                                  (self.__class__, key))
 
+    def __getstate__(self):
+        return self.__dict__.copy()
+
+    def __setstate__(self, state):
+        # Bypass __setattr__; the state is the instance __dict__
+        self.__dict__.update(state)
+
     def __setattr__(self, key, value):
         if key != 'datums' and key in self.datums:
             # Setting value of a serialized Datum
@@ -52,9 +93,47 @@ class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
 
     @property
     def identifier(self):
-        """Unique UUID4-based identifier for this blob (`str`)."""
+        """Unique identifier for this blob (`str`).
+
+        The identifier is UUID4-based, unless `content_addressed` is `True`,
+        in which case it is the `content_hash`.
+        """
+        if self.content_addressed:
+            return self.content_hash
         return self._id
 
+    @property
+    def content_hash(self):
+        """SHA-256 hex digest of the blob's `name` and the values, units,
+        labels and descriptions of its `datums` (`str`).
+
+        The hash is computed on first access (at the latest, when the blob
+        is registered with a `Job`) and cached, so it does not follow later
+        changes of datum values. Registering a datum resets it; call
+        `refresh_content_hash` after changing values in place.
+        """
+        if self._content_hash is None:
+            hasher = hashlib.sha256()
+            hasher.update(repr(self.name).encode('utf-8'))
+            for key in sorted(self.datums):
+                _hash_datum(hasher, key, self.datums[key])
+            self._content_hash = hasher.hexdigest()
+        return self._content_hash
+
+    def refresh_content_hash(self):
+        """Recompute the cached `content_hash` from the current datums.
+
+        Do not refresh the hash of a content-addressed blob that is
+        registered with a `Job`, as the job keeps blobs by `identifier`.
+
+        Returns
+        -------
+        content_hash : `str`
+            The new content hash.
+        """
+        self._content_hash = None
+        return self.content_hash
+
     @classmethod
     def from_json(cls, json_data):
         """Construct a Blob from a JSON dataset.
@@ -69,8 +148,26 @@ class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
         blob : `BlobBase`-type
             Blob from JSON.
         """
-        datums = {k: Datum.from_json(v) for k, v in json_data['data'].items()}
-        return cls(json_data['name'], json_data['identifier'], datums)
+        datums = _LazyDatums(json_data['data'])
+        return cls(json_data['name'], json_data['identifier'], datums,
+                   summaries=json_data.get('summaries'),
+                   views=json_data.get('views'))
+
+    @property
+    def summaries(self):
+        """Summary statistics of the blob's array datums (`dict`).
+
+        Keys are names of array datums, and values are `dict`\ s produced by
+        `~lsst.validate.base.summary.summarize_array` with the
+        `summary_quantiles` of this blob.
+        """
+        summaries = {}
+        for key, datum in self.datums.items():
+            q = datum.quantity
+            if isinstance(q, u.Quantity) and q.ndim > 0:
+                summaries[key] = summarize_array(
+                    q, quantiles=self.summary_quantiles)
+        return summaries
 
     @property
     def json(self):
@@ -79,10 +176,66 @@ class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
             'identifier': self.identifier,
             'name': self.name,
             'data': self.datums})
+        if self.summarize_arrays:
+            json_doc['summaries'] = self.summaries
+        if self._view_specs:
+            json_doc['views'] = self.views
         return json_doc
 
+    def register_view(self, name, kind, datum_names, **kwargs):
+        """Register a downsampled view of array datums, for plotting.
+
+        Views are computed when the blob is serialized, and are stored in
+        the ``views`` field of the blob's JSON alongside the full datums.
+        Plotting clients can fetch the small views instead of the full
+        arrays.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the view.
+        kind : `str`
+            Kind of view:
+
+            - ``'sample'``: a random sample of elements of one or more
+              aligned datums (see `~lsst.validate.base.views.sample_view`).
+            - ``'hist2d'``: a binned 2D histogram of two datums, for scatter
+              plots (see `~lsst.validate.base.views.histogram2d_view`).
+            - ``'envelope'``: minimum and maximum envelope of a series datum
+              (see `~lsst.validate.base.views.envelope_view`).
+        datum_names : `list` of `str`
+            Names of the datums in the view.
+        **kwargs
+            Options of the view function, such as ``size`` for ``'sample'``,
+            ``bins`` for ``'hist2d'`` or ``n_bins`` for ``'envelope'``.
+
+        Raises
+        ------
+        ValueError
+            Raised if ``kind`` is unknown.
+        """
+        if kind not in VIEW_KINDS:
+            raise ValueError('Unknown view kind {0!r}'.format(kind))
+        self._view_specs[name] = (kind, list(datum_names), kwargs)
+
+    @property
+    def views(self):
+        """Downsampled views registered with `register_view` (`dict`).
+
+        Keys are view names. Each view is a `dict` with the ``kind`` of view,
+        the names of its ``datums`` and the data of the view.
+        """
+        views = {}
+        for name, (kind, datum_names, kwargs) in self._view_specs.items():
+            quantities = [self.datums[k].quantity for k in datum_names]
+            view = VIEW_KINDS[kind](datum_names, quantities, **kwargs)
+            view['kind'] = kind
+            view['datums'] = datum_names
+            views[name] = view
+        return views
+
     def register_datum(self, name, quantity=None, label=None,
-                       description=None, datum=None):
+                       description=None, datum=None, shared_memory=False):
         """Register a new `Datum` to be contained by, and serialized via,
         this blob.
 
@@ -114,22 +267,178 @@ class BlobBase(JsonSerializationMixin, DatumAttributeMixin):
         datum : `Datum`, optional
             If a `Datum` is provided, its value, units and label will be
             used unless overriden by other arguments to `register_datum`.
+        shared_memory : `bool`, optional
+            If `True`, the datum's array is stored in a shared memory segment
+            (see `SharedArrayDatum`), so that the blob can be sent between
+            processes without copying the array.
         """
+        if shared_memory:
+            if datum is not None:
+                quantity = datum.quantity if quantity is None else quantity
+                label = datum.label if label is None else label
+                if description is None:
+                    description = datum.description
+            datum = SharedArrayDatum()
         self._register_datum_attribute(self.datums, name,
                                        quantity=quantity, label=label,
                                        description=description, datum=datum)
+        self._content_hash = None
+
+    def register_growable_datum(self, name, unit='', dtype=float,
+                                capacity=64, label=None, description=None):
+        """Register a one-dimensional array `Datum` that is filled
+        incrementally.
+
+        Values are appended through the `GrowableArrayDatum.append` method of
+        the datum, ``self.datums[name]``, for example inside a per-source
+        loop. The instance attribute named ``name`` is a view of the values
+        appended so far.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the `Datum`; used as the key in the `datums` attribute of
+            this object.
+        unit : `str` or `astropy.units.Unit`, optional
+            Units of the datum's values.
+        dtype : `numpy.dtype`, optional
+            Data type of the array.
+        capacity : `int`, optional
+            Initial capacity of the array. Capacity doubles as values are
+            appended.
+        label : `str`, optional
+            Label suitable for plot axes (without units). By default the
+            `name` is used as the ``label``.
+        description : `str`, optional
+            Extended description.
+        """
+        datum = GrowableArrayDatum(unit=unit, dtype=dtype, capacity=capacity)
+        self._register_datum_attribute(self.datums, name, label=label,
+                                       description=description, datum=datum)
+        self._content_hash = None
+
+    def register_sketch_datum(self, name, unit='', k=200, label=None,
+                              description=None):
+        """Register a `Datum` that summarizes a stream of values with a
+        mergeable quantile sketch.
+
+        Values are added through the `QuantileSketchDatum.update` method of
+        the datum, ``self.datums[name]``. Only the sketch is serialized, so
+        quantiles of many values can be estimated from the blob's JSON
+        without storing the values.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the `Datum`; used as the key in the `datums` attribute of
+            this object.
+        unit : `str` or `astropy.units.Unit`, optional
+            Units of the datum's values.
+        k : `int`, optional
+            Accuracy parameter of the sketch (see `KllSketch`).
+        label : `str`, optional
+            Label suitable for plot axes (without units). By default the
+            `name` is used as the ``label``.
+        description : `str`, optional
+            Extended description.
+        """
+        datum = QuantileSketchDatum(unit=unit, k=k)
+        self._register_datum_attribute(self.datums, name, label=label,
+                                       description=description, datum=datum)
+        self._content_hash = None
+
+
+class _LazyDatums(MutableMapping, JsonSerializationMixin):
+    """`dict`-like container of `Datum`\ s that are decoded from their JSON
+    objects on first access.
+
+    Serializing the container back to JSON re-uses the JSON objects of
+    datums that have not been decoded.
+    """
+
+    def __init__(self, datum_docs):
+        self._items = dict(datum_docs)
+
+    def __getitem__(self, key):
+        item = self._items[key]
+        if not isinstance(item, Datum):
+            item = Datum.from_json(item)
+            self._items[key] = item
+        return item
+
+    def __setitem__(self, key, value):
+        self._items[key] = value
+
+    def __delitem__(self, key):
+        del self._items[key]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    @property
+    def json(self):
+        """Datums as a JSON-serializable `dict`."""
+        return {k: v.json if isinstance(v, Datum) else v
+                for k, v in self._items.items()}
+
+
+def _hash_datum(hasher, key, datum):
+    """Update a hashlib object with the content of a `Datum`."""
+    meta = (key, datum.unit_str, datum.label, datum.description)
+    hasher.update(repr(meta).encode('utf-8'))
+    datum._hash_values(hasher)
 
 
 class DeserializedBlob(BlobBase):
     """A concrete Blob deserialized from JSON.
 
     This class should only be used internally.
+
+    Datums are decoded from JSON when they are first accessed. Array
+    `summaries` and `views` serialized with the blob are available without
+    decoding the datums.
     """
 
     name = None
 
-    def __init__(self, name, id_, datums):
+    def __init__(self, name, id_, datums, summaries=None, views=None):
         BlobBase.__init__(self)
         self.name = name
         self._id = id_
         self.datums = datums
+        self._summaries = summaries
+        self._views = views
+
+    @property
+    def summaries(self):
+        """Summary statistics of the blob's array datums (`dict`).
+
+        These are the summaries serialized with the blob, if available.
+        Otherwise they are computed from the datums.
+        """
+        if self._summaries is not None:
+            return self._summaries
+        return BlobBase.summaries.fget(self)
+
+    @property
+    def json(self):
+        """Job data as a JSON-serializable `dict`."""
+        json_doc = BlobBase.json.fget(self)
+        if self._summaries is not None:
+            json_doc['summaries'] = self._summaries
+        if self._views is not None:
+            json_doc['views'] = self._views
+        return json_doc
+
+    @property
+    def views(self):
+        """Downsampled views serialized with the blob (`dict`)."""
+        if self._views is not None:
+            return self._views
+        return {}
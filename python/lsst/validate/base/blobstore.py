@@ -0,0 +1,147 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['BlobStore']
+
+import json
+import os
+import tempfile
+
+from .blob import DeserializedBlob
+
+
+class BlobStore(object):
+    """A local, content-addressed store of serialized blobs.
+
+    Blobs are stored as individual JSON files named after their
+    `BlobBase.identifier`. A blob whose identifier is already in the store is
+    not written again, so blobs that are shared between many jobs (such as
+    content-addressed blobs, see `BlobBase.content_addressed`) are only
+    written once.
+
+    Use `Job.write_json` with the ``blob_store`` argument to write a job's
+    blobs into a store, and `Job.from_json` with the same argument to read
+    them back.
+
+    Parameters
+    ----------
+    root : `str`
+        Directory of the store. It is created if it does not exist.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path_for(self, identifier):
+        """File path of a blob in the store.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Blob identifier.
+
+        Returns
+        -------
+        path : `str`
+            Path of the blob's JSON file. The file may not exist.
+        """
+        return os.path.join(self.root, identifier[:2],
+                            '{0}.json'.format(identifier))
+
+    def __contains__(self, identifier):
+        return os.path.exists(self.path_for(identifier))
+
+    def put(self, blob):
+        """Add a blob to the store.
+
+        Parameters
+        ----------
+        blob : `BlobBase`-type object
+            A blob.
+
+        Returns
+        -------
+        identifier : `str`
+            Identifier of the blob in the store.
+        """
+        return self.put_json(blob.json)
+
+    def put_json(self, blob_doc):
+        """Add a serialized blob to the store.
+
+        The blob is not written if a blob with the same identifier is already
+        in the store.
+
+        Parameters
+        ----------
+        blob_doc : `dict`
+            Blob JSON object (as produced by `BlobBase.json`).
+
+        Returns
+        -------
+        identifier : `str`
+            Identifier of the blob in the store.
+        """
+        identifier = blob_doc['identifier']
+        path = self.path_for(identifier)
+        if os.path.exists(path):
+            return identifier
+
+        dirname = os.path.dirname(path)
+        os.makedirs(dirname, exist_ok=True)
+        # Write to a temporary file and rename so that concurrent writers
+        # of the same blob never expose a partially-written file.
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(blob_doc, f, sort_keys=True)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return identifier
+
+    def get_json(self, identifier):
+        """Get a serialized blob from the store.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Blob identifier.
+
+        Returns
+        -------
+        blob_doc : `dict`
+            Blob JSON object.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the blob is not in the store.
+        """
+        path = self.path_for(identifier)
+        if not os.path.exists(path):
+            raise RuntimeError('Blob not found in store', identifier,
+                               self.root)
+        with open(path) as f:
+            return json.load(f)
+
+    def get(self, identifier):
+        """Get a blob from the store.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Blob identifier.
+
+        Returns
+        -------
+        blob : `DeserializedBlob`
+            The blob.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the blob is not in the store.
+        """
+        return DeserializedBlob.from_json(self.get_json(identifier))
@@ -0,0 +1,405 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['MeasurementCache', 'file_fingerprint']
+
+from collections import OrderedDict
+import hashlib
+import json
+import numbers
+import os
+import tempfile
+
+import numpy as np
+import astropy.units as u
+
+from .jsonmixin import JsonSerializationMixin
+from .datum import Datum
+from .measurement import MeasurementBase, DeserializedMeasurement
+
+
+class MeasurementCache(object):
+    """A persistent, local cache of measurements keyed by their inputs.
+
+    A measurement is cached under a key that hashes everything its result
+    depends on: the `Metric` definition, the measurement's parameters, its
+    specification and filter names, and *fingerprints* of its input data
+    supplied by the caller (see `file_fingerprint`). When none of these
+    change, the measurement and its blobs are restored from the cache
+    instead of being recomputed.
+
+    Entries are JSON files in the cache directory. The least recently used
+    entries are evicted once the cache holds more than ``max_entries``
+    entries or ``max_bytes`` bytes. To do so without scanning the directory
+    on every `put`, the cache lists its entries, in order of use, when it
+    first puts a measurement, and then keeps the list up to date with its
+    own `put` and `get` calls. Call `evict` to list the entries again, such
+    as those added by other processes.
+
+    Parameters
+    ----------
+    root : `str`
+        Directory of the cache. It is created if it does not exist.
+    max_entries : `int`, optional
+        Maximum number of cached measurements. By default, the number is
+        not limited.
+    max_bytes : `int`, optional
+        Maximum total size of the cache files, in bytes. By default, the
+        size is not limited.
+
+    Examples
+    --------
+    Restore a PA1 measurement if neither its parameters nor its input
+    catalog changed since it was cached::
+
+        cache = MeasurementCache('.validate_cache', max_bytes=2**30)
+        m = cache.measure(PA1Measurement, metric, args=(catalog_path,),
+                          parameters={'numRandomShuffles': 50},
+                          filter_name='r',
+                          inputs=[file_fingerprint(catalog_path)])
+    """
+
+    def __init__(self, root, max_entries=None, max_bytes=None):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+        # Sizes of the entries by path, least recently used first, and
+        # their total, once listed
+        self._index = None
+        self._index_bytes = 0
+
+    @staticmethod
+    def key_for(metric, parameters=None, spec_name=None, filter_name=None,
+                inputs=None):
+        """Compute the cache key of a measurement.
+
+        Parameters
+        ----------
+        metric : `Metric`
+            Metric of the measurement.
+        parameters : `dict`, optional
+            Parameters of the measurement, as `Datum`\ s (such as
+            `MeasurementBase.parameters`), `astropy.units.Quantity`\ s or
+            plain `str`, `bool` or number values, keyed by parameter name.
+            Plain numbers are dimensionless.
+        spec_name : `str`, optional
+            Specification level of the measurement.
+        filter_name : `str`, optional
+            Optical filter of the measurement.
+        inputs : obj, optional
+            JSON-serializable fingerprints of the measurement's input data,
+            such as a `list` of `file_fingerprint` results.
+
+        Returns
+        -------
+        key : `str`
+            SHA-256 hex digest of the canonical JSON of these arguments.
+
+        Raises
+        ------
+        TypeError
+            Raised if a parameter value is not of a supported type.
+        """
+        if parameters is None:
+            parameters = {}
+        # Only values and units of parameters affect the measurement
+        param_docs = {k: _parameter_doc(k, v) for k, v in parameters.items()}
+        doc = JsonSerializationMixin.jsonify_dict({
+            'metric': metric,
+            'parameters': param_docs,
+            'spec_name': spec_name,
+            'filter_name': filter_name,
+            'inputs': inputs})
+        canonical = json.dumps(doc, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def key_for_measurement(measurement, inputs=None):
+        """Compute the cache key of a measurement from its own metric,
+        parameters, specification and filter names.
+
+        Parameters
+        ----------
+        measurement : `MeasurementBase`-type
+            The measurement.
+        inputs : obj, optional
+            JSON-serializable fingerprints of the measurement's input data
+            (see `key_for`).
+
+        Returns
+        -------
+        key : `str`
+            Cache key, equal to the `key_for` key of the same arguments.
+        """
+        return MeasurementCache.key_for(
+            measurement.metric, parameters=measurement.parameters,
+            spec_name=measurement.spec_name,
+            filter_name=measurement.filter_name, inputs=inputs)
+
+    def path_for(self, key):
+        """File path of a cache entry.
+
+        Parameters
+        ----------
+        key : `str`
+            Cache key (see `key_for`).
+
+        Returns
+        -------
+        path : `str`
+            Path of the entry's JSON file. The file may not exist.
+        """
+        return os.path.join(self.root, key[:2], '{0}.json'.format(key))
+
+    def __contains__(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def __len__(self):
+        return len(self._entries())
+
+    def get(self, key):
+        """Restore a cached measurement.
+
+        Parameters
+        ----------
+        key : `str`
+            Cache key (see `key_for`).
+
+        Returns
+        -------
+        measurement : `DeserializedMeasurement`
+            The cached measurement, with its blobs.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the key is not in the cache.
+        """
+        path = self.path_for(key)
+        try:
+            with open(path) as f:
+                doc = json.load(f)
+        except FileNotFoundError:
+            raise RuntimeError('Measurement not found in cache', key,
+                               self.root)
+        # Mark the entry as recently used
+        os.utime(path)
+        if self._index is not None and path in self._index:
+            self._index.move_to_end(path)
+        return DeserializedMeasurement.from_json(doc['measurement'],
+                                                 blobs_json=doc['blobs'])
+
+    def put(self, measurement, inputs=None):
+        """Add a measurement to the cache, evicting the least recently used
+        entries if the cache is full.
+
+        The measurement is cached under the key of its own metric,
+        parameters, specification and filter names (see
+        `key_for_measurement`), so that it is never stored under the key of
+        other parameters.
+
+        Parameters
+        ----------
+        measurement : `MeasurementBase`-type
+            Measurement to cache, with its blobs.
+        inputs : obj, optional
+            JSON-serializable fingerprints of the measurement's input data
+            (see `key_for`).
+
+        Returns
+        -------
+        key : `str`
+            Cache key of the measurement.
+        """
+        key = self.key_for_measurement(measurement, inputs=inputs)
+        doc = {'measurement': measurement.json,
+               'blobs': [b.json for b in measurement.blobs.values()]}
+
+        path = self.path_for(key)
+        dirname = os.path.dirname(path)
+        os.makedirs(dirname, exist_ok=True)
+        # Write to a temporary file and rename so that concurrent writers
+        # never expose a partially-written entry.
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(doc, f, sort_keys=True)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        if self.max_entries is not None or self.max_bytes is not None:
+            index = self._load_index()
+            self._index_bytes += size - index.pop(path, 0)
+            index[path] = size
+            self._evict_index()
+        return key
+
+    def measure(self, factory, metric, args=(), kwargs=None,
+                parameters=None, spec_name=None, filter_name=None,
+                inputs=None):
+        """Get a measurement from the cache, or make and cache it.
+
+        Parameters
+        ----------
+        factory : callable
+            Callable that returns a `MeasurementBase`-type object when called
+            as ``factory(*args, **kwargs)``.
+        metric : `Metric`
+            Metric of the measurement.
+        args : `tuple`, optional
+            Positional arguments of ``factory``.
+        kwargs : `dict`, optional
+            Keyword arguments of ``factory``.
+        parameters, spec_name, filter_name, inputs
+            Arguments of `key_for` identifying the measurement. They must
+            match the parameters, specification and filter names of the
+            measurement made by ``factory``.
+
+        Returns
+        -------
+        measurement : `MeasurementBase`-type
+            The cached measurement (a `DeserializedMeasurement`), or the
+            measurement made by ``factory``.
+
+        Raises
+        ------
+        ValueError
+            Raised if the measurement made by ``factory`` does not match
+            ``metric``, ``parameters``, ``spec_name`` or ``filter_name``; it
+            is then not cached.
+        """
+        key = self.key_for(metric, parameters=parameters,
+                           spec_name=spec_name, filter_name=filter_name,
+                           inputs=inputs)
+        try:
+            return self.get(key)
+        except RuntimeError:
+            pass
+        if kwargs is None:
+            kwargs = {}
+        measurement = factory(*args, **kwargs)
+        assert isinstance(measurement, MeasurementBase)
+        if self.key_for_measurement(measurement, inputs=inputs) != key:
+            raise ValueError('Measurement does not match the metric, '
+                             'parameters, spec_name or filter_name of its '
+                             'cache key', measurement.identifier)
+        self.put(measurement, inputs=inputs)
+        return measurement
+
+    def evict(self):
+        """Remove the least recently used entries until the cache is within
+        ``max_entries`` and ``max_bytes``.
+
+        The entries are listed again from the cache directory, in order of
+        their last use.
+        """
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        self._index = None
+        self._load_index()
+        self._evict_index()
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._index = OrderedDict()
+        self._index_bytes = 0
+
+    def _load_index(self):
+        """List the entries of the cache, least recently used first, unless
+        they are already listed.
+        """
+        if self._index is None:
+            entries = sorted(self._entries(), key=lambda entry: entry[1])
+            self._index = OrderedDict(
+                (path, size) for path, _, size in entries)
+            self._index_bytes = sum(self._index.values())
+        return self._index
+
+    def _evict_index(self):
+        """Remove the least recently used listed entries until the cache is
+        within ``max_entries`` and ``max_bytes``.
+        """
+        index = self._index
+        while index and (
+                (self.max_entries is not None and
+                 len(index) > self.max_entries) or
+                (self.max_bytes is not None and
+                 self._index_bytes > self.max_bytes)):
+            path, size = index.popitem(last=False)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                # Evicted concurrently
+                pass
+            self._index_bytes -= size
+
+    def _entries(self):
+        """List ``(path, mtime, size)`` tuples of the cache entries."""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_mtime_ns, stat.st_size))
+        return entries
+
+
+def _parameter_doc(name, value):
+    """Value and unit of a measurement parameter, for cache keys."""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, Datum):
+        datum = value
+    elif isinstance(value, (u.Quantity, str, bool)) or value is None:
+        datum = Datum(value)
+    elif isinstance(value, numbers.Number):
+        datum = Datum(value, unit='')
+    else:
+        raise TypeError('Unsupported type of parameter {0}: {1}'.format(
+            name, type(value).__name__))
+    doc = datum.json
+    value = doc['value']
+    if isinstance(value, np.generic):
+        value = value.item()
+    return [value, doc['unit']]
+
+
+def file_fingerprint(path, content=False):
+    """Fingerprint of an input file, for `MeasurementCache` keys.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the file.
+    content : `bool`, optional
+        If `True`, the fingerprint is a hash of the file's content, so it
+        does not change when the file is moved or copied. Otherwise (the
+        default, which is much faster for large files) it is made of the
+        file's absolute path, size and modification time.
+
+    Returns
+    -------
+    fingerprint : `list`
+        JSON-serializable fingerprint.
+    """
+    if content:
+        hasher = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+        return ['sha256', hasher.hexdigest()]
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
@@ -0,0 +1,270 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['CatalogConsumer', 'CatalogStream', 'iter_npy_chunks',
+           'iter_npz_chunks']
+
+import abc
+import zipfile
+
+import numpy as np
+
+from .measurement import MeasurementBase
+from .job import Job
+
+
+class CatalogConsumer(metaclass=abc.ABCMeta):
+    """Base class of measurements made from a stream of catalog chunks.
+
+    A `CatalogStream` calls `consume` for each chunk of the catalog, then
+    `finalize` to get the measurements. Consumers typically feed chunks to
+    streaming accumulators (such as `Moments` or `QuantileSketchDatum`) so
+    that their memory use does not depend on the size of the catalog.
+    """
+
+    @abc.abstractmethod
+    def consume(self, chunk):
+        """Process a chunk of the catalog.
+
+        Parameters
+        ----------
+        chunk : `numpy.ndarray` or `dict`
+            Rows of the catalog: a structured array, or a `dict` of column
+            arrays. Columns are accessed as ``chunk['name']`` in both cases.
+        """
+        pass
+
+    @abc.abstractmethod
+    def finalize(self):
+        """Make the measurements once all chunks are consumed.
+
+        Returns
+        -------
+        measurements : `MeasurementBase`-type or `list`
+            Measurement, or measurements, to register in the `Job`.
+        """
+        pass
+
+
+class CatalogStream(object):
+    """Read a catalog once, in chunks, and feed every chunk to several
+    measurements.
+
+    Parameters
+    ----------
+    source : `str` or iterable
+        Path of a ``.npy`` file (a structured or plain array, read with
+        `iter_npy_chunks`), or of a ``.npz`` file (arrays of equal length
+        treated as columns, read with `iter_npz_chunks`). Alternatively, an
+        iterable of chunks.
+    chunk_size : `int`, optional
+        Number of rows per chunk, which bounds memory use.
+
+    Examples
+    --------
+    ::
+
+        stream = CatalogStream('matches.npz', chunk_size=1000000)
+        stream.register(PA1Consumer(), columns=['mag', 'mag_err'])
+        stream.register(AM1Consumer(), columns=['ra', 'dec'])
+        job = stream.run()
+    """
+
+    def __init__(self, source, chunk_size=100000):
+        self.source = source
+        self.chunk_size = chunk_size
+        self._consumers = []
+
+    def register(self, consumer, columns=None):
+        """Register a consumer of the catalog's chunks.
+
+        Parameters
+        ----------
+        consumer : `CatalogConsumer`
+            The consumer.
+        columns : `list` of `str`, optional
+            Columns that the consumer uses. Chunks passed to the consumer
+            only have these columns, and only the columns used by some
+            consumer are read from ``.npz`` files. By default, all columns
+            are passed.
+        """
+        if columns is not None:
+            columns = list(columns)
+        self._consumers.append((consumer, columns))
+
+    def _columns(self):
+        """Columns needed by the consumers, or `None` for all columns."""
+        columns = []
+        for _, consumer_columns in self._consumers:
+            if consumer_columns is None:
+                return None
+            columns.extend(c for c in consumer_columns if c not in columns)
+        return columns
+
+    def chunks(self):
+        """Iterate over the chunks of the catalog.
+
+        Yields
+        ------
+        chunk : `numpy.ndarray` or `dict`
+            Rows of the catalog, with the columns used by the consumers.
+        """
+        columns = self._columns()
+        if isinstance(self.source, str):
+            if self.source.endswith('.npz'):
+                return iter_npz_chunks(self.source, self.chunk_size,
+                                       columns=columns)
+            return iter_npy_chunks(self.source, self.chunk_size,
+                                   columns=columns)
+        return iter(self.source)
+
+    def run(self, job=None):
+        """Feed all chunks of the catalog to the consumers, and register
+        their measurements in a `Job`.
+
+        Parameters
+        ----------
+        job : `Job`, optional
+            Job to register measurements in. By default, a new `Job` is
+            created.
+
+        Returns
+        -------
+        job : `Job`
+            The job containing the measurements (and their blobs).
+        """
+        if job is None:
+            job = Job()
+        for chunk in self.chunks():
+            for consumer, columns in self._consumers:
+                consumer.consume(_select_columns(chunk, columns))
+        for consumer, _ in self._consumers:
+            result = consumer.finalize()
+            if isinstance(result, MeasurementBase):
+                result = [result]
+            for m in result:
+                job.register_measurement(m)
+        return job
+
+
+def _select_columns(chunk, columns):
+    """Restrict a chunk to some columns."""
+    if columns is None:
+        return chunk
+    if isinstance(chunk, dict):
+        return {name: chunk[name] for name in columns}
+    if chunk.dtype.names is None:
+        # Plain arrays have no columns
+        return chunk
+    return chunk[columns]
+
+
+def iter_npy_chunks(path, chunk_size, columns=None):
+    """Iterate over the rows of a ``.npy`` array file in chunks.
+
+    The file is memory-mapped, so only the rows of the current chunk are
+    read into memory.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the ``.npy`` file.
+    chunk_size : `int`
+        Number of rows per chunk.
+    columns : `list` of `str`, optional
+        Fields of a structured array to keep. By default all fields are
+        kept.
+
+    Yields
+    ------
+    chunk : `numpy.ndarray`
+        Copy of the rows of the chunk, along the first axis.
+    """
+    array = np.load(path, mmap_mode='r')
+    for start in range(0, len(array), chunk_size):
+        chunk = array[start:start + chunk_size]
+        if columns is not None and array.dtype.names is not None:
+            chunk = chunk[columns]
+        yield np.array(chunk)
+
+
+def iter_npz_chunks(path, chunk_size, columns=None):
+    """Iterate over the rows of the arrays of a ``.npz`` file in chunks.
+
+    Arrays are read incrementally from the (possibly compressed) archive,
+    so only the rows of the current chunk are held in memory.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the ``.npz`` file (as written by `numpy.savez` or
+        `numpy.savez_compressed`). Its arrays are treated as the columns of
+        a catalog and must have the same length.
+    chunk_size : `int`
+        Number of rows per chunk.
+    columns : `list` of `str`, optional
+        Names of the arrays to read. By default all arrays are read.
+
+    Yields
+    ------
+    chunk : `dict`
+        Rows of the chunk of each array, keyed by array name.
+
+    Raises
+    ------
+    ValueError
+        Raised if arrays have different lengths, or cannot be read
+        incrementally (Fortran-ordered or object arrays).
+    """
+    with zipfile.ZipFile(path) as archive:
+        names = [n[:-4] for n in archive.namelist() if n.endswith('.npy')]
+        if columns is not None:
+            missing = set(columns) - set(names)
+            if missing:
+                raise ValueError('Columns not in {0}: {1}'.format(
+                    path, sorted(missing)))
+            names = list(columns)
+
+        readers = [_NpyStreamReader(archive.open(name + '.npy'))
+                   for name in names]
+        try:
+            lengths = set(reader.length for reader in readers)
+            if len(lengths) > 1:
+                raise ValueError('Arrays of {0} have different lengths'.format(
+                    path))
+            length = lengths.pop() if lengths else 0
+            for start in range(0, length, chunk_size):
+                n = min(chunk_size, length - start)
+                yield {name: reader.read(n)
+                       for name, reader in zip(names, readers)}
+        finally:
+            for reader in readers:
+                reader.stream.close()
+
+
+class _NpyStreamReader(object):
+    """Read the rows of a ``.npy`` stream incrementally."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            header = np.lib.format.read_array_header_1_0(stream)
+        else:
+            header = np.lib.format.read_array_header_2_0(stream)
+        shape, fortran_order, dtype = header
+        if fortran_order and len(shape) > 1:
+            raise ValueError('Fortran-ordered arrays cannot be streamed')
+        if dtype.hasobject:
+            raise ValueError('Object arrays cannot be streamed')
+        self.dtype = dtype
+        self.row_shape = shape[1:]
+        self.length = shape[0] if shape else 1
+        self.row_size = dtype.itemsize * int(np.prod(self.row_shape))
+
+    def read(self, n):
+        """Read the next ``n`` rows."""
+        data = self.stream.read(n * self.row_size)
+        if len(data) != n * self.row_size:
+            raise ValueError('Unexpected end of array data')
+        array = np.frombuffer(data, dtype=self.dtype)
+        return array.reshape((n,) + self.row_shape)
@@ -0,0 +1,262 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Command-line tool to inspect, convert, merge and score job files.
+
+Run ``validateJob.py --help`` (or ``python -m lsst.validate.base.cli
+--help``) for usage.
+"""
+
+__all__ = ['main']
+
+import argparse
+import concurrent.futures
+import functools
+import json
+import os
+import sys
+
+import numpy as np
+
+from .blobstore import BlobStore
+from .jobfile import (job_file_format, read_job_json, write_job_json,
+                      merge_job_files)
+from .rescore import SCORE_PASS, SCORE_FAIL, SCORE_NO_SPEC, rescore_files
+
+
+def main(argv=None):
+    """Run the command-line tool.
+
+    Parameters
+    ----------
+    argv : `list` of `str`, optional
+        Command-line arguments. By default, `sys.argv` is used.
+
+    Returns
+    -------
+    status : `int`
+        Exit status.
+    """
+    parser = _make_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    try:
+        _check_pickle_inputs(args)
+        return args.func(args)
+    except (RuntimeError, ValueError, OSError) as e:
+        sys.stderr.write('{0}: error: {1}\n'.format(parser.prog, e))
+        return 1
+
+
+def _make_parser():
+    parser = argparse.ArgumentParser(
+        prog='validateJob.py',
+        description='Inspect, convert, merge and score validate_base job '
+                    'files (.json, .json.gz, .pickle, and sidecar jobs '
+                    'whose blobs are in a blob store).')
+    subparsers = parser.add_subparsers(dest='command')
+
+    def add_inputs(p):
+        p.add_argument('paths', nargs='+', metavar='JOB', help='Job files.')
+        p.add_argument('--allow-pickle', action='store_true',
+                       help='Read pickled (.pickle, .pkl) job files. Reading '
+                            'a pickle can run arbitrary code; only read '
+                            'trusted files.')
+
+    def add_parallel(p):
+        p.add_argument('--jobs', '-j', type=int, default=1,
+                       help='Number of files processed in parallel '
+                            '(default: 1).')
+
+    p = subparsers.add_parser('summarize', help='Summarize job files.')
+    add_inputs(p)
+    p.add_argument('--measurements', action='store_true',
+                   help='List every measurement.')
+    p.add_argument('--json', action='store_true',
+                   help='Write summaries as JSON.')
+    add_parallel(p)
+    p.set_defaults(func=_summarize_command)
+
+    p = subparsers.add_parser(
+        'convert', help='Convert job files to another format.')
+    add_inputs(p)
+    p.add_argument('--to', required=True, dest='format',
+                   choices=['json', 'json.gz', 'pickle', 'sidecar'],
+                   help='Output format. Sidecar jobs are .json files whose '
+                        'blobs are written to --blob-store.')
+    p.add_argument('--output-dir', default=None,
+                   help='Directory of the converted files (default: the '
+                        'directory of each input).')
+    p.add_argument('--blob-store', default=None,
+                   help='Blob store directory, to read the blobs of sidecar '
+                        'inputs and write those of sidecar outputs.')
+    add_parallel(p)
+    p.set_defaults(func=_convert_command)
+
+    p = subparsers.add_parser('merge', help='Merge job files into one.')
+    add_inputs(p)
+    p.add_argument('--output', '-o', required=True,
+                   help='Merged .json or .json.gz job file.')
+    p.add_argument('--blob-store', default=None,
+                   help='Blob store directory of sidecar inputs; the merged '
+                        'job is then a sidecar job in the same store.')
+    p.set_defaults(func=_merge_command)
+
+    p = subparsers.add_parser(
+        'score', help='Score job measurements against specifications.')
+    add_inputs(p)
+    p.add_argument('--metrics', required=True,
+                   help='Metric definition YAML file.')
+    p.add_argument('--spec', default='design',
+                   help='Specification level (default: design).')
+    p.add_argument('--json', action='store_true',
+                   help='Write scores as JSON.')
+    add_parallel(p)
+    p.set_defaults(func=_score_command)
+    return parser
+
+
+def _check_pickle_inputs(args):
+    """Refuse to read pickled job files unless ``--allow-pickle`` is set.
+    """
+    if args.allow_pickle:
+        return
+    for path in args.paths:
+        if job_file_format(path) == 'pickle':
+            raise RuntimeError('{0}: reading pickled job files can run '
+                               'arbitrary code; set --allow-pickle to read '
+                               'trusted files'.format(path))
+
+
+def _map(func, items, jobs):
+    """Map a function over items, in parallel worker processes if
+    ``jobs > 1``, keeping the order of the items.
+    """
+    if jobs <= 1 or len(items) <= 1:
+        return list(map(func, items))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(func, items))
+
+
+def _summarize_command(args):
+    summaries = _map(_summarize_file, args.paths, args.jobs)
+    if args.json:
+        json.dump(summaries, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+    for summary in summaries:
+        sys.stdout.write(
+            '{path}: {n_measurements:d} measurements of {n_metrics:d} '
+            'metrics, {n_blobs:d} blobs\n'.format(
+                n_metrics=len(summary['metrics']), **summary))
+        for key in ('metrics', 'filter_names', 'spec_names'):
+            sys.stdout.write('  {0}: {1}\n'.format(
+                key.replace('_', ' '), ', '.join(summary[key]) or '-'))
+        if args.measurements:
+            for row in summary['rows']:
+                sys.stdout.write('  {0:<12} {1:<8} {2:<8} {3} {4}\n'.format(
+                    *['-' if v is None else v for v in row]))
+    return 0
+
+
+def _summarize_file(path):
+    """Summarize a job file without rebuilding its measurements."""
+    doc = read_job_json(path)
+    rows = [(m['metric']['name'], m['filter_name'], m['spec_name'],
+             m['value'], m['unit'])
+            for m in doc['measurements']]
+
+    def names(index):
+        return sorted(set(row[index] for row in rows
+                          if row[index] is not None))
+
+    return {'path': path,
+            'n_measurements': len(rows),
+            'n_blobs': len(doc['blobs']) + len(doc.get('blob_refs', [])),
+            'metrics': names(0),
+            'filter_names': names(1),
+            'spec_names': names(2),
+            'rows': rows}
+
+
+def _convert_command(args):
+    if args.format == 'sidecar' and args.blob_store is None:
+        sys.stderr.write('Converting to sidecar jobs requires '
+                         '--blob-store\n')
+        return 2
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    convert = functools.partial(_convert_file, format=args.format,
+                                output_dir=args.output_dir,
+                                blob_store_root=args.blob_store)
+    for path, output_path in zip(args.paths,
+                                 _map(convert, args.paths, args.jobs)):
+        sys.stdout.write('{0} -> {1}\n'.format(path, output_path))
+    return 0
+
+
+def _convert_file(path, format, output_dir=None, blob_store_root=None):
+    """Convert a job file, returning the path of the converted file."""
+    blob_store = None
+    if blob_store_root is not None:
+        blob_store = BlobStore(blob_store_root)
+    doc = read_job_json(path, blob_store=blob_store)
+    if doc.get('blob_refs'):
+        # Blob references are resolved when a blob store is given
+        raise RuntimeError('{0}: blobs of sidecar jobs are in a blob store; '
+                           'set --blob-store to convert it'.format(path))
+
+    extension = {'json': '.json', 'json.gz': '.json.gz',
+                 'pickle': '.pickle', 'sidecar': '.json'}[format]
+    basename = os.path.basename(path)
+    stem = basename[:-len('.' + job_file_format(path))]
+    if basename.endswith('.pkl'):
+        stem = basename[:-len('.pkl')]
+    output_path = os.path.join(output_dir or os.path.dirname(path),
+                               stem + extension)
+    if os.path.abspath(output_path) == os.path.abspath(path):
+        raise RuntimeError('Converted job would overwrite its input', path)
+    write_job_json(doc, output_path,
+                   blob_store=blob_store if format == 'sidecar' else None)
+    return output_path
+
+
+def _merge_command(args):
+    blob_store = None
+    if args.blob_store is not None:
+        blob_store = BlobStore(args.blob_store)
+    counts = merge_job_files(args.paths, args.output, blob_store=blob_store)
+    sys.stdout.write('{0}: {1:d} measurements, {2:d} blobs\n'.format(
+        args.output, counts['measurements'], counts['blobs']))
+    return 0
+
+
+def _score_command(args):
+    scores = rescore_files(args.paths, args.metrics, spec_name=args.spec,
+                           max_workers=args.jobs)
+    labels = {SCORE_PASS: 'PASS', SCORE_FAIL: 'FAIL',
+              SCORE_NO_SPEC: 'NO SPEC'}
+    rows = []
+    for row in scores:
+        value, threshold = row['value'], row['threshold']
+        rows.append((row['path'], row['metric'], row['filter_name'],
+                     None if np.isnan(value) else float(value), row['unit'],
+                     None if np.isnan(threshold) else float(threshold),
+                     labels[row['score']]))
+    if args.json:
+        keys = ('path', 'metric', 'filter_name', 'value', 'unit',
+                'threshold', 'result')
+        json.dump([dict(zip(keys, row)) for row in rows], sys.stdout,
+                  indent=2)
+        sys.stdout.write('\n')
+    else:
+        for row in rows:
+            sys.stdout.write(
+                '{0}  {1:<12} {2:<8} {3:>14} {5:>14} {4:<8} {6}\n'.format(
+                    *['-' if v is None else v for v in row]))
+    failed = bool(np.any(scores['score'] == SCORE_FAIL))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
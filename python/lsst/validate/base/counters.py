@@ -0,0 +1,262 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['CallCounters', 'hot_path_counters']
+
+from collections import OrderedDict
+import functools
+import threading
+import time
+
+from .datum import Datum, QuantityAttributeMixin
+from .job import Job
+from .metric import Metric
+
+
+class CallCounters(object):
+    """Registry of methods whose calls are counted and timed.
+
+    While no registry counts a method, the method is untouched, so counting
+    costs nothing. Enabling a registry replaces each of its methods on its
+    class with a wrapper that times calls and passes their wall time to
+    every enabled registry that counts the method; once no enabled registry
+    counts it, the original method is restored. Registries may therefore
+    share methods and be enabled and disabled in any order.
+
+    Times are inclusive: the time of a call includes the time of the
+    counted calls it makes (for example, `Job.from_json` includes the
+    `Datum.from_json` calls it makes). Calls from all threads of the process
+    are counted; calls in worker processes are not.
+
+    Use `hot_path_counters`, which has the library's hot paths registered,
+    rather than making new registries.
+
+    Examples
+    --------
+    The registry is a context manager that enables counting in its context.
+    Contexts may be nested, and entered by several threads at once; calls
+    are counted until the last of them exits::
+
+        from lsst.validate.base import hot_path_counters
+
+        with hot_path_counters:
+            job = Job.from_json(doc)
+        for name, stats in hot_path_counters.snapshot().items():
+            print(name, stats['calls'], stats['time'])
+    """
+
+    def __init__(self):
+        self._targets = OrderedDict()
+        self._stats = {}
+        # Functions recording calls, by counter name, while enabled
+        self._recorders = None
+        # Nesting depth of the contexts of each thread, and number of
+        # threads in a context
+        self._local = threading.local()
+        self._active_threads = 0
+        self._lock = threading.Lock()
+
+    def register(self, owner, attr, name=None):
+        """Register a method to count.
+
+        Parameters
+        ----------
+        owner : `type`
+            Class that defines the method.
+        attr : `str`
+            Name of the method (a function, `classmethod`, `staticmethod` or
+            `property` getter) in ``owner``.
+        name : `str`, optional
+            Name of the counter. By default, ``'<owner>.<attr>'``.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the registry is enabled, or ``attr`` is not defined by
+            ``owner``.
+        """
+        if self.enabled:
+            raise RuntimeError('Cannot register methods while counting')
+        if attr not in vars(owner):
+            raise RuntimeError('{0} does not define {1}'.format(
+                owner.__name__, attr))
+        if name is None:
+            name = '{0}.{1}'.format(owner.__name__, attr)
+        self._targets[name] = (owner, attr)
+        self._stats[name] = [0, 0.]
+
+    @property
+    def names(self):
+        """Names of the counters (`list` of `str`)."""
+        return list(self._targets)
+
+    @property
+    def enabled(self):
+        """`True` if calls are being counted (`bool`)."""
+        return self._recorders is not None
+
+    def enable(self):
+        """Start counting calls of the registered methods."""
+        with self._lock:
+            self._enable()
+
+    def disable(self):
+        """Stop counting calls, and restore the registered methods that no
+        other enabled registry counts.
+
+        Counts are kept until `reset` is called.
+        """
+        with self._lock:
+            self._disable()
+
+    def _enable(self):
+        """Start counting; the caller holds ``self._lock``."""
+        if self._recorders is not None:
+            return
+        self._recorders = OrderedDict(
+            (name, self._count_call(name)) for name in self._targets)
+        for name, (owner, attr) in self._targets.items():
+            _attach(owner, attr, self._recorders[name])
+
+    def _disable(self):
+        """Stop counting; the caller holds ``self._lock``."""
+        if self._recorders is None:
+            return
+        for name, (owner, attr) in self._targets.items():
+            _detach(owner, attr, self._recorders[name])
+        self._recorders = None
+
+    def reset(self):
+        """Set all counts and times to zero."""
+        with self._lock:
+            for stats in self._stats.values():
+                stats[:] = [0, 0.]
+
+    def snapshot(self):
+        """Get the counts and times accumulated so far.
+
+        Returns
+        -------
+        snapshot : `collections.OrderedDict`
+            For each counter name, a `dict` with the number of ``calls`` and
+            their total wall ``time`` in seconds.
+        """
+        with self._lock:
+            return OrderedDict(
+                (name, {'calls': stats[0], 'time': stats[1]})
+                for name, stats in self._stats.items())
+
+    def _count_call(self, name):
+        """Make the function that records a call of counter ``name``."""
+        stats = self._stats[name]
+        lock = self._lock
+
+        def record(elapsed):
+            with lock:
+                stats[0] += 1
+                stats[1] += elapsed
+
+        return record
+
+    def __enter__(self):
+        # Nested contexts, and contexts of concurrent threads, count until
+        # the last outermost one exits
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            with self._lock:
+                if self._active_threads == 0:
+                    self._enable()
+                self._active_threads += 1
+        self._local.depth = depth + 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            with self._lock:
+                self._active_threads -= 1
+                if self._active_threads == 0:
+                    self._disable()
+        return False
+
+
+class _Patch(object):
+    """Wrapper of a method counted by one or more enabled registries."""
+
+    def __init__(self, original):
+        self.original = original
+        # Replaced rather than mutated, so calls iterate over a snapshot
+        self.recorders = ()
+
+    def record(self, elapsed):
+        for recorder in self.recorders:
+            recorder(elapsed)
+
+
+# Patched methods, keyed by (owner, attr)
+_patches = {}
+_patches_lock = threading.Lock()
+
+
+def _attach(owner, attr, recorder):
+    """Pass the wall time of calls of a method to ``recorder``, wrapping the
+    method if no other registry counts it.
+    """
+    with _patches_lock:
+        patch = _patches.get((owner, attr))
+        if patch is None:
+            patch = _Patch(vars(owner)[attr])
+            setattr(owner, attr, _wrap(patch.original, patch.record))
+            _patches[(owner, attr)] = patch
+        patch.recorders += (recorder,)
+
+
+def _detach(owner, attr, recorder):
+    """Stop passing calls of a method to ``recorder``, restoring the
+    original method if no other registry counts it.
+    """
+    with _patches_lock:
+        patch = _patches[(owner, attr)]
+        patch.recorders = tuple(r for r in patch.recorders
+                                if r is not recorder)
+        if not patch.recorders:
+            setattr(owner, attr, patch.original)
+            del _patches[(owner, attr)]
+
+
+def _wrap(descriptor, record):
+    """Wrap the function of a method descriptor with a call counter."""
+    def timed(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(time.perf_counter() - start)
+        return wrapper
+
+    if isinstance(descriptor, property):
+        return property(timed(descriptor.fget), descriptor.fset,
+                        descriptor.fdel, descriptor.__doc__)
+    if isinstance(descriptor, classmethod):
+        return classmethod(timed(descriptor.__func__))
+    if isinstance(descriptor, staticmethod):
+        return staticmethod(timed(descriptor.__func__))
+    return timed(descriptor)
+
+
+hot_path_counters = CallCounters()
+"""`CallCounters` of the library's serialization and scoring hot paths:
+`Job.json`, `Job.from_json`, `Datum.from_json`, ``Datum._rebuild_quantity``
+(used by all ``from_json`` methods), `Metric.from_yaml`, `Metric.get_spec`
+and `Metric.check_spec`.
+"""
+
+hot_path_counters.register(Job, 'json')
+hot_path_counters.register(Job, 'from_json')
+hot_path_counters.register(Datum, 'from_json')
+hot_path_counters.register(QuantityAttributeMixin, '_rebuild_quantity',
+                           name='Datum._rebuild_quantity')
+hot_path_counters.register(Metric, 'from_yaml')
+hot_path_counters.register(Metric, 'get_spec')
+hot_path_counters.register(Metric, 'check_spec')
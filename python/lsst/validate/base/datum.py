@@ -95,6 +95,32 @@ class QuantityAttributeMixin(object):
             _quantity = value * u.Unit(unit)
         return _quantity
 
+    @staticmethod
+    def _reduce_quantity(q):
+        """Split a quantity into a picklable ``(value, unit)`` tuple.
+
+        The value of an astropy quantity is a plain `numpy.ndarray` (or
+        scalar), so callers that pickle with protocol 5 and a
+        ``buffer_callback`` can send arrays out-of-band.
+        The unit of a non-quantity type is `None`.
+        """
+        if isinstance(q, u.Quantity):
+            return q.value, q.unit
+        else:
+            return q, None
+
+    @staticmethod
+    def _restore_quantity(value, unit):
+        """Rebuild a quantity from the ``(value, unit)`` tuple produced by
+        `_reduce_quantity`, without copying array values.
+        """
+        if unit is None:
+            return value
+        elif isinstance(value, np.ndarray):
+            return u.Quantity(value, unit, dtype=value.dtype, copy=False)
+        else:
+            return u.Quantity(value, unit)
+
 
 class Datum(QuantityAttributeMixin, JsonSerializationMixin):
     """A value annotated with units, a plot label and description.
@@ -135,6 +161,28 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
                              'if `quantity` is not an astropy.unit.Quantity, '
                              'str, bool, int or None.')
 
+    def __reduce__(self):
+        # Pickle the bare value and unit rather than the Quantity object.
+        # Subclasses with additional state must override this method.
+        value, unit = self._reduce_quantity(self.quantity)
+        return (_unpickle_datum,
+                (self.__class__, value, unit, self.label, self.description))
+
+    def _hash_values(self, hasher):
+        """Update a hashlib object with the values of the datum.
+
+        Used by `BlobBase.content_hash`. Subclasses whose `quantity` does not
+        represent all of their values must override this method.
+        """
+        q = self.quantity
+        if isinstance(q, u.Quantity):
+            values = np.ascontiguousarray(q.value)
+            hasher.update(
+                repr((values.dtype.str, values.shape)).encode('utf-8'))
+            hasher.update(values.tobytes())
+        else:
+            hasher.update(repr((type(q).__name__, q)).encode('utf-8'))
+
     @classmethod
     def from_json(cls, json_data):
         """Construct a Datum from a JSON dataset.
@@ -147,8 +195,13 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
         Returns
         -------
         datum : `Datum`
-            Datum from JSON.
+            Datum from JSON. Serialized quantile sketches are rebuilt as
+            `QuantileSketchDatum`\ s.
         """
+        if 'sketch' in json_data:
+            # Imported here because sketch imports this module
+            from .sketch import QuantileSketchDatum
+            return QuantileSketchDatum.from_json(json_data)
         q = Datum._rebuild_quantity(json_data['value'], json_data['unit'])
         d = cls(quantity=q, label=json_data['label'],
                 description=json_data['description'])
@@ -191,3 +244,12 @@ class Datum(QuantityAttributeMixin, JsonSerializationMixin):
     def description(self, value):
         assert isinstance(value, str) or value is None
         self._description = value
+
+
+def _unpickle_datum(cls, value, unit, label, description):
+    """Rebuild a `Datum` pickled by `Datum.__reduce__`."""
+    d = cls.__new__(cls)
+    d._label = label
+    d._description = description
+    d._quantity = QuantityAttributeMixin._restore_quantity(value, unit)
+    return d
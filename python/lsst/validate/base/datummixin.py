@@ -18,6 +18,20 @@ class DatumAttributeMixin(object):
         _label = None
         _description = None
 
+        if datum is not None and type(datum) is not Datum:
+            # Specialized Datum subclasses are registered as-is so that
+            # they keep their behaviour and storage.
+            if quantity is not None:
+                datum.quantity = quantity
+            if label is not None:
+                datum.label = label
+            elif datum.label is None:
+                datum.label = key
+            if description is not None:
+                datum.description = description
+            attribute[key] = datum
+            return
+
         if datum is not None:
             assert isinstance(datum, Datum)
             _value = datum.quantity
@@ -2,7 +2,8 @@
 """Exceptions for the lsst.validate namespace."""
 
 __all__ = ['ValidateError',
-           'ValidateSpecificationError']
+           'ValidateSpecificationError',
+           'ValidateDependencyError']
 
 
 class ValidateError(Exception):
@@ -13,3 +14,8 @@ class ValidateError(Exception):
 class ValidateSpecificationError(ValidateError):
     """Error accessing or using requirement specifications."""
     pass
+
+
+class ValidateDependencyError(ValidateError):
+    """Error resolving dependencies between metrics."""
+    pass
@@ -0,0 +1,183 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['MeasurementExecutor']
+
+import concurrent.futures
+import functools
+import pickle
+import time
+from multiprocessing import resource_tracker
+
+from .measurement import MeasurementBase
+from .job import Job
+from .performance import instrument as _instrument
+from .sharedmem import _handing_over_segments
+from .tracing import get_tracer, _measurement_span
+
+
+class MeasurementExecutor(object):
+    """Run measurements in a pool of worker processes and collect them in a
+    `Job`.
+
+    Measurements are described by *factories*: callables, such as
+    `MeasurementBase` subclasses, that make a measurement (or a list of
+    measurements) from their arguments. Factories and their arguments are
+    sent to worker processes, so they must be picklable (for example,
+    classes and functions defined at the top level of a module). The
+    measurements are pickled back to this process and registered as-is, so
+    their instance attributes must be picklable as well. Their arrays are
+    copied in the pickles, unless they are stored in shared memory (see
+    `SharedArrayDatum`).
+
+    Parameters
+    ----------
+    max_workers : `int`, optional
+        Number of worker processes. By default, the number of CPUs is used.
+        If ``1``, measurements are run serially in this process.
+    mp_context : `multiprocessing.context.BaseContext`, optional
+        Multiprocessing context used to start worker processes.
+    chunksize : `int`, optional
+        Number of measurements sent to a worker process at a time. Larger
+        chunks reduce inter-process communication for many quick
+        measurements.
+    instrument : `bool`, optional
+        If `True`, record the wall time, CPU time and memory used to make
+        each measurement in its `MeasurementBase.performance` attribute
+        (see `PerformanceMonitor`).
+
+    Examples
+    --------
+    Run a measurement for each filter on 32 cores::
+
+        executor = MeasurementExecutor(max_workers=32)
+        for filter_name in ('g', 'r', 'i'):
+            executor.submit(PA1Measurement, catalogs[filter_name],
+                            filter_name=filter_name)
+        job = executor.run()
+    """
+
+    def __init__(self, max_workers=None, mp_context=None, chunksize=1,
+                 instrument=False):
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.chunksize = chunksize
+        self.instrument = instrument
+        self._tasks = []
+
+    def submit(self, factory, *args, **kwargs):
+        """Add a measurement to be run by `run`.
+
+        Parameters
+        ----------
+        factory : callable
+            Callable that returns a `MeasurementBase`-type object, or a
+            `list` of them, when called as ``factory(*args, **kwargs)``.
+        *args
+            Positional arguments of ``factory``.
+        **kwargs
+            Keyword arguments of ``factory``.
+        """
+        self._tasks.append((factory, args, kwargs))
+
+    def run(self, job=None):
+        """Run all submitted measurements and register them in a `Job`.
+
+        Measurements are registered in the order they were submitted.
+
+        Parameters
+        ----------
+        job : `Job`, optional
+            Job to register measurements in. By default, a new `Job` is
+            created.
+
+        Returns
+        -------
+        job : `Job`
+            The job containing the measurements (and their blobs).
+        """
+        if job is None:
+            job = Job()
+        tasks, self._tasks = self._tasks, []
+        tracer = get_tracer()
+        run_task = functools.partial(_run_task, instrument=self.instrument,
+                                     trace=tracer is not None)
+
+        if self.max_workers == 1:
+            results = map(run_task, tasks)
+            self._register_results(job, results, tracer)
+        else:
+            # Start the resource tracker before workers are forked, so that
+            # shared memory segments created by workers (SharedArrayDatum)
+            # are tracked by one tracker that outlives the workers.
+            resource_tracker.ensure_running()
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=self.mp_context) as pool:
+                results = pool.map(
+                    functools.partial(_run_remote_task, run_task), tasks,
+                    chunksize=self.chunksize)
+                self._register_results(job, map(pickle.loads, results),
+                                       tracer)
+        return job
+
+    @staticmethod
+    def _register_results(job, results, tracer=None):
+        """Register measurements returned by `_run_task`."""
+        for measurements in results:
+            if tracer is not None:
+                measurements, span = measurements
+                tracer.add_span(**span)
+            for m in measurements:
+                job.register_measurement(m)
+
+
+def _run_task(task, instrument=False, trace=False):
+    """Make measurements in a worker process.
+
+    Parameters
+    ----------
+    task : `tuple`
+        ``(factory, args, kwargs)`` tuple.
+    instrument : `bool`, optional
+        If `True`, record the cost of the measurements (see
+        `PerformanceMonitor`).
+    trace : `bool`, optional
+        If `True`, also return the span of the measurements, for
+        `Tracer.add_span`.
+
+    Returns
+    -------
+    measurements : `list`
+        Measurements made by the factory. They are pickled to be sent back
+        to the parent process.
+    span : `dict`
+        Arguments of `Tracer.add_span` describing when, and in which process
+        and thread, the measurements were made. Only returned if ``trace``
+        is `True`.
+    """
+    factory, args, kwargs = task
+    start = time.perf_counter()
+    if instrument:
+        result = _instrument(factory, args=args, kwargs=kwargs)
+    else:
+        result = factory(*args, **kwargs)
+    if isinstance(result, MeasurementBase):
+        result = [result]
+    result = list(result)
+    if trace:
+        span = _measurement_span(factory, result, start, time.perf_counter())
+        return result, span
+    return result
+
+
+def _run_remote_task(run_task, task):
+    """Make measurements in a worker process and pickle them for the parent
+    process.
+
+    Shared memory segments of the measurements' blobs (see
+    `SharedArrayDatum`) are handed over to the unpickled datums, so that
+    they outlive the worker's datums.
+    """
+    result = run_task(task)
+    with _handing_over_segments():
+        return pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
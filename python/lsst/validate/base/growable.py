@@ -0,0 +1,155 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['GrowableArrayDatum']
+
+import numpy as np
+import astropy.units as u
+
+from .datum import Datum
+
+
+class GrowableArrayDatum(Datum):
+    """A one-dimensional array `Datum` that can be filled incrementally.
+
+    Values are appended to a pre-allocated buffer whose capacity doubles
+    whenever it is exhausted, so filling a datum with ``n`` values costs
+    amortized O(1) per value and no intermediate Python lists. The
+    `quantity` is an `astropy.units.Quantity` view of the filled part of
+    the buffer.
+
+    Use `BlobBase.register_growable_datum` to add a growable datum to a blob.
+
+    Parameters
+    ----------
+    unit : `str` or `astropy.units.Unit`, optional
+        Units of the datum. Appended quantities are converted to these units.
+    dtype : `numpy.dtype`, optional
+        Data type of the array.
+    capacity : `int`, optional
+        Initial capacity of the buffer (number of values).
+    label : `str`, optional
+        Label suitable for plot axes (without units).
+    description : `str`, optional
+        Extended description of the `Datum`.
+    """
+
+    def __init__(self, unit='', dtype=float, capacity=64, label=None,
+                 description=None):
+        self._unit = u.Unit(unit)
+        self._buffer = np.empty(max(int(capacity), 1), dtype=dtype)
+        self._size = 0
+        Datum.__init__(self, quantity=None, label=label,
+                       description=description)
+
+    def __reduce__(self):
+        # Only pickle the filled part of the buffer
+        return (_unpickle_growable_datum,
+                (self._buffer[:self._size], self._unit, self.label,
+                 self.description))
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        """Number of values the buffer can hold before it is reallocated
+        (`int`).
+        """
+        return len(self._buffer)
+
+    @property
+    def quantity(self):
+        """Values appended so far (`astropy.units.Quantity`).
+
+        The quantity is a view of the internal buffer; it is not copied.
+        Setting the quantity replaces the values with a copy converted to
+        the datum's units and data type; plain numbers and arrays are
+        assumed to be in the datum's units already.
+        """
+        return u.Quantity(self._buffer[:self._size], self._unit,
+                          dtype=self._buffer.dtype, copy=False)
+
+    @quantity.setter
+    def quantity(self, q):
+        # Replaces the values wholesale (also used by Datum.__init__). Like
+        # appended values, they are copied into the datum's own buffer, in
+        # its units and data type.
+        if q is None:
+            self._size = 0
+            return
+        if isinstance(q, u.Quantity):
+            q = q.to_value(self._unit)
+        values = np.atleast_1d(np.asarray(q, dtype=self._buffer.dtype))
+        assert values.ndim == 1
+        self._buffer = values.copy()
+        self._size = len(values)
+
+    def append(self, value):
+        """Append a scalar or a chunk of values.
+
+        Parameters
+        ----------
+        value : `astropy.units.Quantity`, `float`, or array_like
+            Value, or one-dimensional array of values, to append.
+            Quantities are converted into the datum's units. Plain numbers
+            and arrays are assumed to be in the datum's units already.
+
+        Raises
+        ------
+        astropy.units.UnitConversionError
+            Raised if ``value`` is a quantity with units that are not
+            convertible to the datum's units.
+        """
+        if isinstance(value, u.Quantity):
+            value = value.to_value(self._unit)
+        values = np.asarray(value, dtype=self._buffer.dtype)
+        if values.ndim == 0:
+            self._reserve(1)
+            self._buffer[self._size] = values
+            self._size += 1
+        else:
+            n = len(values)
+            self._reserve(n)
+            self._buffer[self._size:self._size + n] = values
+            self._size += n
+
+    def _reserve(self, n):
+        """Ensure the buffer can hold ``n`` more values, doubling its
+        capacity as necessary.
+        """
+        required = self._size + n
+        capacity = len(self._buffer)
+        if required <= capacity:
+            return
+        capacity = max(capacity, 1)
+        while capacity < required:
+            capacity *= 2
+        buffer = np.empty(capacity, dtype=self._buffer.dtype)
+        buffer[:self._size] = self._buffer[:self._size]
+        self._buffer = buffer
+
+    def finalize(self):
+        """Stop growing the datum and return its values.
+
+        The buffer is truncated to the appended values without copying them.
+        Later appends reallocate the buffer.
+
+        Returns
+        -------
+        quantity : `astropy.units.Quantity`
+            Values of the datum.
+        """
+        self._buffer = self._buffer[:self._size]
+        return self.quantity
+
+
+def _unpickle_growable_datum(values, unit, label, description):
+    """Rebuild a `GrowableArrayDatum` pickled by
+    `GrowableArrayDatum.__reduce__`.
+    """
+    d = GrowableArrayDatum(unit=unit, dtype=values.dtype, capacity=1,
+                           label=label, description=description)
+    # The unpickled array is not shared, so it becomes the buffer
+    d._buffer = values
+    d._size = len(values)
+    return d
@@ -0,0 +1,376 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Local history of job measurements in an SQLite database."""
+
+__all__ = ['JobHistory']
+
+import concurrent.futures
+from datetime import datetime
+import json
+import os
+import sqlite3
+
+import numpy as np
+import astropy.units as u
+
+from .jobfile import read_job_json
+from .metric import Metric
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    time REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT PRIMARY KEY,
+    json TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS measurements (
+    identifier TEXT PRIMARY KEY,
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    time REAL NOT NULL,
+    metric TEXT,
+    filter_name TEXT,
+    spec_name TEXT,
+    value REAL,
+    unit TEXT
+);
+CREATE INDEX IF NOT EXISTS measurements_by_metric
+    ON measurements (metric, filter_name, time);
+CREATE INDEX IF NOT EXISTS measurements_by_job
+    ON measurements (job_id);
+CREATE TABLE IF NOT EXISTS blob_refs (
+    measurement TEXT NOT NULL,
+    name TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    PRIMARY KEY (measurement, name)
+);
+"""
+
+_QUERY_DTYPE = [('time', float), ('value', float), ('identifier', object),
+                ('filter_name', object), ('spec_name', object),
+                ('source', object)]
+
+
+class JobHistory(object):
+    """Local store of the measurements of many jobs, indexed for queries of
+    metric values over time.
+
+    Job files are ingested into an SQLite database: each measurement's
+    metric, filter and specification names, value, unit and blob
+    identifiers, with the time of its job, along with the definitions of
+    the metrics. Blobs themselves are not stored; keep them in a
+    `BlobStore` and look them up with `get_blob_refs`. Queries read only the
+    matching rows through an index on metric, filter name and time, and
+    return NumPy arrays.
+
+    Parameters
+    ----------
+    path : `str`, optional
+        Path of the database file, created if it does not exist. By default,
+        the history is kept in memory.
+
+    Examples
+    --------
+    ::
+
+        with JobHistory('history.sqlite3') as history:
+            history.ingest(glob.glob('nightly/*.json.gz'))
+            start = datetime.now() - timedelta(days=90)
+            pa1 = history.query('PA1', filter_name='r', start=start,
+                                unit='mmag')
+            plt.plot(pa1['time'], pa1['value'])
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        if path != ':memory:':
+            # Readers are not blocked by ingestion, and commits do not wait
+            # for the data to reach the disk.
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def close(self):
+        """Close the database."""
+        self._connection.close()
+
+    def __len__(self):
+        (count,), = self._connection.execute(
+            'SELECT COUNT(*) FROM measurements')
+        return count
+
+    @property
+    def sources(self):
+        """Sources of the ingested jobs (`list` of `str`), oldest first."""
+        return [source for source, in self._connection.execute(
+            'SELECT source FROM jobs ORDER BY time, id')]
+
+    @property
+    def metric_names(self):
+        """Names of the metrics of ingested measurements (`list` of `str`).
+        """
+        return [name for name, in self._connection.execute(
+            'SELECT name FROM metrics ORDER BY name')]
+
+    def ingest(self, paths, times=None, batch_size=100, max_workers=1):
+        """Ingest job files.
+
+        Files are read (in worker processes with ``max_workers > 1``) and
+        written to the database in one transaction per ``batch_size`` files.
+        Files whose path was already ingested are skipped, as are
+        measurements whose identifier is already in the history.
+
+        Parameters
+        ----------
+        paths : `list` of `str`
+            Paths of the job files, in any format (see `read_job_json`).
+            Blobs of sidecar jobs are referenced, not read.
+        times : `list`, optional
+            Time of each job, as `datetime.datetime` or POSIX timestamps.
+            By default, the modification times of the files are used.
+        batch_size : `int`, optional
+            Number of files ingested per transaction.
+        max_workers : `int`, optional
+            Number of worker processes reading job files.
+
+        Returns
+        -------
+        count : `int`
+            Number of measurements ingested.
+        """
+        paths = list(paths)
+        if times is None:
+            times = [os.path.getmtime(path) for path in paths]
+        else:
+            times = [_to_timestamp(t) for t in times]
+            if len(times) != len(paths):
+                raise ValueError('Got {0:d} times for {1:d} paths'.format(
+                    len(times), len(paths)))
+        known = set(self.sources)
+        todo = [(path, t) for path, t in zip(paths, times)
+                if path not in known]
+
+        pool = None
+        if max_workers > 1 and len(todo) > 1:
+            pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers)
+        count = 0
+        try:
+            for i in range(0, len(todo), batch_size):
+                batch = todo[i:i + batch_size]
+                batch_paths = [path for path, _ in batch]
+                if pool is not None:
+                    docs = list(pool.map(_read_job, batch_paths))
+                else:
+                    docs = [_read_job(path) for path in batch_paths]
+                with self._connection:
+                    for (path, t), doc in zip(batch, docs):
+                        count += self._insert(doc, path, t)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return count
+
+    def ingest_json(self, doc, source, time):
+        """Ingest a job JSON document.
+
+        Parameters
+        ----------
+        doc : `dict`
+            Job JSON document (see `Job.json`).
+        source : `str`
+            Unique name of the job, such as the path of its file.
+        time : `datetime.datetime` or `float`
+            Time of the job, or a POSIX timestamp.
+
+        Returns
+        -------
+        count : `int`
+            Number of measurements ingested.
+        """
+        with self._connection:
+            return self._insert(doc, source, _to_timestamp(time))
+
+    def _insert(self, doc, source, time):
+        """Insert a job in the current transaction."""
+        cursor = self._connection.execute(
+            'INSERT OR IGNORE INTO jobs (source, time) VALUES (?, ?)',
+            (source, time))
+        if cursor.rowcount == 0:
+            return 0
+        job_id = cursor.lastrowid
+
+        metrics = {}
+        rows = []
+        blob_rows = []
+        for m in doc['measurements']:
+            metric_doc = m['metric']
+            metric_name = None
+            if metric_doc is not None:
+                metric_name = metric_doc['name']
+                metrics[metric_name] = metric_doc
+            value = m['value']
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                value = None
+            rows.append((m['identifier'], job_id, time, metric_name,
+                         m['filter_name'], m['spec_name'], value, m['unit']))
+            blob_rows.extend((m['identifier'], name, blob)
+                             for name, blob in m.get('blobs', {}).items())
+
+        cursor = self._connection.executemany(
+            'INSERT OR IGNORE INTO measurements (identifier, job_id, time, '
+            'metric, filter_name, spec_name, value, unit) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        count = cursor.rowcount
+        self._connection.executemany(
+            'INSERT OR IGNORE INTO blob_refs (measurement, name, blob) '
+            'VALUES (?, ?, ?)', blob_rows)
+        # The latest definition of a metric wins
+        self._connection.executemany(
+            'INSERT OR REPLACE INTO metrics (name, json) VALUES (?, ?)',
+            [(name, json.dumps(metric_doc, sort_keys=True))
+             for name, metric_doc in metrics.items()])
+        return count
+
+    def query(self, metric_name, filter_name=None, spec_name=None,
+              start=None, end=None, unit=None):
+        """Get the values of a metric over time.
+
+        Parameters
+        ----------
+        metric_name : `str`
+            Name of the metric.
+        filter_name : `str`, optional
+            Only get measurements of this filter. By default, measurements
+            of all filters are returned.
+        spec_name : `str`, optional
+            Only get measurements of this specification level. By default,
+            measurements of all specification levels are returned.
+        start : `datetime.datetime` or `float`, optional
+            Only get measurements at or after this time (or POSIX
+            timestamp).
+        end : `datetime.datetime` or `float`, optional
+            Only get measurements before this time.
+        unit : `str` or `astropy.units.Unit`, optional
+            Unit of the returned values. By default, the unit of the most
+            recent measurement.
+
+        Returns
+        -------
+        values : `numpy.ndarray`
+            Structured array with a row per measurement, oldest first, and
+            fields ``time`` (POSIX timestamp of the job), ``value``
+            (`float`, NaN for non-numeric values), ``identifier``,
+            ``filter_name``, ``spec_name`` and ``source`` (of the job).
+
+        Raises
+        ------
+        astropy.units.UnitsError
+            Raised if values cannot be converted to ``unit``.
+        """
+        clauses = ['m.metric = ?']
+        args = [metric_name]
+        for column, value in (('m.filter_name', filter_name),
+                              ('m.spec_name', spec_name)):
+            if value is not None:
+                clauses.append('{0} = ?'.format(column))
+                args.append(value)
+        if start is not None:
+            clauses.append('m.time >= ?')
+            args.append(_to_timestamp(start))
+        if end is not None:
+            clauses.append('m.time < ?')
+            args.append(_to_timestamp(end))
+        rows = self._connection.execute(
+            'SELECT m.time, m.value, m.identifier, m.filter_name, '
+            'm.spec_name, j.source, m.unit '
+            'FROM measurements AS m JOIN jobs AS j ON m.job_id = j.id '
+            'WHERE {0} ORDER BY m.time, m.rowid'.format(
+                ' AND '.join(clauses)), args).fetchall()
+
+        values = np.empty(len(rows), dtype=_QUERY_DTYPE)
+        if not rows:
+            return values
+        columns = list(zip(*rows))
+        values['time'] = columns[0]
+        values['value'] = np.array(columns[1], dtype=float)
+        for i, name in enumerate(('identifier', 'filter_name', 'spec_name',
+                                  'source'), start=2):
+            values[name] = columns[i]
+
+        # Convert values to a common unit, one scale per distinct unit
+        units = np.array(columns[6], dtype=object)
+        target = u.Unit(unit if unit is not None else units[-1] or '')
+        for unit_name in set(columns[6]):
+            scale = u.Unit(unit_name or '').to(target)
+            if scale != 1.:
+                values['value'][units == unit_name] *= scale
+        return values
+
+    def get_metric(self, metric_name):
+        """Get the definition of a metric, as last ingested.
+
+        Parameters
+        ----------
+        metric_name : `str`
+            Name of the metric.
+
+        Returns
+        -------
+        metric : `Metric`
+            The metric.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if no measurement of the metric was ingested.
+        """
+        row = self._connection.execute(
+            'SELECT json FROM metrics WHERE name = ?',
+            (metric_name,)).fetchone()
+        if row is None:
+            raise RuntimeError('Metric not in history', metric_name)
+        return Metric.from_json(json.loads(row[0]))
+
+    def get_blob_refs(self, identifier):
+        """Get the identifiers of the blobs of a measurement.
+
+        Parameters
+        ----------
+        identifier : `str`
+            Identifier of the measurement, such as from the ``identifier``
+            field of `query` results.
+
+        Returns
+        -------
+        blob_refs : `dict`
+            Blob identifiers keyed by the names of the measurement's blob
+            attributes. Blobs can be read from a `BlobStore` with
+            `BlobStore.get_json`.
+        """
+        return dict(self._connection.execute(
+            'SELECT name, blob FROM blob_refs WHERE measurement = ?',
+            (identifier,)))
+
+
+def _read_job(path):
+    """Read a job file, keeping only what the history stores."""
+    doc = read_job_json(path)
+    return {'measurements': doc['measurements']}
+
+
+def _to_timestamp(t):
+    """Convert a `datetime.datetime` or POSIX timestamp to a timestamp."""
+    if isinstance(t, datetime):
+        return t.timestamp()
+    return float(t)
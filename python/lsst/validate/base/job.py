@@ -2,9 +2,20 @@
 
 __all__ = ['Job']
 
+from collections import OrderedDict, deque
+import json
+import threading
+
 from .jsonmixin import JsonSerializationMixin
 from .blob import BlobBase, DeserializedBlob
 from .measurement import MeasurementBase, DeserializedMeasurement
+from .memory import JobMemoryReport
+from .sharedmem import SharedArrayDatum
+from .tracing import _span
+
+
+_ANY = object()
+"""Wildcard for spec or filter names in `Job` measurement index keys."""
 
 
 class Job(JsonSerializationMixin):
@@ -25,6 +36,14 @@ class Job(JsonSerializationMixin):
     Typically, `Job`\ s are uploaded to SQUASH separately for each tested
     dataset.
 
+    Measurements and blobs can be registered concurrently from several
+    threads. Each thread registers into its own buffer, and buffers are
+    merged into the job whenever the job's contents are read (for example by
+    `measurements`, `blobs`, `get_measurement` or `json`).
+
+    Used as a context manager, a `Job` releases the shared memory of its
+    blobs on exit (see `release_shared_memory`).
+
     Parameters
     ----------
     measurements : `list`, optional
@@ -37,9 +56,16 @@ class Job(JsonSerializationMixin):
     def __init__(self, measurements=None, blobs=None):
         self._measurements = []
         self._measurement_ids = set()
+        # Indices of measurements by metric name, and by
+        # (metric name, spec_name, filter_name) keys where _ANY matches
+        # any spec_name or filter_name.
+        self._measurements_by_metric = OrderedDict()
+        self._measurement_index = {}
         self._blobs = []
         self._blob_ids = set()
 
+        self._init_pending()
+
         if measurements:
             for m in measurements:
                 self.register_measurement(m)
@@ -48,28 +74,123 @@ class Job(JsonSerializationMixin):
             for b in blobs:
                 self.register_blob(b)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release_shared_memory()
+        return False
+
+    def __getstate__(self):
+        # Only the measurements and blobs are pickled; indices, locks and
+        # registration buffers are rebuilt when unpickling.
+        self._merge_pending()
+        return {'measurements': self._measurements, 'blobs': self._blobs}
+
+    def __setstate__(self, state):
+        self.__init__()
+        for m in state['measurements']:
+            self._add_measurement(m)
+        for b in state['blobs']:
+            self._add_blob(b)
+
+    def _init_pending(self):
+        """Set up the per-thread registration buffers."""
+        # Lock guarding _pending_buffers and merges of the buffers
+        self._pending_lock = threading.Lock()
+        # (thread, deque) pairs of registered but unmerged objects
+        self._pending_buffers = []
+        self._local = threading.local()
+
+    def _pending(self):
+        """Registration buffer of the current thread (`collections.deque`).
+        """
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buf = deque()
+            with self._pending_lock:
+                self._pending_buffers.append((threading.current_thread(),
+                                              buf))
+            self._local.buffer = buf
+            return buf
+
+    def _merge_pending(self):
+        """Merge objects registered by all threads into the job.
+
+        Objects from each thread are merged in their registration order.
+        """
+        with self._pending_lock:
+            # Reads with nothing to merge are not traced
+            if any(buf for _, buf in self._pending_buffers):
+                with _span('merge registered objects', 'register'):
+                    for thread, buf in self._pending_buffers:
+                        # Only this method pops from buffers; producers
+                        # append.
+                        while buf:
+                            item = buf.popleft()
+                            if isinstance(item, MeasurementBase):
+                                self._add_measurement(item)
+                            else:
+                                self._add_blob(item)
+            # Forget the buffers of threads that have finished
+            self._pending_buffers = [
+                (thread, buf) for thread, buf in self._pending_buffers
+                if buf or thread.is_alive()]
+
     def register_measurement(self, m):
         """Add a measurement object to the `Job`.
 
         Registering a measurement also automatically registers all
         linked blobs.
 
+        This method is thread-safe.
+
         Parameters
         ----------
         m : `MeasurementBase`-type object
             A measurement object.
         """
         assert isinstance(m, MeasurementBase)
+        self._pending().append(m)
+
+    def _add_measurement(self, m):
+        """Add a measurement, and its linked blobs, unless it is already in
+        the job.
+        """
         if m.identifier not in self._measurement_ids:
             self._measurements.append(m)
             self._measurement_ids.add(m.identifier)
+            self._index_measurement(m)
             for name, b in m.blobs.items():
-                self.register_blob(b)
+                self._add_blob(b)
+
+    def _index_measurement(self, m):
+        """Add a measurement to the lookup indices used by
+        `get_measurement`.
+        """
+        if m.metric is None:
+            # Measurements without a metric cannot be looked up by name
+            return
+        name = m.metric.name
+        self._measurements_by_metric.setdefault(name, []).append(m)
+        for key in ((name, m.spec_name, _ANY),
+                    (name, _ANY, m.filter_name),
+                    (name, m.spec_name, m.filter_name)):
+            self._measurement_index.setdefault(key, []).append(m)
 
     @property
     def measurements(self):
-        """Measurement iterator."""
-        for m in self._measurements:
+        """Measurement iterator.
+
+        Measurements are yielded in the order they were merged into the job.
+        Measurements registered by the same thread keep their registration
+        order, but the relative order of measurements registered by
+        different threads is not defined. Measurements registered after the
+        iteration starts are not yielded.
+        """
+        self._merge_pending()
+        for m in list(self._measurements):
             yield m
 
     def get_measurement(self, metric_name, spec_name=None, filter_name=None):
@@ -97,8 +218,16 @@ class Job(JsonSerializationMixin):
             Raised when a measurement cannot be found, either because no such
             measurement exists or because the request is ambiguous
             (``spec_name`` or ``filter_name`` need to be set).
+
+        Notes
+        -----
+        Measurements are indexed by their metric name, `spec_name` and
+        `filter_name` when they are registered, so lookups do not scan all
+        measurements in the job. Set those attributes before registering
+        a measurement.
         """
-        candidates = [m for m in self._measurements if m.label == metric_name]
+        self._merge_pending()
+        candidates = self._measurements_by_metric.get(metric_name, [])
         if len(candidates) == 1:
             candidate = candidates[0]
             if spec_name is not None and candidate.spec_name is not None:
@@ -109,7 +238,8 @@ class Job(JsonSerializationMixin):
 
         # Filter by spec_name
         if spec_name is not None:
-            candidates = [m for m in candidates if m.spec_name == spec_name]
+            candidates = self._measurement_index.get(
+                (metric_name, spec_name, _ANY), [])
         if len(candidates) == 1:
             candidate = candidates[0]
             if filter_name is not None and candidate.filter_name is not None:
@@ -118,8 +248,10 @@ class Job(JsonSerializationMixin):
 
         # Filter by filter_name
         if filter_name is not None:
-            candidates = [m for m in candidates
-                          if m.filter_name == filter_name]
+            key = (metric_name,
+                   _ANY if spec_name is None else spec_name,
+                   filter_name)
+            candidates = self._measurement_index.get(key, [])
         if len(candidates) == 1:
             return candidates[0]
 
@@ -128,70 +260,175 @@ class Job(JsonSerializationMixin):
     def register_blob(self, b):
         """Add a blob object to the `Job`.
 
+        This method is thread-safe.
+
         Parameters
         ----------
         b : `BlobBase`-type object
             A blob object.
         """
         assert isinstance(b, BlobBase)
+        self._pending().append(b)
+
+    def _add_blob(self, b):
+        """Add a blob unless it is already in the job."""
         if b.identifier not in self._blob_ids:
             self._blobs.append(b)
             self._blob_ids.add(b.identifier)
 
     @property
     def blobs(self):
-        """Blob iterator."""
-        for b in self._blobs:
+        """Blob iterator.
+
+        Blobs are yielded in the order they were merged into the job, with
+        the same guarantees as `measurements`. Blobs linked to a measurement
+        are merged immediately after that measurement.
+        """
+        self._merge_pending()
+        for b in list(self._blobs):
             yield b
 
     @classmethod
-    def from_json(cls, json_data):
+    def from_json(cls, json_data, blob_store=None):
         """Construct a Job and constituent objects from a JSON dataset.
 
         Parameters
         ----------
         json_data : `dict`
             Job JSON object (as produced by `json`).
+        blob_store : `BlobStore`, optional
+            Blob store that holds blobs referenced by the ``blob_refs``
+            field of a job written by `write_json` with a ``blob_store``.
 
         Returns
         -------
         job : `Job`-type
             Job from JSON.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if ``json_data`` references blobs in a blob store, but
+            ``blob_store`` is not set.
         """
-        blobs = [DeserializedBlob.from_json(doc) for doc in json_data['blobs']]
-        measurements = [
-            DeserializedMeasurement.from_json(doc,
-                                              blobs_json=json_data['blobs'])
-            for doc in json_data['measurements']]
+        blobs_json = list(json_data['blobs'])
+        blob_refs = json_data.get('blob_refs', [])
+        if blob_refs:
+            if blob_store is None:
+                raise RuntimeError('Job references stored blobs; set the '
+                                   'blob_store argument')
+            blobs_json.extend(blob_store.get_json(identifier)
+                              for identifier in blob_refs)
+
+        with _span('Job.from_json', 'serialize'):
+            blobs = [DeserializedBlob.from_json(doc) for doc in blobs_json]
+            measurements = [
+                DeserializedMeasurement.from_json(doc, blobs_json=blobs_json)
+                for doc in json_data['measurements']]
+        performance = json_data.get('performance', {})
+        for m in measurements:
+            m.performance = performance.get(m.identifier)
         job = cls(measurements=measurements, blobs=blobs)
         return job
 
     @property
     def json(self):
-        """`Job` data as a JSON-serialiable `dict`."""
-        doc = JsonSerializationMixin.jsonify_dict({
-            'measurements': self._measurements,
-            'blobs': self._blobs})
+        """`Job` data as a JSON-serialiable `dict`.
+
+        If measurements were instrumented (see `PerformanceMonitor`), their
+        `MeasurementBase.performance` records are included in a
+        ``performance`` `dict` keyed by measurement identifier.
+        """
+        self._merge_pending()
+        with _span('Job.json', 'serialize'):
+            doc = JsonSerializationMixin.jsonify_dict({
+                'measurements': self._measurements,
+                'blobs': self._blobs})
+        performance = {m.identifier: m.performance
+                       for m in self._measurements
+                       if m.performance is not None}
+        if performance:
+            doc['performance'] = performance
         return doc
 
+    def write_json(self, filepath, blob_store=None):
+        """Write JSON to a file.
+
+        Parameters
+        ----------
+        filepath : `str`
+            Destination file name for JSON output.
+        blob_store : `BlobStore`, optional
+            If set, blobs are written into this store rather than into the
+            job's JSON file. The job's JSON lists the identifiers of those
+            blobs in a ``blob_refs`` field; pass the same store to
+            `from_json` to read the job back.
+
+        Notes
+        -----
+        Writing a job releases the shared memory of its blobs (see
+        `release_shared_memory`).
+        """
+        with _span('Job.write_json', 'write', filepath=filepath):
+            doc = self.json
+            if blob_store is not None:
+                doc['blob_refs'] = [blob_store.put_json(blob_doc)
+                                    for blob_doc in doc['blobs']]
+                doc['blobs'] = []
+            with open(filepath, 'w') as outfile:
+                json.dump(doc, outfile, sort_keys=True, indent=2)
+        self.release_shared_memory()
+
+    def release_shared_memory(self):
+        """Release the shared memory segments of the job's blob datums.
+
+        Shared memory segments of `SharedArrayDatum`\ s are removed from
+        the system; the datums remain usable in this process. `write_json`
+        calls this method once the job is written, and so does the job's
+        context on exit. Segments of datums that are garbage collected are
+        removed regardless.
+        """
+        for b in self.blobs:
+            if isinstance(b, DeserializedBlob):
+                # Datums decoded from JSON are never shared
+                continue
+            for datum in b.datums.values():
+                if isinstance(datum, SharedArrayDatum):
+                    datum.release()
+
+    def memory_report(self):
+        """Report the memory held by the job's measurements and blobs.
+
+        Returns
+        -------
+        report : `JobMemoryReport`
+            Bytes attributed to each quantity, parameter, extra and blob
+            datum, with NumPy array buffers counted once even when shared.
+            Use `JobMemoryReport.format` for a summary of the heaviest
+            objects.
+        """
+        return JobMemoryReport(self)
+
     @property
     def metric_names(self):
         """Names of `Metric`\ s measured in this `Job` (`list`)."""
-        metric_names = []
+        self._merge_pending()
+        # OrderedDict is used as an ordered set
+        metric_names = OrderedDict()
         for m in self._measurements:
             if m.quantity is not None:
-                if m.metric.name not in metric_names:
-                    metric_names.append(m.metric.name)
-        return metric_names
+                metric_names[m.metric.name] = None
+        return list(metric_names)
 
     @property
     def spec_levels(self):
         """`list` of names of specification levels that are available for
         `Metric`\ s measured in this `Job`.
         """
-        spec_names = []
+        self._merge_pending()
+        # OrderedDict is used as an ordered set
+        spec_names = OrderedDict()
         for m in self._measurements:
             for spec in m.metric.specs:
-                if spec.name not in spec_names:
-                    spec_names.append(spec.name)
-        return spec_names
+                spec_names[spec.name] = None
+        return list(spec_names)
@@ -0,0 +1,245 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Reading, writing and merging job files in their various formats.
+
+Job files come in these formats:
+
+- ``json``: the `Job.json` document, with blobs inline (``.json``).
+- ``json.gz``: the same document, gzip-compressed (``.json.gz``).
+- ``pickle``: a pickled `Job` (``.pickle`` or ``.pkl``), a compact binary
+  format that keeps the arrays of blob datums as raw buffers. Reading a
+  pickle can run arbitrary code, so only read pickles from trusted
+  sources.
+- ``sidecar``: a ``.json`` or ``.json.gz`` document whose blobs are stored
+  in a `BlobStore` next to it and listed in a ``blob_refs`` field (as
+  written by `Job.write_json` with a ``blob_store``).
+
+Functions of this module work on `Job.json` documents rather than `Job`
+objects, so that jobs can be inspected and transformed without rebuilding
+their measurements and blobs.
+"""
+
+__all__ = ['job_file_format', 'read_job_json', 'write_job_json',
+           'merge_job_files']
+
+import gzip
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+from .job import Job
+
+
+def job_file_format(path):
+    """Guess the format of a job file from its name.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the job file.
+
+    Returns
+    -------
+    format : `str`
+        ``'json'``, ``'json.gz'`` or ``'pickle'``. Sidecar jobs have the
+        format of their JSON document.
+
+    Raises
+    ------
+    ValueError
+        Raised if the file name has an unknown extension.
+    """
+    if path.endswith('.json.gz'):
+        return 'json.gz'
+    if path.endswith('.json'):
+        return 'json'
+    if path.endswith(('.pickle', '.pkl')):
+        return 'pickle'
+    raise ValueError('Unknown job file format: {0}'.format(path))
+
+
+def _open_text(path, mode):
+    """Open a JSON file, compressed or not, in text mode."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode)
+
+
+def read_job_json(path, blob_store=None):
+    """Read a job file as a `Job.json` document.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the job file, in any format.
+    blob_store : `BlobStore`, optional
+        Store of the blobs of a sidecar job. If set, blobs listed in the
+        ``blob_refs`` field of the document are read from the store and
+        added to its ``blobs``. Otherwise, ``blob_refs`` are left as-is.
+
+    Returns
+    -------
+    doc : `dict`
+        Job JSON document.
+
+    Notes
+    -----
+    Pickled jobs are read with `pickle.load`, which can run arbitrary code:
+    only read pickles from trusted sources.
+    """
+    if job_file_format(path) == 'pickle':
+        with open(path, 'rb') as f:
+            return pickle.load(f).json
+    with _open_text(path, 'r') as f:
+        doc = json.load(f)
+    if blob_store is not None and doc.get('blob_refs'):
+        doc['blobs'] = list(doc['blobs']) + [
+            blob_store.get_json(identifier)
+            for identifier in doc.pop('blob_refs')]
+    return doc
+
+
+def write_job_json(doc, path, blob_store=None):
+    """Write a `Job.json` document to a job file.
+
+    The format is given by the file's extension (see `job_file_format`).
+
+    Parameters
+    ----------
+    doc : `dict`
+        Job JSON document, with blobs inline.
+    path : `str`
+        Destination path.
+    blob_store : `BlobStore`, optional
+        If set, write a sidecar job: blobs are put in this store, and listed
+        in the document's ``blob_refs`` field. Not supported for pickled
+        jobs.
+
+    Raises
+    ------
+    ValueError
+        Raised if a pickled job would have sidecar blobs, either because
+        ``blob_store`` is set or because ``doc`` has ``blob_refs`` (read it
+        with `read_job_json` and a ``blob_store`` first).
+    """
+    if job_file_format(path) == 'pickle':
+        if blob_store is not None or doc.get('blob_refs'):
+            raise ValueError('Pickled jobs cannot have sidecar blobs')
+        job = Job.from_json(doc)
+        for blob in job.blobs:
+            # Decode datums from their JSON lists, so that arrays are
+            # pickled as raw buffers
+            blob.datums = dict(blob.datums)
+        with open(path, 'wb') as f:
+            pickle.dump(job, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return
+    if blob_store is not None:
+        doc = dict(doc)
+        refs = list(doc.get('blob_refs', []))
+        refs.extend(blob_store.put_json(blob_doc)
+                    for blob_doc in doc['blobs'])
+        doc['blob_refs'] = refs
+        doc['blobs'] = []
+    with _open_text(path, 'w') as f:
+        json.dump(doc, f, sort_keys=True)
+
+
+def merge_job_files(paths, output_path, blob_store=None):
+    """Merge job files into one job file.
+
+    Input files are read one at a time, and the output is written as
+    inputs are read, so only one input job is held in memory. Measurements
+    and blobs that appear in several inputs (same identifier) are written
+    once.
+
+    Parameters
+    ----------
+    paths : `list` of `str`
+        Paths of the input job files, in any format. Blobs of sidecar
+        inputs are read from ``blob_store``.
+    output_path : `str`
+        Path of the merged ``.json`` or ``.json.gz`` job file.
+    blob_store : `BlobStore`, optional
+        Store of the blobs of sidecar inputs. If set, the output is also a
+        sidecar job whose blobs are in this store.
+
+    Returns
+    -------
+    counts : `dict`
+        Numbers of ``measurements`` and ``blobs`` written.
+
+    Raises
+    ------
+    RuntimeError
+        Raised if an input references blobs in a blob store, but
+        ``blob_store`` is not set.
+    """
+    if job_file_format(output_path) == 'pickle':
+        raise ValueError('Merged jobs are written as JSON; convert them '
+                         'to pickles afterwards')
+    # Write to a temporary file, renamed once complete, so that a failed
+    # merge leaves no partial output.
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(output_path)),
+        suffix=os.path.basename(output_path))
+    os.close(fd)
+    try:
+        counts = _merge_job_files(paths, tmp_path, blob_store)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return counts
+
+
+def _merge_job_files(paths, output_path, blob_store):
+    """Merge job files into ``output_path`` (see `merge_job_files`)."""
+    measurement_ids = set()
+    blob_ids = set()
+    performance = {}
+    with _open_text(output_path, 'w') as out, \
+            tempfile.TemporaryFile('w+') as spool:
+        # Measurements go straight to the output; blobs are spooled to a
+        # temporary file until all measurements are written.
+        out.write('{"measurements": [')
+        for path in paths:
+            doc = read_job_json(path)
+            if doc.get('blob_refs') and blob_store is None:
+                raise RuntimeError('Job references stored blobs; set the '
+                                   'blob_store argument', path)
+            for m in doc['measurements']:
+                if m['identifier'] in measurement_ids:
+                    continue
+                if measurement_ids:
+                    out.write(', ')
+                measurement_ids.add(m['identifier'])
+                json.dump(m, out, sort_keys=True)
+            blob_docs = list(doc['blobs'])
+            if blob_store is not None:
+                # Sidecar blobs stay in the store
+                blob_ids.update(doc.get('blob_refs', []))
+                for blob_doc in blob_docs:
+                    blob_ids.add(blob_store.put_json(blob_doc))
+                blob_docs = []
+            for blob_doc in blob_docs:
+                if blob_doc['identifier'] in blob_ids:
+                    continue
+                if blob_ids:
+                    spool.write(', ')
+                blob_ids.add(blob_doc['identifier'])
+                json.dump(blob_doc, spool, sort_keys=True)
+            performance.update(doc.get('performance', {}))
+        out.write('], "blobs": [')
+        if blob_store is None:
+            spool.seek(0)
+            shutil.copyfileobj(spool, out)
+        out.write(']')
+        if blob_store is not None:
+            out.write(', "blob_refs": ')
+            json.dump(sorted(blob_ids), out)
+        if performance:
+            out.write(', "performance": ')
+            json.dump(performance, out, sort_keys=True)
+        out.write('}')
+    return {'measurements': len(measurement_ids), 'blobs': len(blob_ids)}
@@ -11,6 +11,7 @@ from .jsonmixin import JsonSerializationMixin
 from .blob import BlobBase, DeserializedBlob
 from .datum import Datum, QuantityAttributeMixin
 from .metric import Metric
+from .schema import _DatumField, BlobField
 
 
 class MeasurementBase(type('NewBase', (QuantityAttributeMixin, JsonSerializationMixin,
@@ -31,12 +32,22 @@ class MeasurementBase(type('NewBase', (QuantityAttributeMixin, JsonSerialization
     Subclasses are also responsible for assiging the measurement's value
     to the `quantity` attribute (as an `astropy.units.Quantity`).
 
+    Parameters, extras and blobs can also be declared as class attributes
+    with `ParameterField`, `ExtraField` and `BlobField`. Declared fields are
+    registered by `MeasurementBase.__init__`, and are faster to access than
+    attributes registered with `register_parameter` or `register_extra`.
+
     .. seealso::
 
        The :ref:`validate-base-measurement-class` page shows how to create
        measurement classes using `MeasurementBase`.
     """
 
+    _schema_fields = {}
+    """Fields declared on the class (and its bases), keyed by attribute
+    name.
+    """
+
     parameters = None
     """`dict` containing all input parameters used by this measurement.
     Parameters are `Datum` instances. Parameter values can be accessed
@@ -65,6 +76,26 @@ class MeasurementBase(type('NewBase', (QuantityAttributeMixin, JsonSerialization
     `None` if a measurement is not filter-dependent.
     """
 
+    performance = None
+    """`dict` recording the cost of making this measurement (wall time, CPU
+    time and memory), or `None` if it was not instrumented.
+
+    See `PerformanceMonitor`. Records are serialized in the ``performance``
+    section of `Job.json` rather than with the measurement.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super(MeasurementBase, cls).__init_subclass__(**kwargs)
+        fields = {}
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if isinstance(value, (_DatumField, BlobField)):
+                    fields[name] = value
+                elif name in fields:
+                    # Overridden by a plain attribute
+                    del fields[name]
+        cls._schema_fields = fields
+
     def __init__(self):
         self._quantity = None
         self.parameters = {}
@@ -73,20 +104,33 @@ class MeasurementBase(type('NewBase', (QuantityAttributeMixin, JsonSerialization
         self._id = uuid.uuid4().hex
         self.spec_name = None
         self.filter_name = None
+        for field in self._schema_fields.values():
+            field.register(self)
 
     def __getattr__(self, key):
-        if key in self.parameters:
+        # Containers are read from __dict__ so that lookups made before
+        # they exist (e.g., while unpickling) raise AttributeError.
+        d = self.__dict__
+        parameters = d.get('parameters')
+        extras = d.get('extras')
+        linked_blobs = d.get('_linked_blobs')
+        if parameters is not None and key in parameters:
             # Requesting a serializable parameter
-            return self.parameters[key].quantity
-        elif key in self.extras:
-            return self.extras[key].quantity
-        elif key in self._linked_blobs:
-            return self._linked_blobs[key]
+            return parameters[key].quantity
+        elif extras is not None and key in extras:
+            return extras[key].quantity
+        elif linked_blobs is not None and key in linked_blobs:
+            return linked_blobs[key]
         else:
             raise AttributeError("%r object has no attribute %r" %
                                  (self.__class__, key))
 
     def __setattr__(self, key, value):
+        field = self._schema_fields.get(key)
+        if field is not None:
+            # Declared field; skip the checks for registered attributes
+            field.__set__(self, value)
+            return
         # avoiding __setattr__ loops by not handling names in _bootstrap
         _bootstrap = ('parameters', 'extras', '_linked_blobs')
         if key not in _bootstrap and isinstance(value, BlobBase):
@@ -102,6 +146,17 @@ class MeasurementBase(type('NewBase', (QuantityAttributeMixin, JsonSerialization
         else:
             super(MeasurementBase, self).__setattr__(key, value)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_quantity'] = self._reduce_quantity(state.get('_quantity'))
+        return state
+
+    def __setstate__(self, state):
+        # Bypass __setattr__; the state is the instance __dict__
+        state = dict(state)
+        state['_quantity'] = self._restore_quantity(*state['_quantity'])
+        self.__dict__.update(state)
+
     @property
     def blobs(self):
         """`dict` of blobs attached to this measurement instance."""
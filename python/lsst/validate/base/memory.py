@@ -0,0 +1,248 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['MemoryEntry', 'JobMemoryReport']
+
+from collections import namedtuple
+import sys
+import types
+
+import numpy as np
+import astropy.units as u
+
+from .blob import BlobBase
+from .metric import Metric
+
+
+MemoryEntry = namedtuple('MemoryEntry', ['path', 'kind', 'nbytes',
+                                         'shared_bytes'])
+MemoryEntry.__doc__ = """Memory attributed to an object of a `Job`.
+
+Attributes
+----------
+path : `str`
+    Location of the object in the job, such as
+    ``'measurements/PA1[r]/extras/rms'`` or
+    ``'blobs/MatchedMultiVisitDataset:<id>/datums/mag'``.
+kind : `str`
+    ``'quantity'``, ``'parameter'``, ``'extra'`` or ``'datum'`` for
+    `Datum`\ s (and the value of a measurement), or ``'object'`` for the
+    remaining attributes of a measurement or blob.
+nbytes : `int`
+    Bytes attributed to the object, including the array buffers it is the
+    first to reference.
+shared_bytes : `int`
+    Bytes of array buffers the object references that are attributed to
+    another object.
+"""
+
+
+class JobMemoryReport(object):
+    """Report of the memory held by the measurements and blobs of a `Job`.
+
+    The report walks the quantities, parameters and extras of every
+    measurement and the datums of every blob, and attributes bytes to each
+    of them: the sizes of the Python objects they hold plus the buffers of
+    their NumPy arrays. A buffer shared by several arrays (views, or
+    shared memory segments) is attributed to the first object found to
+    reference it, and counted as shared by the others, so that the total is
+    not inflated by shared buffers. Blobs are walked before measurements.
+
+    Metrics, units and the blobs linked to measurements are not counted with
+    measurements. Datums of deserialized blobs that have not been decoded
+    yet are counted as their JSON objects.
+
+    Parameters
+    ----------
+    job : `Job`
+        The job to report on.
+
+    Examples
+    --------
+    ::
+
+        report = job.memory_report()
+        print(report.format(n=20))
+    """
+
+    def __init__(self, job):
+        self.entries = []
+        self._seen = {}
+        self._buffers = {}
+        for blob in job.blobs:
+            self._walk_blob(blob)
+        for m in job.measurements:
+            self._walk_measurement(m)
+        # Only needed during the walk
+        del self._seen, self._buffers
+
+    @property
+    def total_bytes(self):
+        """Total bytes attributed to the job's contents (`int`)."""
+        return sum(entry.nbytes for entry in self.entries)
+
+    @property
+    def owners(self):
+        """Bytes attributed to each measurement and blob.
+
+        Returns
+        -------
+        owners : `dict`
+            Bytes keyed by path of measurement or blob (such as
+            ``'measurements/PA1[r]'``).
+        """
+        totals = {}
+        for entry in self.entries:
+            owner = '/'.join(entry.path.split('/')[:2])
+            totals[owner] = totals.get(owner, 0) + entry.nbytes
+        return totals
+
+    def top(self, n=10, kind=None):
+        """Get the objects holding the most memory.
+
+        Parameters
+        ----------
+        n : `int`, optional
+            Number of entries. `None` for all entries.
+        kind : `str`, optional
+            Only consider entries of this kind (see `MemoryEntry`).
+
+        Returns
+        -------
+        entries : `list` of `MemoryEntry`
+            Entries, by decreasing `MemoryEntry.nbytes`.
+        """
+        entries = [e for e in self.entries if kind is None or e.kind == kind]
+        entries.sort(key=lambda e: e.nbytes, reverse=True)
+        return entries[:n]
+
+    def top_owners(self, n=10):
+        """Get the measurements and blobs holding the most memory.
+
+        Returns
+        -------
+        owners : `list` of `tuple`
+            ``(path, nbytes)`` of up to ``n`` measurements and blobs, by
+            decreasing bytes.
+        """
+        owners = sorted(self.owners.items(), key=lambda item: item[1],
+                        reverse=True)
+        return owners[:n]
+
+    def format(self, n=10):
+        """Format a summary of the heaviest measurements, blobs and datums.
+
+        Parameters
+        ----------
+        n : `int`, optional
+            Number of measurements and blobs, and of datums, listed.
+
+        Returns
+        -------
+        summary : `str`
+            Summary table.
+        """
+        lines = ['Job memory: {0:,d} bytes'.format(self.total_bytes),
+                 '',
+                 'Top {0:d} measurements and blobs:'.format(n)]
+        for path, nbytes in self.top_owners(n):
+            lines.append('{0:>15,d}  {1}'.format(nbytes, path))
+        lines.extend(['', 'Top {0:d} datums:'.format(n),
+                      '{0:>15}  {1:>15}  {2:<9}  {3}'.format(
+                          'bytes', 'shared bytes', 'kind', 'path')])
+        # The 'object' entries of whole measurements and blobs are listed
+        # above
+        datums = [e for e in self.top(None) if e.kind != 'object'][:n]
+        for entry in datums:
+            lines.append('{0:>15,d}  {1:>15,d}  {2:<9}  {3}'.format(
+                entry.nbytes, entry.shared_bytes, entry.kind, entry.path))
+        return '\n'.join(lines)
+
+    @property
+    def json(self):
+        """Report as a JSON-serializable `dict`."""
+        return {'total_bytes': self.total_bytes,
+                'entries': [dict(entry._asdict()) for entry in self.entries]}
+
+    def _walk_measurement(self, m):
+        if m.metric is not None:
+            label = m.metric.name
+        else:
+            label = m.identifier
+        qualifiers = [q for q in (m.filter_name, m.spec_name) if q]
+        if qualifiers:
+            label += '[{0}]'.format(','.join(qualifiers))
+        path = 'measurements/' + label
+        self._add(path + '/quantity', 'quantity', m.__dict__.get('_quantity'))
+        for name, datum in m.parameters.items():
+            self._add('{0}/parameters/{1}'.format(path, name), 'parameter',
+                      datum)
+        for name, datum in m.extras.items():
+            self._add('{0}/extras/{1}'.format(path, name), 'extra', datum)
+        self._add(path, 'object', m)
+
+    def _walk_blob(self, blob):
+        path = 'blobs/{0}:{1}'.format(blob.name, blob.identifier)
+        datums = blob.datums
+        # Do not decode lazily deserialized datums
+        items = getattr(datums, '_items', datums)
+        for name, datum in items.items():
+            self._add('{0}/datums/{1}'.format(path, name), 'datum', datum)
+        self._add(path, 'object', blob)
+
+    def _add(self, path, kind, obj):
+        nbytes, shared = self._sizeof(obj, top=True)
+        self.entries.append(MemoryEntry(path, kind, nbytes, shared))
+
+    def _sizeof(self, obj, top=False):
+        """Bytes of an object not yet counted, and bytes of shared buffers
+        it references.
+        """
+        if obj is None or (not top and isinstance(obj, _EXTERNAL_TYPES)):
+            return 0, 0
+        if id(obj) in self._seen:
+            return 0, 0
+        # Keep a reference so that ids are not reused during the walk
+        self._seen[id(obj)] = obj
+
+        if isinstance(obj, np.ndarray):
+            return self._sizeof_array(obj)
+        nbytes = sys.getsizeof(obj)
+        shared = 0
+        children = ()
+        if isinstance(obj, dict):
+            children = [x for item in obj.items() for x in item]
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            children = obj
+        elif hasattr(obj, '__dict__') and not isinstance(obj, _SCALAR_TYPES):
+            children = (vars(obj),)
+        for child in children:
+            child_bytes, child_shared = self._sizeof(child)
+            nbytes += child_bytes
+            shared += child_shared
+        return nbytes, shared
+
+    def _sizeof_array(self, array):
+        """Bytes of an array: its header, plus its buffer unless another
+        array already accounted for the buffer.
+        """
+        root = array
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        header = sys.getsizeof(array)
+        if array.flags.owndata:
+            header -= array.nbytes
+        # Arrays over foreign memory (mmap, shared memory) are keyed by it
+        owner = root if root.base is None else root.base
+        if id(owner) in self._buffers:
+            return header, root.nbytes
+        self._buffers[id(owner)] = owner
+        return header + root.nbytes, 0
+
+
+_EXTERNAL_TYPES = (u.UnitBase, Metric, BlobBase, type, types.ModuleType,
+                   types.FunctionType)
+"""Types of objects that are not counted as part of the objects referencing
+them.
+"""
+
+_SCALAR_TYPES = (str, bytes, int, float, complex, bool)
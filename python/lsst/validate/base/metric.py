@@ -127,7 +127,7 @@ class Metric(JsonSerializationMixin):
         """
         if yaml_doc is None and yaml_path is not None:
             with open(yaml_path) as f:
-                yaml_doc = yaml.load(f)
+                yaml_doc = yaml.load(f, Loader=yaml.Loader)
         elif yaml_doc is None and yaml_path is None:
             raise RuntimeError('Set either yaml_doc or yaml_path argument')
         metric_doc = yaml_doc[metric_name]
@@ -246,6 +246,12 @@ class Metric(JsonSerializationMixin):
                 reference_url=json_data['reference']['url'])
         return m
 
+    def __reduce__(self):
+        return (self.__class__,
+                (self.name, self.description, self.operator_str, self.specs,
+                 self.parameters, self.reference_doc, self.reference_url,
+                 self.reference_page))
+
     def __getattr__(self, key):
         if key in self.parameters:
             return self.parameters[key]
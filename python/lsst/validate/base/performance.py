@@ -0,0 +1,178 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['PerformanceMonitor', 'instrument']
+
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+from .measurement import MeasurementBase
+
+
+class PerformanceMonitor(object):
+    """Context manager that records the cost of making measurements.
+
+    The monitor records, for the code run in its context:
+
+    - ``wall_time``: elapsed time, in seconds.
+    - ``cpu_time``: CPU time of the current thread, in seconds.
+    - ``peak_memory``: peak size of memory blocks allocated through Python
+      (including NumPy arrays), in bytes, traced with `tracemalloc`.
+      `None` if ``trace_memory`` is `False`.
+    - ``max_rss``: maximum resident set size of the process so far, in
+      bytes. `None` where the `resource` module is not available.
+
+    Use `attach` to store these records in the `MeasurementBase.performance`
+    attribute of measurements made in the context; `Job.json` then includes
+    them in its ``performance`` section.
+
+    Parameters
+    ----------
+    trace_memory : `bool`, optional
+        If `True`, trace memory allocations with `tracemalloc`. Tracing slows
+        down allocation-heavy code.
+
+    Notes
+    -----
+    Monitors may run concurrently in several threads (as with
+    ``MeasurementScheduler(instrument=True)``). Memory tracing is then
+    started by the first active monitor and stopped by the last one, and
+    the peak is only reset when no other monitor is active. `tracemalloc`
+    does not distinguish threads, so the ``peak_memory`` of overlapping
+    monitors is an upper bound that includes the allocations of the other
+    threads.
+
+    Examples
+    --------
+    ::
+
+        with PerformanceMonitor() as monitor:
+            m = PA1Measurement(matches)
+        monitor.attach(m)
+        job.register_measurement(m)
+    """
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.wall_time = None
+        self.cpu_time = None
+        self.peak_memory = None
+        self.max_rss = None
+
+    def __enter__(self):
+        if self.trace_memory:
+            self._start_memory = _start_tracing()
+        self._start_cpu = time.thread_time()
+        self._start_wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wall_time = time.perf_counter() - self._start_wall
+        self.cpu_time = time.thread_time() - self._start_cpu
+        if self.trace_memory:
+            peak = _stop_tracing()
+            self.peak_memory = max(peak - self._start_memory, 0)
+        self.max_rss = _max_rss()
+        return False
+
+    @property
+    def json(self):
+        """Performance record as a JSON-serializable `dict`."""
+        return {'wall_time': self.wall_time,
+                'cpu_time': self.cpu_time,
+                'peak_memory': self.peak_memory,
+                'max_rss': self.max_rss}
+
+    def attach(self, measurements):
+        """Store the performance record in measurements.
+
+        Parameters
+        ----------
+        measurements : `MeasurementBase`-type or `list`
+            Measurement, or measurements, made in the monitor's context. When
+            several measurements are made together, they share the record.
+        """
+        if isinstance(measurements, MeasurementBase):
+            measurements = [measurements]
+        for m in measurements:
+            m.performance = self.json
+
+
+def instrument(factory, args=(), kwargs=None, trace_memory=True):
+    """Make measurements and record their cost.
+
+    Parameters
+    ----------
+    factory : callable
+        Callable that returns a `MeasurementBase`-type object, or a `list`
+        of them, when called as ``factory(*args, **kwargs)``.
+    args : `tuple`, optional
+        Positional arguments of ``factory``.
+    kwargs : `dict`, optional
+        Keyword arguments of ``factory``.
+    trace_memory : `bool`, optional
+        If `True`, trace memory allocations with `tracemalloc`.
+
+    Returns
+    -------
+    result : `MeasurementBase`-type or `list`
+        Output of ``factory``, with `MeasurementBase.performance` set (see
+        `PerformanceMonitor`).
+    """
+    if kwargs is None:
+        kwargs = {}
+    with PerformanceMonitor(trace_memory=trace_memory) as monitor:
+        result = factory(*args, **kwargs)
+    monitor.attach(result)
+    return result
+
+
+_tracing_lock = threading.Lock()
+_tracing_monitors = 0
+"""Number of active monitors that trace memory."""
+_tracing_started = False
+"""Whether monitors started `tracemalloc`, and must stop it."""
+
+
+def _start_tracing():
+    """Start tracing memory for a monitor, returning the traced memory."""
+    global _tracing_monitors, _tracing_started
+    with _tracing_lock:
+        if _tracing_monitors == 0:
+            # Tracing started by the application is left running
+            _tracing_started = not tracemalloc.is_tracing()
+            if _tracing_started:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+        _tracing_monitors += 1
+        return tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracing():
+    """Stop tracing memory for a monitor, returning the traced peak."""
+    global _tracing_monitors
+    with _tracing_lock:
+        peak = tracemalloc.get_traced_memory()[1]
+        _tracing_monitors -= 1
+        if _tracing_monitors == 0 and _tracing_started:
+            tracemalloc.stop()
+        return peak
+
+
+def _max_rss():
+    """Maximum resident set size of the process, in bytes, or `None`."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # Bytes on macOS, kilobytes elsewhere
+        return max_rss
+    return max_rss * 1024
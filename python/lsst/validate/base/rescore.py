@@ -0,0 +1,196 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Bulk re-scoring of job files against specifications.
+
+Re-scoring reads only the metric names, values, units and filter names of
+measurements from job files, without rebuilding measurements and blobs, and
+compares all values with their specification levels in vectorized NumPy
+operations.
+"""
+
+__all__ = ['SCORE_PASS', 'SCORE_FAIL', 'SCORE_NO_SPEC',
+           'read_measurement_values', 'rescore', 'rescore_files']
+
+import concurrent.futures
+
+import numpy as np
+import astropy.units as u
+
+from .jobfile import read_job_json
+from .metric import Metric, load_metrics
+
+
+SCORE_PASS = 1
+"""Score of a measurement that meets its specification."""
+
+SCORE_FAIL = 0
+"""Score of a measurement that does not meet its specification."""
+
+SCORE_NO_SPEC = -1
+"""Score of a measurement that cannot be scored: its metric or
+specification is not defined, its value is not a number, or its units are
+not convertible to those of the specification.
+"""
+
+_VALUE_DTYPE = [('metric', object), ('filter_name', object),
+                ('spec_name', object), ('value', float), ('unit', object)]
+
+
+def read_measurement_values(path):
+    """Read the values of the measurements of a job file.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the job file, in any format (see `read_job_json`). Blobs of
+        sidecar jobs are not read.
+
+    Returns
+    -------
+    values : `numpy.ndarray`
+        Structured array with a row per measurement and fields ``metric``,
+        ``filter_name``, ``spec_name`` (objects, `str` or `None`), ``value``
+        (`float`, NaN for non-numeric values) and ``unit`` (`str`).
+    """
+    measurements = read_job_json(path)['measurements']
+    values = np.empty(len(measurements), dtype=_VALUE_DTYPE)
+    for i, m in enumerate(measurements):
+        value = m['value']
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            value = np.nan
+        values[i] = (m['metric']['name'], m['filter_name'], m['spec_name'],
+                     value, m['unit'])
+    return values
+
+
+def rescore(values, metrics, spec_name='design'):
+    """Score measurement values against a specification level.
+
+    Specifications are resolved (with `Metric.get_spec`) once per distinct
+    metric, filter and unit, then all values are compared at once.
+
+    Parameters
+    ----------
+    values : `numpy.ndarray`
+        Measurement values, as returned by `read_measurement_values`.
+    metrics : `dict` of `Metric`
+        Metrics keyed by name, as returned by `load_metrics`.
+    spec_name : `str`, optional
+        Name of the specification level.
+
+    Returns
+    -------
+    scores : `numpy.ndarray`
+        Copy of ``values`` with two more fields: ``threshold``, the
+        specification level in the units of the value (NaN if the
+        measurement cannot be scored), and ``score``, one of `SCORE_PASS`,
+        `SCORE_FAIL` or `SCORE_NO_SPEC`.
+    """
+    dtype = values.dtype.descr + [('threshold', float), ('score', np.int8)]
+    scores = np.empty(len(values), dtype=dtype)
+    for name in values.dtype.names:
+        scores[name] = values[name]
+
+    # Resolve each distinct (metric, filter, unit) group once
+    groups = {}
+    inverse = np.empty(len(values), dtype=np.intp)
+    for i, key in enumerate(zip(values['metric'], values['filter_name'],
+                                values['unit'])):
+        inverse[i] = groups.setdefault(key, len(groups))
+    thresholds = np.full(len(groups), np.nan)
+    operators = np.full(len(groups), -1, dtype=np.intp)
+    operator_funcs = []
+    for key, index in groups.items():
+        resolved = _resolve_spec(metrics, spec_name, *key)
+        if resolved is None:
+            continue
+        thresholds[index], op_str = resolved
+        if op_str not in operator_funcs:
+            operator_funcs.append(op_str)
+        operators[index] = operator_funcs.index(op_str)
+
+    threshold = thresholds[inverse]
+    operator_index = operators[inverse]
+    value = scores['value']
+    score = np.full(len(values), SCORE_NO_SPEC, dtype=np.int8)
+    scorable = ~np.isnan(threshold) & ~np.isnan(value)
+    for i, op_str in enumerate(operator_funcs):
+        mask = scorable & (operator_index == i)
+        op = Metric.convert_operator_str(op_str)
+        score[mask] = np.where(op(value[mask], threshold[mask]),
+                               SCORE_PASS, SCORE_FAIL)
+    scores['threshold'] = np.where(scorable, threshold, np.nan)
+    scores['score'] = score
+    return scores
+
+
+def _resolve_spec(metrics, spec_name, metric_name, filter_name, unit):
+    """Get the specification level of a metric in given units.
+
+    Returns
+    -------
+    resolved : `tuple` or `None`
+        ``(threshold, operator_str)``, or `None` if the specification is
+        not defined or not convertible to ``unit``.
+    """
+    metric = metrics.get(metric_name)
+    if metric is None:
+        return None
+    try:
+        spec = metric.get_spec(spec_name, filter_name=filter_name)
+    except RuntimeError:
+        return None
+    quantity = spec.quantity
+    if not isinstance(quantity, u.Quantity):
+        return None
+    try:
+        threshold = quantity.to_value(u.Unit(unit))
+    except (u.UnitsError, ValueError):
+        return None
+    return float(threshold), metric.operator_str
+
+
+def rescore_files(paths, metrics, spec_name='design', max_workers=1):
+    """Score the measurements of many job files against a specification
+    level.
+
+    Parameters
+    ----------
+    paths : `list` of `str`
+        Paths of job files.
+    metrics : `dict` of `Metric` or `str`
+        Metrics keyed by name, or the path of a metric YAML file.
+    spec_name : `str`, optional
+        Name of the specification level.
+    max_workers : `int`, optional
+        Number of worker processes reading job files. With ``1``, files are
+        read in this process.
+
+    Returns
+    -------
+    scores : `numpy.ndarray`
+        Scores of all measurements (see `rescore`), with a ``path`` field
+        giving the file of each measurement.
+    """
+    if isinstance(metrics, str):
+        metrics = load_metrics(metrics)
+    paths = list(paths)
+    if max_workers > 1 and len(paths) > 1:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers) as pool:
+            per_file = list(pool.map(read_measurement_values, paths))
+    else:
+        per_file = [read_measurement_values(path) for path in paths]
+
+    if per_file:
+        values = np.concatenate(per_file)
+    else:
+        values = np.empty(0, dtype=_VALUE_DTYPE)
+    scores = rescore(values, metrics, spec_name=spec_name)
+
+    result = np.empty(len(scores),
+                      dtype=[('path', object)] + scores.dtype.descr)
+    result['path'] = np.repeat(np.array(paths, dtype=object),
+                               [len(v) for v in per_file])
+    for name in scores.dtype.names:
+        result[name] = scores[name]
+    return result
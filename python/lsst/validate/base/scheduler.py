@@ -0,0 +1,300 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['MeasurementScheduler']
+
+from collections import OrderedDict, deque
+import concurrent.futures
+
+from .errors import ValidateDependencyError
+from .metric import Metric
+from .job import Job
+from .executor import _run_task
+from .tracing import get_tracer
+
+
+class MeasurementScheduler(object):
+    """Run measurement producers in the order given by the dependencies
+    between their metrics.
+
+    A metric depends on another metric if one of its specifications lists
+    that metric as a dependency (see `Metric.get_spec_dependency`). The
+    scheduler runs the producers of a metric once the producers of all the
+    metrics it depends on have finished, running independent producers in
+    parallel. Each producer receives the measurements of the metrics it
+    depends on.
+
+    Parameters
+    ----------
+    metrics : `dict` or `list` of `Metric`
+        Metrics that measurements are produced for, such as the output of
+        `load_metrics`. Their specifications' dependencies define the order
+        in which producers run.
+    executor : `concurrent.futures.Executor`, optional
+        Executor that runs producers. By default, a
+        `concurrent.futures.ThreadPoolExecutor` with ``max_workers``
+        threads is used. With a `concurrent.futures.ProcessPoolExecutor`,
+        producers and their arguments must be picklable.
+    max_workers : `int`, optional
+        Number of threads of the default executor.
+    instrument : `bool`, optional
+        If `True`, record the wall time, CPU time and memory used to make
+        each measurement in its `MeasurementBase.performance` attribute
+        (see `PerformanceMonitor`).
+
+    Examples
+    --------
+    The specifications of ``AF1`` depend on ``AD1``, so the ``AF1``
+    producer runs after the ``AD1`` producer, and receives the ``AD1``
+    measurement::
+
+        scheduler = MeasurementScheduler(load_metrics('metrics.yaml'))
+        scheduler.add('AD1', AD1Measurement, args=(matches,), depends_on=[])
+        scheduler.add('AF1', AF1Measurement, args=(matches,))
+        job = scheduler.run()
+
+    where ``AF1Measurement`` looks up ``AD1`` with
+    ``upstream.get_measurement('AD1')``. The specifications of ``AD1`` also
+    depend on ``AF1``, so ``depends_on`` is needed to break the cycle.
+    """
+
+    def __init__(self, metrics, executor=None, max_workers=None,
+                 instrument=False):
+        if isinstance(metrics, dict):
+            metrics = metrics.values()
+        self.metrics = OrderedDict((m.name, m) for m in metrics)
+        self.executor = executor
+        self.max_workers = max_workers
+        self.instrument = instrument
+        # Producers, keyed by metric name, as lists of
+        # (factory, args, kwargs) tuples
+        self._producers = OrderedDict()
+        # Upstream metric names of each metric with explicit dependencies
+        self._depends_on = {}
+
+    def add(self, metric_name, factory, args=(), kwargs=None,
+            depends_on=None):
+        """Add a producer of measurements of a metric.
+
+        Several producers can be added for a metric (e.g., one per filter).
+        Downstream producers only run once all of them have finished.
+
+        Parameters
+        ----------
+        metric_name : `str`
+            Name of the metric measured by the producer.
+        factory : callable
+            Callable that returns a `MeasurementBase`-type object, or a
+            `list` of them, when called as
+            ``factory(*args, upstream=upstream, **kwargs)``, where
+            ``upstream`` is a `Job` containing the measurements of the
+            metrics that ``metric_name`` depends on.
+        args : `tuple`, optional
+            Positional arguments of ``factory``.
+        kwargs : `dict`, optional
+            Keyword arguments of ``factory``.
+        depends_on : `list` of `str`, optional
+            Names of the metrics that ``metric_name`` depends on, overriding
+            the dependencies of its specifications. Use this when
+            specification dependencies do not reflect the order of
+            measurements (e.g., ``AD1`` and ``AF1``, whose specifications
+            depend on each other).
+
+        Raises
+        ------
+        RuntimeError
+            Raised if ``metric_name`` is not one of the scheduler's
+            `metrics`.
+        """
+        if metric_name not in self.metrics:
+            raise RuntimeError(
+                'No metric named {0!r} in the scheduler'.format(metric_name))
+        if kwargs is None:
+            kwargs = {}
+        self._producers.setdefault(metric_name, []).append(
+            (factory, tuple(args), dict(kwargs)))
+        if depends_on is not None:
+            self._depends_on[metric_name] = list(depends_on)
+
+    def get_dependencies(self, metric_name):
+        """Get the names of the metrics that a metric depends on.
+
+        Parameters
+        ----------
+        metric_name : `str`
+            Name of the metric.
+
+        Returns
+        -------
+        dependencies : `list` of `str`
+            Names of the metrics listed as dependencies of the metric's
+            specifications, or passed as ``depends_on`` to `add`.
+        """
+        if metric_name in self._depends_on:
+            return list(self._depends_on[metric_name])
+        names = OrderedDict()
+        for spec in self.metrics[metric_name].specs:
+            for dep in spec.dependencies.values():
+                if isinstance(dep, Metric):
+                    names[dep.name] = None
+        return list(names)
+
+    @property
+    def graph(self):
+        """Dependency graph of the metrics that have producers
+        (`collections.OrderedDict`).
+
+        Keys are metric names, and values are `list`\ s of the names of the
+        metrics they depend on. Dependencies on metrics without producers
+        are omitted; their measurements are looked up in the `Job` passed to
+        `run`.
+        """
+        return OrderedDict(
+            (name, [d for d in self.get_dependencies(name)
+                    if d in self._producers and d != name])
+            for name in self._producers)
+
+    def order(self):
+        """Sort metrics with producers so that each metric comes after the
+        metrics it depends on.
+
+        Returns
+        -------
+        metric_names : `list` of `str`
+            Metric names in dependency order. Independent metrics keep the
+            order in which their producers were added.
+
+        Raises
+        ------
+        lsst.validate.base.ValidateDependencyError
+            Raised if metric dependencies form a cycle.
+        """
+        graph = self.graph
+        in_degree, downstream = _in_degrees(graph)
+        ready = deque(name for name in graph if in_degree[name] == 0)
+        ordered = []
+        while ready:
+            name = ready.popleft()
+            ordered.append(name)
+            for d in downstream[name]:
+                in_degree[d] -= 1
+                if in_degree[d] == 0:
+                    ready.append(d)
+        if len(ordered) < len(graph):
+            _raise_cycle(graph, ordered)
+        return ordered
+
+    def run(self, job=None):
+        """Run all producers in dependency order and register their
+        measurements in a `Job`.
+
+        Parameters
+        ----------
+        job : `Job`, optional
+            Job to register measurements in. By default, a new `Job` is
+            created. Measurements already in the job are available to
+            producers of metrics that depend on them.
+
+        Returns
+        -------
+        job : `Job`
+            The job containing the measurements (and their blobs).
+
+        Raises
+        ------
+        lsst.validate.base.ValidateDependencyError
+            Raised if metric dependencies form a cycle.
+        """
+        if job is None:
+            job = Job()
+        graph = self.graph
+        self.order()  # fail early on cycles
+        producers, self._producers = self._producers, OrderedDict()
+        self._depends_on = {}
+
+        in_degree, downstream = _in_degrees(graph)
+        remaining = {name: len(tasks) for name, tasks in producers.items()}
+        dependencies = {name: self.get_dependencies(name) for name in graph}
+
+        tracer = get_tracer()
+        executor = self.executor
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers)
+        try:
+            running = {}
+
+            def submit(name):
+                upstream = _upstream_job(job, dependencies[name])
+                for factory, args, kwargs in producers[name]:
+                    kwargs = dict(kwargs, upstream=upstream)
+                    future = executor.submit(_run_task,
+                                             (factory, args, kwargs),
+                                             instrument=self.instrument,
+                                             trace=tracer is not None)
+                    running[future] = name
+
+            for name in graph:
+                if in_degree[name] == 0:
+                    submit(name)
+            while running:
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    measurements = future.result()
+                    if tracer is not None:
+                        measurements, span = measurements
+                        tracer.add_span(**span)
+                    for m in measurements:
+                        job.register_measurement(m)
+                    remaining[name] -= 1
+                    if remaining[name] > 0:
+                        continue
+                    for d in downstream[name]:
+                        in_degree[d] -= 1
+                        if in_degree[d] == 0:
+                            submit(d)
+        finally:
+            if self.executor is None:
+                executor.shutdown(cancel_futures=True)
+        return job
+
+
+def _in_degrees(graph):
+    """Count the upstream metrics of each metric, and list the downstream
+    metrics of each metric, in a dependency graph.
+    """
+    in_degree = {name: len(deps) for name, deps in graph.items()}
+    downstream = {name: [] for name in graph}
+    for name, deps in graph.items():
+        for dep in deps:
+            downstream[dep].append(name)
+    return in_degree, downstream
+
+
+def _raise_cycle(graph, ordered):
+    """Raise a `ValidateDependencyError` describing a dependency cycle
+    among the metrics of ``graph`` that could not be ordered.
+    """
+    unresolved = [name for name in graph if name not in ordered]
+    # Walk upstream from an unresolved metric until a metric repeats
+    path = [unresolved[0]]
+    while True:
+        upstream = [d for d in graph[path[-1]] if d in unresolved]
+        name = upstream[0]
+        if name in path:
+            cycle = path[path.index(name):] + [name]
+            break
+        path.append(name)
+    raise ValidateDependencyError(
+        'Metric dependencies form a cycle: {0}'.format(
+            ' <- '.join(cycle)))
+
+
+def _upstream_job(job, metric_names):
+    """Make a `Job` with the measurements of ``job`` for some metrics."""
+    job._merge_pending()
+    measurements = []
+    for name in metric_names:
+        measurements.extend(job._measurements_by_metric.get(name, []))
+    return Job(measurements=measurements)
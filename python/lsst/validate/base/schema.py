@@ -0,0 +1,139 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Declarative fields of measurement classes.
+
+Fields are declared as class attributes of `MeasurementBase` subclasses.
+Reading or setting a field on an instance goes straight to the
+corresponding parameter, extra or blob rather than through
+`MeasurementBase.__getattr__`.
+"""
+
+__all__ = ['ParameterField', 'ExtraField', 'BlobField']
+
+from .blob import BlobBase
+
+
+class _DatumField(object):
+    """Base class of fields backed by a `Datum` in a `dict` attribute of a
+    measurement.
+
+    Subclasses set ``_container`` to the name of that attribute, and
+    ``_register`` to the name of the method that registers the datum.
+    """
+
+    _container = None
+    _register = None
+
+    def __init__(self, quantity=None, label=None, description=None):
+        self.quantity = quantity
+        self.label = label
+        self.description = description
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self._container][self.name].quantity
+        except KeyError:
+            raise AttributeError("%r object has no attribute %r" %
+                                 (owner, self.name))
+
+    def __set__(self, instance, value):
+        instance.__dict__[self._container][self.name].quantity = value
+
+    def register(self, measurement):
+        """Register the field's `Datum` with a measurement instance."""
+        getattr(measurement, self._register)(
+            self.name, quantity=self.quantity, label=self.label,
+            description=self.description)
+
+
+class ParameterField(_DatumField):
+    """Declare a measurement parameter as a class attribute.
+
+    The parameter is registered (as with
+    `MeasurementBase.register_parameter`) when the measurement is
+    initialized by `MeasurementBase.__init__`.
+
+    Parameters
+    ----------
+    quantity : `astropy.units.Quantity`, `str`, `bool` or `int`, optional
+        Initial value of the parameter.
+    label : `str`, optional
+        Label suitable for plot axes (without units). By default the name of
+        the class attribute is used.
+    description : `str`, optional
+        Extended description of the parameter.
+
+    Examples
+    --------
+    ::
+
+        class PA1Measurement(MeasurementBase):
+
+            num_random_shuffles = ParameterField(
+                50, description='Number of random shuffles')
+
+            def __init__(self, matches):
+                MeasurementBase.__init__(self)
+                for i in range(self.num_random_shuffles):
+                    ...
+    """
+
+    _container = 'parameters'
+    _register = 'register_parameter'
+
+
+class ExtraField(_DatumField):
+    """Declare a measurement extra as a class attribute.
+
+    The extra is registered (as with `MeasurementBase.register_extra`) when
+    the measurement is initialized by `MeasurementBase.__init__`.
+
+    Parameters
+    ----------
+    quantity : `astropy.units.Quantity`, `str`, `bool` or `int`, optional
+        Initial value of the extra.
+    label : `str`, optional
+        Label suitable for plot axes (without units). By default the name of
+        the class attribute is used.
+    description : `str`, optional
+        Extended description of the extra.
+    """
+
+    _container = 'extras'
+    _register = 'register_extra'
+
+
+class BlobField(object):
+    """Declare a blob linked to a measurement as a class attribute.
+
+    Setting the attribute on a measurement instance links the blob, as
+    with any blob-valued attribute (see `MeasurementBase.blobs`).
+    """
+
+    def __init__(self):
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__['_linked_blobs'][self.name]
+        except KeyError:
+            raise AttributeError("%r object has no attribute %r" %
+                                 (owner, self.name))
+
+    def __set__(self, instance, value):
+        assert isinstance(value, BlobBase)
+        instance.__dict__['_linked_blobs'][self.name] = value
+
+    def register(self, measurement):
+        """Blobs are linked when the attribute is set; nothing to do."""
+        pass
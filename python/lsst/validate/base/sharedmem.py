@@ -0,0 +1,248 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['SharedArrayDatum']
+
+import contextlib
+import ctypes
+from multiprocessing import shared_memory
+import threading
+import weakref
+
+import numpy as np
+import astropy.units as u
+
+from .datum import Datum, QuantityAttributeMixin, _unpickle_datum
+
+
+class _SegmentBuffer(object):
+    """The memory of a shared memory segment, exposed to NumPy.
+
+    Arrays made from a `_SegmentBuffer` with `numpy.asarray` (and their
+    views) reference it as their base, so it lives as long as they do. The
+    segment's buffer is not exported to the arrays, which use its address
+    instead, so the segment is closed with `SharedMemory.close` once the
+    `_SegmentBuffer` is garbage collected.
+
+    Parameters
+    ----------
+    segment : `multiprocessing.shared_memory.SharedMemory`
+        The segment. It is closed with this object.
+    shape : `tuple`
+        Shape of the arrays.
+    dtype : `numpy.dtype`
+        Data type of the arrays.
+    """
+
+    def __init__(self, segment, shape, dtype):
+        dtype = np.dtype(dtype)
+        # The ctypes object holds a buffer export only until it is deleted
+        pointer = ctypes.c_char.from_buffer(segment.buf)
+        address = ctypes.addressof(pointer)
+        del pointer
+        self.__array_interface__ = {'version': 3,
+                                    'shape': tuple(shape),
+                                    'typestr': dtype.str,
+                                    'descr': dtype.descr,
+                                    'data': (address, False)}
+        closer = weakref.finalize(self, segment.close)
+        # Arrays may outlive the interpreter's exit handlers
+        closer.atexit = False
+
+
+class SharedArrayDatum(Datum):
+    """An array `Datum` whose values live in a shared memory segment.
+
+    When a `SharedArrayDatum` is pickled, for example to return a blob from a
+    worker process of a `MeasurementExecutor`, only the name of its shared
+    memory segment and the array's shape, type and units are pickled. The
+    unpickled datum views the same segment, so large arrays are not copied
+    between processes.
+
+    The segment is removed from the system by `release`, which
+    `Job.write_json` and `Job.release_shared_memory` call for the shared
+    datums of the job's blobs, or else when the datum that owns it is
+    garbage collected. The datum that creates a segment owns it; unpickled
+    datums do not, so a pickle is only valid while the owner exists, and
+    should not be persisted. `MeasurementExecutor` moves the ownership of
+    segments of measurements returned by its worker processes to the
+    unpickled datums, so that workers do not remove them. Arrays that view
+    the segment remain valid in processes that have mapped it, and each
+    process's mapping is closed once its last array is deleted.
+
+    Parameters
+    ----------
+    quantity : `astropy.units.Quantity` or array_like
+        Array value of the `Datum`. The values are copied into a new shared
+        memory segment. Use `empty` to create a shared datum that is filled
+        in place instead.
+    unit : `str`, optional
+        Units of ``quantity`` if it is not an `astropy.units.Quantity`.
+    label : `str`, optional
+        Label suitable for plot axes (without units).
+    description : `str`, optional
+        Extended description of the `Datum`.
+    """
+
+    def __init__(self, quantity=None, unit=None, label=None,
+                 description=None):
+        self._segment = None
+        self._unlinker = None
+        Datum.__init__(self, quantity=quantity, unit=unit, label=label,
+                       description=description)
+
+    @classmethod
+    def empty(cls, shape, unit='', dtype=float, label=None,
+              description=None):
+        """Create a shared datum with an uninitialized array, to be filled in
+        place.
+
+        Parameters
+        ----------
+        shape : `int` or `tuple`
+            Shape of the array.
+        unit : `str` or `astropy.units.Unit`, optional
+            Units of the array.
+        dtype : `numpy.dtype`, optional
+            Data type of the array.
+        label : `str`, optional
+            Label suitable for plot axes (without units).
+        description : `str`, optional
+            Extended description of the `Datum`.
+
+        Returns
+        -------
+        datum : `SharedArrayDatum`
+            The datum. Fill ``datum.quantity`` (or the corresponding blob
+            attribute) in place, e.g. ``datum.quantity[:] = values``.
+        """
+        datum = cls(label=label, description=description)
+        shape = tuple(int(n) for n in np.atleast_1d(shape))
+        segment = _create_segment(shape, dtype)
+        datum._set_segment(segment, shape, dtype, u.Unit(unit), owner=True)
+        return datum
+
+    @property
+    def segment_name(self):
+        """Name of the shared memory segment (`str`), or `None` if the datum
+        is not backed by a segment.
+        """
+        if self._segment is None:
+            return None
+        return self._segment.name
+
+    @QuantityAttributeMixin.quantity.setter
+    def quantity(self, q):
+        if isinstance(q, u.Quantity) and q.ndim > 0:
+            values = np.asarray(q.value)
+            segment = _create_segment(values.shape, values.dtype)
+            self.release()
+            self._set_segment(segment, values.shape, values.dtype, q.unit,
+                              owner=True)
+            self._quantity.value[...] = values
+        else:
+            # Scalars and non-quantity types are stored normally
+            self.release()
+            QuantityAttributeMixin.quantity.fset(self, q)
+
+    def _set_segment(self, segment, shape, dtype, unit, owner):
+        """Use a segment as the storage of the datum's quantity.
+
+        If ``owner`` is `True`, the segment is removed from the system when
+        the datum is garbage collected, unless it is released or handed
+        over first.
+        """
+        array = np.asarray(_SegmentBuffer(segment, shape, dtype))
+        self._segment = segment
+        self._quantity = u.Quantity(array, unit, dtype=array.dtype,
+                                    copy=False)
+        if owner:
+            self._unlinker = weakref.finalize(self, _unlink_segment, segment)
+
+    def release(self, unlink=True):
+        """Release the datum's shared memory segment.
+
+        The datum's quantity remains valid in this process, but is no
+        longer shared: it is pickled by value afterwards. The segment is
+        closed in this process once no array views it.
+
+        Parameters
+        ----------
+        unlink : `bool`, optional
+            If `True`, the segment is also removed from the system, so the
+            memory is freed once every process has dropped its views of it.
+            Only do this once every process that needs the datum has
+            unpickled it.
+        """
+        segment, self._segment = self._segment, None
+        self._disown()
+        if segment is not None and unlink:
+            _unlink_segment(segment)
+
+    def _disown(self):
+        """Stop removing the segment when the datum is garbage collected.
+        """
+        if self._unlinker is not None:
+            self._unlinker.detach()
+            self._unlinker = None
+
+    def __reduce__(self):
+        if self._segment is None:
+            # Not shared; pickle the value as a plain Datum
+            value, unit = self._reduce_quantity(self.quantity)
+            return (_unpickle_datum,
+                    (Datum, value, unit, self.label, self.description))
+        owner = (self._unlinker is not None and
+                 getattr(_handover, 'active', False))
+        if owner:
+            # The unpickled datum takes over the segment
+            self._disown()
+        array = self._quantity.value
+        return (_attach_shared_datum,
+                (self._segment.name, array.shape, array.dtype.str,
+                 self._quantity.unit, self.label, self.description, owner))
+
+
+_handover = threading.local()
+
+
+@contextlib.contextmanager
+def _handing_over_segments():
+    """Context in which pickling a `SharedArrayDatum` that owns its segment
+    moves the ownership to the unpickled datum.
+
+    Use it to pickle datums exactly once for another process, such as the
+    results of a worker process, which may drop its datums before they
+    are unpickled.
+    """
+    _handover.active = True
+    try:
+        yield
+    finally:
+        _handover.active = False
+
+
+def _create_segment(shape, dtype):
+    """Create a shared memory segment large enough for an array."""
+    nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    # Segments cannot be empty
+    return shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+
+
+def _unlink_segment(segment):
+    """Remove a shared memory segment from the system."""
+    try:
+        segment.unlink()
+    except FileNotFoundError:
+        # Already unlinked through another handle
+        pass
+
+
+def _attach_shared_datum(name, shape, dtype, unit, label, description,
+                         owner=False):
+    """Rebuild a `SharedArrayDatum` pickled by
+    `SharedArrayDatum.__reduce__`, attaching to its shared memory segment.
+    """
+    datum = SharedArrayDatum(label=label, description=description)
+    datum._set_segment(shared_memory.SharedMemory(name=name), shape,
+                       np.dtype(dtype), unit, owner=owner)
+    return datum
@@ -70,6 +70,11 @@ class Specification(QuantityAttributeMixin, JsonSerializationMixin):
         else:
             self.dependencies = {}
 
+    def __reduce__(self):
+        return (self.__class__,
+                (self.name, self.quantity, None, self.filter_names,
+                 self.dependencies))
+
     def __getattr__(self, key):
         """Access dependencies with keys as attributes."""
         if key in self.dependencies:
@@ -0,0 +1,71 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['summarize_array']
+
+import numpy as np
+import astropy.units as u
+
+
+def summarize_array(quantity, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+    """Compute summary statistics of an array.
+
+    Statistics are computed from a single sorted copy of the finite values
+    of the array.
+
+    Parameters
+    ----------
+    quantity : `astropy.units.Quantity` or array_like
+        Array to summarize.
+    quantiles : sequence of `float`, optional
+        Quantiles (between 0 and 1) to compute, using linear interpolation
+        between data points.
+
+    Returns
+    -------
+    summary : `dict`
+        JSON-serializable summary with these keys:
+
+        - ``count``: number of elements.
+        - ``nan_count``: number of NaN elements.
+        - ``min``, ``max``, ``mean``, ``std``: statistics of the finite
+          elements (`None` if there are no finite elements).
+        - ``quantiles``: `dict` of quantile values keyed by the quantile,
+          formatted as a `str` (e.g. ``'0.5'``).
+        - ``unit``: units of the statistics (`str`).
+    """
+    if isinstance(quantity, u.Quantity):
+        unit_str = str(quantity.unit)
+        values = np.asarray(quantity.value).ravel()
+    else:
+        unit_str = ''
+        values = np.asarray(quantity).ravel()
+
+    nan_count = int(np.count_nonzero(np.isnan(values)))
+    finite = np.sort(values[np.isfinite(values)].astype(float, copy=False))
+    n = len(finite)
+
+    quantile_keys = ['{0:g}'.format(q) for q in quantiles]
+    if n > 0:
+        # Linear interpolation between closest ranks, as numpy.quantile
+        positions = np.asarray(quantiles, dtype=float) * (n - 1)
+        lower = np.floor(positions).astype(int)
+        upper = np.minimum(lower + 1, n - 1)
+        fraction = positions - lower
+        quantile_values = finite[lower] + \
+            fraction * (finite[upper] - finite[lower])
+        stats = {'min': float(finite[0]),
+                 'max': float(finite[-1]),
+                 'mean': float(finite.mean()),
+                 'std': float(finite.std())}
+        quantile_doc = {k: float(v)
+                        for k, v in zip(quantile_keys, quantile_values)}
+    else:
+        stats = {'min': None, 'max': None, 'mean': None, 'std': None}
+        quantile_doc = {k: None for k in quantile_keys}
+
+    summary = {'count': int(values.size),
+               'nan_count': nan_count,
+               'quantiles': quantile_doc,
+               'unit': unit_str}
+    summary.update(stats)
+    return summary
@@ -0,0 +1,281 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Synthetic metrics, measurements, blobs and jobs for scale testing.
+
+Everything is generated from a seed, so repeated calls with the same
+arguments produce identical metrics, values and identifiers.
+"""
+
+__all__ = ['synthetic_metrics_doc', 'write_synthetic_metrics_yaml',
+           'synthetic_metrics', 'SyntheticBlob', 'SyntheticMeasurement',
+           'make_synthetic_job', 'write_synthetic_job']
+
+from collections import OrderedDict
+import uuid
+
+import numpy as np
+import astropy.units as u
+import yaml
+
+from .blob import BlobBase
+from .job import Job
+from .measurement import MeasurementBase
+from .metric import Metric
+from .schema import ParameterField
+
+
+_SPEC_LEVELS = ('design', 'minimum', 'stretch')
+
+
+def _filter_names(n_filters):
+    """Names of synthetic filters."""
+    return ['f{0:02d}'.format(i) for i in range(n_filters)]
+
+
+def _metric_name(i):
+    """Name of the synthetic metric number ``i``."""
+    return 'SYN{0:04d}'.format(i)
+
+
+def _random_id(rng):
+    """UUID4-style identifier drawn from a random state."""
+    return uuid.UUID(bytes=rng.bytes(16), version=4).hex
+
+
+def synthetic_metrics_doc(n_metrics=10, n_filters=6, n_parameters=2,
+                          dependency_depth=0, n_specs=3):
+    """Make a metric YAML document (as loaded by `load_metrics`).
+
+    Parameters
+    ----------
+    n_metrics : `int`, optional
+        Number of metrics, named ``SYN0000``, ``SYN0001``, etc.
+    n_filters : `int`, optional
+        Number of filters, named ``f00``, ``f01``, etc. Every specification
+        applies to all filters.
+    n_parameters : `int`, optional
+        Number of parameters of each metric.
+    dependency_depth : `int`, optional
+        Length of the dependency chains between metrics. Metrics are
+        grouped in chains of ``dependency_depth + 1`` metrics, where the
+        specifications of each metric depend on the previous metric of its
+        chain and on a threshold `Datum`. With ``0``, metrics have no
+        dependencies.
+    n_specs : `int`, optional
+        Number of specification levels per metric (up to 3: ``design``,
+        ``minimum`` and ``stretch``).
+
+    Returns
+    -------
+    doc : `collections.OrderedDict`
+        Metric definitions, keyed by metric name.
+    """
+    filter_names = _filter_names(n_filters)
+    doc = OrderedDict()
+    for i in range(n_metrics):
+        metric_doc = OrderedDict()
+        metric_doc['reference'] = {'doc': 'SYNTHETIC', 'url': None,
+                                   'page': i + 1}
+        metric_doc['description'] = 'Synthetic metric {0:d}.'.format(i)
+        metric_doc['operator'] = '<='
+        metric_doc['parameters'] = OrderedDict(
+            ('p{0:d}'.format(j), {'value': float(j + 1), 'unit': 'arcsec'})
+            for j in range(n_parameters))
+        specs = []
+        for level_index, level in enumerate(_SPEC_LEVELS[:n_specs]):
+            spec = OrderedDict()
+            spec['level'] = level
+            spec['value'] = 10. * (level_index + 1)
+            spec['unit'] = 'mmag'
+            spec['filter_names'] = list(filter_names)
+            if dependency_depth > 0 and i % (dependency_depth + 1) != 0:
+                spec['dependencies'] = [
+                    _metric_name(i - 1),
+                    {'threshold': {'value': float(level_index + 1),
+                                   'unit': 'mmag'}}]
+            specs.append(spec)
+        metric_doc['specs'] = specs
+        doc[_metric_name(i)] = metric_doc
+    return doc
+
+
+def write_synthetic_metrics_yaml(path, **kwargs):
+    """Write a synthetic metric YAML file.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the YAML file.
+    **kwargs
+        Arguments of `synthetic_metrics_doc`.
+    """
+    doc = _to_plain(synthetic_metrics_doc(**kwargs))
+    with open(path, 'w') as f:
+        yaml.safe_dump(doc, f, default_flow_style=False, sort_keys=False)
+
+
+def _to_plain(obj):
+    """Convert nested `OrderedDict`\ s to `dict`\ s for YAML output."""
+    if isinstance(obj, dict):
+        return {k: _to_plain(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_plain(v) for v in obj]
+    return obj
+
+
+def synthetic_metrics(**kwargs):
+    """Make synthetic `Metric`\ s.
+
+    Parameters
+    ----------
+    **kwargs
+        Arguments of `synthetic_metrics_doc`.
+
+    Returns
+    -------
+    metrics : `collections.OrderedDict`
+        `Metric` instances keyed by name, as returned by `load_metrics`.
+    """
+    doc = synthetic_metrics_doc(**kwargs)
+    return OrderedDict((name, Metric.from_yaml(name, yaml_doc=doc))
+                       for name in doc)
+
+
+class SyntheticBlob(BlobBase):
+    """Blob of synthetic photometry arrays.
+
+    Parameters
+    ----------
+    size : `int`
+        Number of elements of each array.
+    rng : `numpy.random.RandomState`
+        Source of the values.
+    """
+
+    name = 'SyntheticBlob'
+
+    def __init__(self, size, rng):
+        BlobBase.__init__(self)
+        self._id = _random_id(rng)
+        self.register_datum('mag', quantity=rng.normal(20., 1., size) * u.mag,
+                            label='mag', description='Magnitudes')
+        self.register_datum('mag_err',
+                            quantity=rng.uniform(0.001, 0.1, size) * u.mag,
+                            label='mag err',
+                            description='Magnitude uncertainties')
+
+
+class SyntheticMeasurement(MeasurementBase):
+    """Measurement of a synthetic metric.
+
+    Parameters
+    ----------
+    metric : `Metric`
+        Metric being measured.
+    filter_name : `str`
+        Name of the filter.
+    rng : `numpy.random.RandomState`
+        Source of the values and identifier.
+    n_extras : `int`, optional
+        Number of scalar extras.
+    blob : `SyntheticBlob`, optional
+        Blob to link as the ``photometry`` attribute.
+    """
+
+    num_random_shuffles = ParameterField(
+        50, description='Number of random shuffles')
+
+    def __init__(self, metric, filter_name, rng, n_extras=2, blob=None):
+        MeasurementBase.__init__(self)
+        self._id = _random_id(rng)
+        self.metric = metric
+        self.filter_name = filter_name
+        for i in range(n_extras):
+            self.register_extra('extra{0:d}'.format(i),
+                                quantity=rng.normal() * u.mmag,
+                                label='extra {0:d}'.format(i))
+        if blob is not None:
+            self.photometry = blob
+        self.quantity = abs(rng.normal(10., 5.)) * u.mmag
+
+
+def make_synthetic_job(n_measurements=100, n_metrics=10, n_extras=2,
+                       blob_size=0, n_blobs=None, metrics=None, seed=0,
+                       **kwargs):
+    """Make a `Job` of synthetic measurements and blobs.
+
+    Measurements cycle through the metrics, then through filters, so that
+    each measurement has a distinct metric and filter combination.
+
+    Parameters
+    ----------
+    n_measurements : `int`, optional
+        Number of measurements.
+    n_metrics : `int`, optional
+        Number of metrics measured (ignored if ``metrics`` is set).
+    n_extras : `int`, optional
+        Number of scalar extras of each measurement.
+    blob_size : `int`, optional
+        Number of elements of each array of each blob. With ``0``, no blobs
+        are made.
+    n_blobs : `int`, optional
+        Number of blobs. Measurements are linked to blobs in turn, so fewer
+        blobs than measurements makes measurements share blobs. By default,
+        each measurement has its own blob.
+    metrics : `dict`, optional
+        `Metric` instances to measure, such as from `synthetic_metrics`.
+        Their specifications should cover the ``f00``, ``f01``, etc.
+        filters used by the measurements.
+    seed : `int`, optional
+        Seed of the values and identifiers.
+    **kwargs
+        Further arguments of `synthetic_metrics_doc` (such as
+        ``dependency_depth``), used if ``metrics`` is not set.
+
+    Returns
+    -------
+    job : `Job`
+        The job.
+    """
+    n_metrics = n_metrics if metrics is None else len(metrics)
+    n_filters = max(1, -(-n_measurements // n_metrics))
+    if metrics is None:
+        metrics = synthetic_metrics(n_metrics=n_metrics, n_filters=n_filters,
+                                    **kwargs)
+    metrics = list(metrics.values())
+    filter_names = _filter_names(n_filters)
+
+    rng = np.random.RandomState(seed)
+    blobs = []
+    if blob_size > 0:
+        n_blobs = n_measurements if n_blobs is None else n_blobs
+        blobs = [SyntheticBlob(blob_size, rng) for _ in range(n_blobs)]
+
+    measurements = []
+    for i in range(n_measurements):
+        blob = blobs[i % len(blobs)] if blobs else None
+        measurements.append(SyntheticMeasurement(
+            metrics[i % n_metrics], filter_names[i // n_metrics], rng,
+            n_extras=n_extras, blob=blob))
+    return Job(measurements=measurements)
+
+
+def write_synthetic_job(path, blob_store=None, **kwargs):
+    """Write a synthetic job to a JSON file.
+
+    Parameters
+    ----------
+    path : `str`
+        Path of the job's JSON file.
+    blob_store : `BlobStore`, optional
+        Store to write the blobs into (see `Job.write_json`).
+    **kwargs
+        Arguments of `make_synthetic_job`.
+
+    Returns
+    -------
+    job : `Job`
+        The job that was written.
+    """
+    job = make_synthetic_job(**kwargs)
+    job.write_json(path, blob_store=blob_store)
+    return job
@@ -0,0 +1,202 @@
+# See COPYRIGHT file at the top of the source tree.
+
+__all__ = ['Tracer', 'get_tracer']
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+_active = None
+"""The `Tracer` that records spans, or `None` if tracing is off."""
+
+
+class Tracer(object):
+    """Record a timeline of measurement runs as a Chrome trace.
+
+    While a tracer is active (in its context), the library records *spans*
+    of:
+
+    - the measurements made by `MeasurementExecutor` and
+      `MeasurementScheduler` (category ``measure``), on the process and
+      thread of the worker that made them;
+    - the merging of registered measurements and blobs into a `Job`
+      (``register``);
+    - `Job.json` and `Job.from_json` (``serialize``);
+    - `Job.write_json` (``write``).
+
+    Applications can record spans of their own with `span`. The timeline is
+    exported with `write` as Chrome trace-event JSON, which can be opened in
+    ``chrome://tracing`` or https://ui.perfetto.dev.
+
+    When no tracer is active, tracing costs one global lookup per traced
+    operation.
+
+    Examples
+    --------
+    ::
+
+        with Tracer() as tracer:
+            job = executor.run()
+            job.write_json('job.json')
+        tracer.write('trace.json')
+    """
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._names = {}
+        self._previous = None
+
+    def __enter__(self):
+        global _active
+        self._previous = _active
+        _active = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _active
+        _active = self._previous
+        self._previous = None
+        return False
+
+    @contextlib.contextmanager
+    def span(self, name, category='user', **args):
+        """Record a span of the code run in a context.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the span.
+        category : `str`, optional
+            Category of the span, used to filter spans in trace viewers.
+        **args
+            JSON-serializable values shown with the span.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            thread = threading.current_thread()
+            self.add_span(name, category, start, time.perf_counter(),
+                          tid=thread.ident, thread_name=thread.name,
+                          args=args)
+
+    def add_span(self, name, category, start, end, pid=None, tid=None,
+                 thread_name=None, args=None):
+        """Add a span recorded elsewhere, such as in a worker process.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the span.
+        category : `str`
+            Category of the span.
+        start : `float`
+            Start of the span, from `time.perf_counter`.
+        end : `float`
+            End of the span, from `time.perf_counter`.
+        pid : `int`, optional
+            Process that ran the span. By default, this process.
+        tid : `int`, optional
+            Thread that ran the span. By default, the current thread.
+        thread_name : `str`, optional
+            Name of the thread, shown by trace viewers.
+        args : `dict`, optional
+            JSON-serializable values shown with the span.
+        """
+        if pid is None:
+            pid = self._pid
+        if tid is None:
+            thread = threading.current_thread()
+            tid, thread_name = thread.ident, thread.name
+        event = {'name': name,
+                 'cat': category,
+                 'ph': 'X',
+                 'ts': (start - self._origin) * 1e6,
+                 'dur': (end - start) * 1e6,
+                 'pid': pid,
+                 'tid': tid}
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+            if thread_name is not None:
+                self._names[(pid, tid)] = thread_name
+
+    @property
+    def json(self):
+        """Trace as a `dict` in the Chrome trace-event format."""
+        with self._lock:
+            events = list(self.events)
+            names = dict(self._names)
+        metadata = []
+        for pid in sorted(set(event['pid'] for event in events) |
+                          {self._pid}):
+            if pid == self._pid:
+                process_name = 'main ({0:d})'.format(pid)
+            else:
+                process_name = 'worker ({0:d})'.format(pid)
+            metadata.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                             'tid': 0, 'args': {'name': process_name}})
+        for (pid, tid), thread_name in sorted(names.items()):
+            metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                             'tid': tid, 'args': {'name': thread_name}})
+        return {'traceEvents': metadata + events,
+                'displayTimeUnit': 'ms'}
+
+    def write(self, filepath):
+        """Write the trace to a JSON file.
+
+        Parameters
+        ----------
+        filepath : `str`
+            Destination file name.
+        """
+        with open(filepath, 'w') as f:
+            json.dump(self.json, f)
+
+
+def get_tracer():
+    """Get the active `Tracer`.
+
+    Returns
+    -------
+    tracer : `Tracer` or `None`
+        The tracer, or `None` if tracing is off.
+    """
+    return _active
+
+
+def _span(name, category, **args):
+    """Record a span with the active tracer, if any."""
+    tracer = _active
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, **args)
+
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def _measurement_span(factory, measurements, start, end):
+    """Describe the span of a measurement made in a worker, to be added to
+    the tracer with `Tracer.add_span`.
+    """
+    thread = threading.current_thread()
+    name = getattr(factory, '__qualname__', None) or repr(factory)
+    metrics = sorted(set(m.metric.name for m in measurements
+                         if m.metric is not None))
+    return {'name': name,
+            'category': 'measure',
+            'start': start,
+            'end': end,
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'thread_name': thread.name,
+            'args': {'metrics': metrics,
+                     'measurements': len(measurements)}}
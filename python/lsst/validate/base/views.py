@@ -0,0 +1,142 @@
+# See COPYRIGHT file at the top of the source tree.
+"""Downsampled representations of blob arrays for plotting.
+
+Each function takes a `list` of datum names and a `list` of the
+corresponding array quantities, and returns a JSON-serializable `dict`.
+Use `BlobBase.register_view` to serialize these views with a blob.
+"""
+
+__all__ = ['sample_view', 'histogram2d_view', 'envelope_view', 'VIEW_KINDS']
+
+import numpy as np
+import astropy.units as u
+
+
+def _split_quantity(q):
+    """Split an array quantity into its values and unit string."""
+    if isinstance(q, u.Quantity):
+        return np.asarray(q.value), str(q.unit)
+    else:
+        return np.asarray(q), ''
+
+
+def sample_view(names, quantities, size=1000, seed=0):
+    """Uniform random sample of one or more aligned arrays.
+
+    The same elements are sampled from every array, so samples of paired
+    arrays (such as coordinates) remain paired.
+
+    Parameters
+    ----------
+    names : `list` of `str`
+        Datum names.
+    quantities : `list` of `astropy.units.Quantity`
+        Arrays of equal length.
+    size : `int`, optional
+        Maximum number of elements in the sample.
+    seed : `int`, optional
+        Random seed, so that views are reproducible.
+
+    Returns
+    -------
+    view : `dict`
+        Has keys ``count`` (number of elements in the full arrays),
+        ``index`` (sorted indices of the sampled elements), ``values`` and
+        ``units`` (`dict`\ s keyed by datum name).
+    """
+    arrays, units = zip(*[_split_quantity(q) for q in quantities])
+    count = len(arrays[0])
+    if count > size:
+        rng = np.random.RandomState(seed)
+        index = np.sort(rng.choice(count, size=size, replace=False))
+    else:
+        index = np.arange(count)
+    return {'count': count,
+            'index': index.tolist(),
+            'values': {name: a[index].tolist()
+                       for name, a in zip(names, arrays)},
+            'units': dict(zip(names, units))}
+
+
+def histogram2d_view(names, quantities, bins=100, range=None):
+    """Binned two-dimensional histogram of a pair of arrays (for scatter
+    plots).
+
+    Parameters
+    ----------
+    names : `list` of `str`
+        Names of the ``x`` and ``y`` datums.
+    quantities : `list` of `astropy.units.Quantity`
+        The ``x`` and ``y`` arrays. Non-finite pairs are ignored.
+    bins : `int` or `list`, optional
+        Number of bins, or bins along each axis (see
+        `numpy.histogram2d`).
+    range : `list`, optional
+        ``[[xmin, xmax], [ymin, ymax]]`` range of the histogram, in the units
+        of the arrays. By default the range of the finite data is used.
+
+    Returns
+    -------
+    view : `dict`
+        Has keys ``counts`` (nested `list` indexed by ``x`` bin, then ``y``
+        bin), ``x_edges``, ``y_edges`` and ``units``.
+    """
+    assert len(quantities) == 2
+    (x, x_unit), (y, y_unit) = [_split_quantity(q) for q in quantities]
+    finite = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[finite], y[finite],
+                                              bins=bins, range=range)
+    return {'counts': counts.astype(int).tolist(),
+            'x_edges': x_edges.tolist(),
+            'y_edges': y_edges.tolist(),
+            'units': dict(zip(names, (x_unit, y_unit)))}
+
+
+def envelope_view(names, quantities, n_bins=1000):
+    """Minimum and maximum envelope of a series in contiguous bins of
+    elements.
+
+    Parameters
+    ----------
+    names : `list` of `str`
+        Name of the series datum.
+    quantities : `list` of `astropy.units.Quantity`
+        The series array. NaN elements are ignored.
+    n_bins : `int`, optional
+        Maximum number of bins.
+
+    Returns
+    -------
+    view : `dict`
+        Has keys ``bin_start`` (index of the first element of each bin),
+        ``min``, ``max`` and ``units``.
+    """
+    assert len(quantities) == 1
+    values, unit = _split_quantity(quantities[0])
+    values = values.astype(float).ravel()
+    count = len(values)
+    bin_size = max(int(np.ceil(count / float(n_bins))), 1)
+    n_full = int(np.ceil(count / float(bin_size)))
+
+    padded = np.full(n_full * bin_size, np.nan)
+    padded[:count] = values
+    padded = padded.reshape(n_full, bin_size)
+    # fmin/fmax ignore NaNs without warnings for all-NaN bins
+    mins = np.fmin.reduce(padded, axis=1)
+    maxs = np.fmax.reduce(padded, axis=1)
+
+    def _to_list(a):
+        return [None if np.isnan(v) else float(v) for v in a]
+
+    return {'bin_start': np.arange(0, count, bin_size).tolist(),
+            'min': _to_list(mins),
+            'max': _to_list(maxs),
+            'units': {names[0]: unit}}
+
+
+VIEW_KINDS = {'sample': sample_view,
+              'hist2d': histogram2d_view,
+              'envelope': envelope_view}
+"""Functions that compute views, keyed by the ``kind`` argument of
+`BlobBase.register_view`.
+"""
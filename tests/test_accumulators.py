@@ -0,0 +1,152 @@
+# See COPYRIGHT file at the top of the source tree.
+import pickle
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, Moments,
+                                WeightedMoments, Rms, Histogram)
+
+
+class ExampleMeasurement(MeasurementBase):
+    """Example measurement that accumulators are finalized into."""
+
+    def __init__(self):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('Stream', 'Streaming measurement', '<')
+
+
+class AccumulatorsTestCase(unittest.TestCase):
+    """Test streaming accumulators."""
+
+    def setUp(self):
+        rng = np.random.RandomState(42)
+        self.values = rng.normal(1000., 3., size=10000)
+        self.weights = rng.uniform(0.5, 2., size=10000)
+        self.chunks = np.array_split(self.values, 7)
+
+    def test_moments(self):
+        moments = Moments()
+        for chunk in self.chunks:
+            moments.update(chunk * u.mmag)
+        moments.update([] * u.mmag)
+        stats = moments.finalize(ddof=1)
+        self.assertEqual(stats['count'], 10000)
+        self.assertAlmostEqual(stats['mean'].to_value(u.mmag),
+                               self.values.mean(), places=9)
+        self.assertAlmostEqual(stats['variance'].to_value(u.mmag**2),
+                               self.values.var(ddof=1), places=9)
+        self.assertEqual(stats['std'].unit, u.mmag)
+
+    def test_moments_merge(self):
+        # Accumulators filled in separate processes, in different units
+        first = Moments()
+        first.update(self.values[:3000] * u.mmag)
+        second = Moments(unit=u.mag)
+        second.update(self.values[3000:] / 1000.)
+        second = pickle.loads(pickle.dumps(second))
+        first.merge(second)
+        stats = first.finalize()
+        self.assertEqual(stats['count'], 10000)
+        self.assertAlmostEqual(stats['mean'].to_value(u.mmag),
+                               self.values.mean(), places=9)
+        self.assertAlmostEqual(stats['variance'].to_value(u.mmag**2),
+                               self.values.var(), places=6)
+
+        empty = Moments()
+        empty.merge(Moments())
+        self.assertTrue(np.isnan(empty.finalize()['mean']))
+        with self.assertRaises(TypeError):
+            first.merge(Rms())
+
+    def test_moments_nan(self):
+        moments = Moments()
+        moments.update([1., np.nan, 3.])
+        self.assertEqual(moments.finalize()['count'], 2)
+        self.assertEqual(moments.finalize()['mean'], 2. * u.one)
+
+    def test_weighted_moments(self):
+        full = WeightedMoments()
+        full.update(self.values * u.mas, self.weights)
+        merged = WeightedMoments()
+        for values, weights in zip(self.chunks,
+                                   np.array_split(self.weights, 7)):
+            part = WeightedMoments()
+            part.update(values * u.mas, weights)
+            merged.merge(part)
+
+        mean = np.average(self.values, weights=self.weights)
+        variance = np.average((self.values - mean)**2, weights=self.weights)
+        for acc in (full, merged):
+            stats = acc.finalize()
+            self.assertEqual(stats['count'], 10000)
+            self.assertAlmostEqual(stats['mean'].to_value(u.mas), mean,
+                                   places=9)
+            self.assertAlmostEqual(stats['variance'].to_value(u.mas**2),
+                                   variance, places=9)
+            self.assertAlmostEqual(stats['sum_weights'].value,
+                                   self.weights.sum())
+
+    def test_rms(self):
+        rms = Rms()
+        for chunk in self.chunks:
+            rms.update(chunk - 1000.)
+        other = Rms()
+        other.merge(rms)
+        expected = np.sqrt(np.mean((self.values - 1000.)**2))
+        self.assertAlmostEqual(other.finalize()['rms'].value, expected)
+        self.assertEqual(other.finalize()['count'], 10000)
+
+    def test_histogram(self):
+        edges = np.linspace(990., 1010., 21)
+        hist = Histogram(edges * u.mmag)
+        for chunk in self.chunks:
+            part = Histogram(edges / 1000., unit='mag')
+            part.update(chunk * u.mmag)
+            hist.merge(part)
+        hist.update([np.nan, 1010.] * u.mmag)
+
+        counts, _ = np.histogram(self.values, bins=edges)
+        stats = hist.finalize()
+        self.assertEqual(stats['counts'][-1].value, counts[-1] + 1)
+        np.testing.assert_array_equal(stats['counts'].value[:-1],
+                                      counts[:-1])
+        self.assertEqual(stats['underflow'],
+                         int(np.sum(self.values < 990.)))
+        self.assertEqual(stats['overflow'], int(np.sum(self.values > 1010.)))
+        self.assertEqual(stats['nan_count'], 1)
+        self.assertEqual(stats['edges'].unit, u.mmag)
+
+        with self.assertRaises(ValueError):
+            hist.merge(Histogram([0., 1.], unit='mmag'))
+        with self.assertRaises(ValueError):
+            Histogram([1., 0.])
+
+    def test_finalize_into(self):
+        moments = Moments()
+        moments.update(self.values * u.mmag)
+        m = ExampleMeasurement()
+        moments.finalize_into(m)
+        self.assertEqual(m.quantity.unit, u.mmag)
+        self.assertEqual(sorted(m.extras), ['count', 'std', 'variance'])
+        self.assertEqual(m.count, 10000)
+
+        m = ExampleMeasurement()
+        moments.finalize_into(m, statistic='std', extras=['mean'],
+                              prefix='mag_diff_')
+        self.assertEqual(m.quantity, moments.finalize()['std'])
+        self.assertEqual(list(m.extras), ['mag_diff_mean'])
+
+        hist = Histogram([0., 1., 2.], unit='arcsec')
+        hist.update([0.5, 1.5, 1.7] * u.arcsec)
+        m = ExampleMeasurement()
+        hist.finalize_into(m, prefix='resid_')
+        self.assertIsNone(m.quantity)
+        np.testing.assert_array_equal(m.resid_counts.value, [1, 2])
+        # Extras serialize to JSON
+        self.assertEqual(m.json['extras']['resid_edges']['unit'], 'arcsec')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# See COPYRIGHT file at the top of the source tree.
+
+import asyncio
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (AsyncMeasurementBase, AsyncMeasurementRunner,
+                                Metric, Job)
+
+
+class SlowReadMeasurement(AsyncMeasurementBase):
+    """Example measurement whose input takes time to read."""
+
+    in_progress = 0
+    max_in_progress = 0
+
+    def __init__(self, value, delay=0.01, filter_name=None):
+        AsyncMeasurementBase.__init__(self)
+        self.metric = Metric('Value', 'Value read from disk', '<')
+        self.filter_name = filter_name
+        self.register_parameter('value', value)
+        self.delay = delay
+
+    async def read_inputs(self):
+        cls = SlowReadMeasurement
+        cls.in_progress += 1
+        cls.max_in_progress = max(cls.max_in_progress, cls.in_progress)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            cls.in_progress -= 1
+        return self.value
+
+    def measure(self, inputs):
+        self.quantity = inputs * u.mag
+
+
+class AsyncMeasureMeasurement(SlowReadMeasurement):
+    """Example measurement with a coroutine measure hook."""
+
+    async def measure(self, inputs):
+        await asyncio.sleep(0)
+        self.quantity = 2 * inputs * u.mag
+
+
+async def make_filters(value):
+    """Coroutine factory that returns several measurements."""
+    await asyncio.sleep(0)
+    return [SlowReadMeasurement(value, filter_name=f) for f in ('g', 'r')]
+
+
+class AsyncMeasurementRunnerTestCase(unittest.TestCase):
+    """Test AsyncMeasurementRunner."""
+
+    def setUp(self):
+        SlowReadMeasurement.in_progress = 0
+        SlowReadMeasurement.max_in_progress = 0
+
+    def test_run(self):
+        runner = AsyncMeasurementRunner(max_concurrency=3)
+        for value in range(6):
+            runner.submit(SlowReadMeasurement, value)
+        job = runner.run()
+
+        self.assertEqual(runner.failures, [])
+        self.assertEqual(sorted(m.quantity.value for m in job.measurements),
+                         list(range(6)))
+        self.assertEqual(SlowReadMeasurement.max_in_progress, 3)
+
+    def test_serial(self):
+        runner = AsyncMeasurementRunner(max_concurrency=1)
+        for value in range(3):
+            runner.submit(SlowReadMeasurement, value)
+        runner.run()
+        self.assertEqual(SlowReadMeasurement.max_in_progress, 1)
+
+    def test_factories(self):
+        job = Job()
+        runner = AsyncMeasurementRunner()
+        runner.submit(make_filters, 1)
+        runner.submit(AsyncMeasureMeasurement, 5, filter_name='i')
+        self.assertIs(runner.run(job=job), job)
+        self.assertEqual(len(list(job.measurements)), 3)
+        self.assertEqual(job.get_measurement('Value', filter_name='i').quantity,
+                         10 * u.mag)
+        # Submitted measurements are consumed by run
+        self.assertEqual(len(list(runner.run().measurements)), 0)
+
+    def test_factory_reads_overlap(self):
+        # The inputs of the measurements made by one factory are read
+        # concurrently.
+        runner = AsyncMeasurementRunner(max_concurrency=1)
+        runner.submit(make_filters, 1)
+        job = runner.run()
+        self.assertEqual(len(list(job.measurements)), 2)
+        self.assertEqual(SlowReadMeasurement.max_in_progress, 2)
+
+    def test_timeout(self):
+        runner = AsyncMeasurementRunner(timeout=0.05)
+        runner.submit(SlowReadMeasurement, 1, delay=10.)
+        runner.submit(SlowReadMeasurement, 2, filter_name='r')
+        job = runner.run()
+
+        self.assertEqual(len(runner.failures), 1)
+        factory, args, kwargs, error = runner.failures[0]
+        self.assertIs(factory, SlowReadMeasurement)
+        self.assertEqual(args, (1,))
+        self.assertIsInstance(error, asyncio.TimeoutError)
+        measurements = list(job.measurements)
+        self.assertEqual(len(measurements), 1)
+        self.assertEqual(measurements[0].quantity, 2 * u.mag)
+
+    def test_failure(self):
+        runner = AsyncMeasurementRunner()
+        # measure is abstract
+        runner.submit(AsyncMeasurementBase)
+        job = runner.run()
+        self.assertIsInstance(runner.failures[0][3], TypeError)
+        self.assertEqual(len(list(job.measurements)), 0)
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            AsyncMeasurementRunner(max_concurrency=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
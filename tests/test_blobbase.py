@@ -1,9 +1,11 @@
 # See COPYRIGHT file at the top of the source tree.
 
 import unittest
+
+import numpy as np
 import astropy.units as u
 
-from lsst.validate.base import BlobBase
+from lsst.validate.base import BlobBase, Datum, GrowableArrayDatum
 from lsst.validate.base.blob import DeserializedBlob
 
 
@@ -70,5 +72,205 @@ class BlobBaseTestCase(unittest.TestCase):
             self.assertEqual(datum.description, datum2.description)
 
 
+class GrowableBlob(BlobBase):
+    """Example Blob class with a growable datum."""
+
+    name = 'growable'
+
+    def __init__(self):
+        BlobBase.__init__(self)
+
+        self.register_growable_datum('dist', unit='arcsec', capacity=2,
+                                     description='Distance')
+
+
+class GrowableArrayDatumTestCase(unittest.TestCase):
+    """Test GrowableArrayDatum and BlobBase.register_growable_datum."""
+
+    def setUp(self):
+        self.blob = GrowableBlob()
+
+    def test_registration(self):
+        datum = self.blob.datums['dist']
+        self.assertIsInstance(datum, GrowableArrayDatum)
+        self.assertEqual(datum.label, 'dist')
+        self.assertEqual(datum.description, 'Distance')
+        self.assertEqual(len(self.blob.dist), 0)
+        self.assertEqual(self.blob.dist.unit, u.arcsec)
+
+    def test_append(self):
+        datum = self.blob.datums['dist']
+        for i in range(5):
+            datum.append(float(i) * u.arcsec)
+        datum.append(np.array([5., 6.]))
+        datum.append([7000., 8000.] * u.milliarcsecond)
+        self.assertEqual(len(datum), 9)
+        self.assertEqual(datum.capacity, 16)
+        np.testing.assert_allclose(self.blob.dist.value, np.arange(9.))
+        self.assertEqual(self.blob.dist.unit, u.arcsec)
+
+        with self.assertRaises(u.UnitConversionError):
+            datum.append(1. * u.mag)
+
+    def test_finalize(self):
+        datum = self.blob.datums['dist']
+        datum.append(np.arange(3.) * u.arcsec)
+        q = datum.finalize()
+        self.assertTrue(np.shares_memory(q.value, datum._buffer))
+        self.assertEqual(datum.capacity, 3)
+        datum.append(3. * u.arcsec)
+        np.testing.assert_allclose(self.blob.dist.value, np.arange(4.))
+
+    def test_set_attribute(self):
+        # Set values are copied, in the datum's units and data type
+        values = np.arange(3) * u.deg
+        self.blob.dist = values
+        self.blob.datums['dist'].append(3. * u.deg)
+        self.assertEqual(self.blob.dist.unit, u.arcsec)
+        self.assertEqual(self.blob.dist.dtype, float)
+        np.testing.assert_allclose(self.blob.dist.to_value(u.deg),
+                                   np.arange(4.))
+        np.testing.assert_array_equal(values, np.arange(3) * u.deg)
+        self.assertFalse(np.shares_memory(values.value,
+                                          self.blob.datums['dist']._buffer))
+
+        self.blob.dist = [1., 2.]
+        np.testing.assert_allclose(self.blob.dist.value, [1., 2.])
+        self.assertEqual(self.blob.dist.unit, u.arcsec)
+        with self.assertRaises(u.UnitConversionError):
+            self.blob.dist = [1.] * u.mag
+
+    def test_json(self):
+        self.blob.datums['dist'].append(np.arange(3.) * u.arcsec)
+        j = self.blob.json
+        self.assertEqual(j['data']['dist']['value'], [0., 1., 2.])
+        self.assertEqual(j['data']['dist']['unit'], 'arcsec')
+
+        b2 = DeserializedBlob.from_json(j)
+        np.testing.assert_allclose(b2.dist.value, np.arange(3.))
+
+
+class SummarizedBlob(BlobBase):
+    """Example Blob class with array summaries."""
+
+    name = 'summarized'
+    summarize_arrays = True
+    summary_quantiles = (0.5, 0.9)
+
+    def __init__(self):
+        BlobBase.__init__(self)
+
+        values = np.arange(11.)
+        values[0] = np.nan
+        self.register_datum('mag', quantity=values * u.mag)
+        self.register_datum('flag', quantity='scalar datum')
+
+
+class BlobSummaryTestCase(unittest.TestCase):
+    """Test array summaries of blobs."""
+
+    def setUp(self):
+        self.blob = SummarizedBlob()
+
+    def test_summaries(self):
+        summaries = self.blob.summaries
+        self.assertEqual(list(summaries.keys()), ['mag'])
+        s = summaries['mag']
+        self.assertEqual(s['count'], 11)
+        self.assertEqual(s['nan_count'], 1)
+        self.assertEqual(s['min'], 1.)
+        self.assertEqual(s['max'], 10.)
+        self.assertAlmostEqual(s['mean'], 5.5)
+        self.assertAlmostEqual(s['std'], np.std(np.arange(1., 11.)))
+        self.assertAlmostEqual(s['quantiles']['0.5'], 5.5)
+        self.assertAlmostEqual(s['quantiles']['0.9'],
+                               np.quantile(np.arange(1., 11.), 0.9))
+        self.assertEqual(s['unit'], 'mag')
+
+    def test_json(self):
+        j = self.blob.json
+        self.assertIn('summaries', j)
+        self.assertNotIn('summaries', DemoBlob().json)
+
+    def test_deserialized_summaries(self):
+        j = self.blob.json
+        b2 = DeserializedBlob.from_json(j)
+        self.assertEqual(b2.summaries, j['summaries'])
+        # Datums have not been decoded to read the summaries
+        self.assertNotIsInstance(b2.datums._items['mag'], Datum)
+        self.assertEqual(b2.json, j)
+
+        np.testing.assert_array_equal(b2.mag[1:], self.blob.mag[1:])
+        self.assertIsInstance(b2.datums._items['mag'], Datum)
+        self.assertEqual(b2.json['summaries'], j['summaries'])
+
+
+class ViewBlob(BlobBase):
+    """Example Blob class with plot views."""
+
+    name = 'viewed'
+
+    def __init__(self, n):
+        BlobBase.__init__(self)
+
+        rng = np.random.RandomState(42)
+        self.register_datum('x', quantity=rng.normal(size=n) * u.arcsec)
+        self.register_datum('y', quantity=rng.normal(size=n) * u.mag)
+
+        self.register_view('xy_sample', 'sample', ['x', 'y'], size=100)
+        self.register_view('xy_hist', 'hist2d', ['x', 'y'], bins=10)
+        self.register_view('x_envelope', 'envelope', ['x'], n_bins=7)
+
+
+class BlobViewTestCase(unittest.TestCase):
+    """Test downsampled plot views of blobs."""
+
+    def setUp(self):
+        self.n = 1000
+        self.blob = ViewBlob(self.n)
+
+    def test_sample(self):
+        view = self.blob.views['xy_sample']
+        self.assertEqual(view['kind'], 'sample')
+        self.assertEqual(view['count'], self.n)
+        self.assertEqual(len(view['index']), 100)
+        index = np.array(view['index'])
+        np.testing.assert_array_equal(view['values']['y'],
+                                      self.blob.y.value[index])
+        self.assertEqual(view['units'], {'x': 'arcsec', 'y': 'mag'})
+        # Views are reproducible
+        self.assertEqual(view, self.blob.views['xy_sample'])
+
+    def test_hist2d(self):
+        view = self.blob.views['xy_hist']
+        counts = np.array(view['counts'])
+        self.assertEqual(counts.shape, (10, 10))
+        self.assertEqual(counts.sum(), self.n)
+        self.assertEqual(len(view['x_edges']), 11)
+
+    def test_envelope(self):
+        view = self.blob.views['x_envelope']
+        bin_size = int(np.ceil(self.n / 7.))
+        self.assertEqual(view['bin_start'][1], bin_size)
+        self.assertEqual(len(view['min']), len(view['bin_start']))
+        x = self.blob.x.value
+        self.assertEqual(view['min'][0], x[:bin_size].min())
+        self.assertEqual(view['max'][-1], x[view['bin_start'][-1]:].max())
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            self.blob.register_view('bad', 'contour', ['x'])
+
+    def test_json(self):
+        j = self.blob.json
+        self.assertEqual(set(j['views']), {'xy_sample', 'xy_hist', 'x_envelope'})
+        self.assertNotIn('views', DemoBlob().json)
+
+        b2 = DeserializedBlob.from_json(j)
+        self.assertEqual(b2.views, j['views'])
+        self.assertNotIsInstance(b2.datums._items['x'], Datum)
+        self.assertEqual(b2.json['views'], j['views'])
+
+
 if __name__ == "__main__":
     unittest.main()
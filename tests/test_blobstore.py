@@ -0,0 +1,127 @@
+# See COPYRIGHT file at the top of the source tree.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import BlobBase, BlobStore, Job, MeasurementBase, Metric
+
+
+class MatchBlob(BlobBase):
+    """Content-addressed example blob."""
+
+    name = 'match'
+    content_addressed = True
+
+    def __init__(self, mags):
+        BlobBase.__init__(self)
+        self.register_datum('mag', quantity=mags * u.mag,
+                            description='Magnitudes')
+
+
+class DemoMeasurement(MeasurementBase):
+
+    def __init__(self, blob):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('Test', 'Test metric', '<')
+        self.quantity = 5. * u.mag
+        self.matches = blob
+
+
+class ContentAddressedBlobTestCase(unittest.TestCase):
+    """Test content-addressed blob identifiers."""
+
+    def test_identical_content(self):
+        b1 = MatchBlob(np.arange(10.))
+        b2 = MatchBlob(np.arange(10.))
+        self.assertEqual(b1.identifier, b2.identifier)
+        self.assertEqual(b1.identifier, b1.content_hash)
+
+    def test_different_content(self):
+        b1 = MatchBlob(np.arange(10.))
+        b2 = MatchBlob(np.arange(11.))
+        self.assertNotEqual(b1.identifier, b2.identifier)
+
+        b3 = MatchBlob(np.arange(10.))
+        b3.datums['mag'].description = 'Other'
+        self.assertNotEqual(b1.identifier, b3.identifier)
+
+    def test_cached_hash(self):
+        b = MatchBlob(np.arange(10.))
+        job = Job(blobs=[b])
+        identifier = b.identifier
+        self.assertEqual([blob.identifier for blob in job.blobs],
+                         [identifier])
+
+        # In-place edits do not change the identifier of a registered blob
+        b.mag[0] = 100. * u.mag
+        self.assertEqual(b.identifier, identifier)
+        self.assertNotEqual(b.refresh_content_hash(), identifier)
+        self.assertEqual(b.identifier,
+                         MatchBlob(b.mag.value.copy()).identifier)
+
+        # Registering a datum resets the hash
+        b.register_datum('color', quantity=np.zeros(10) * u.mag)
+        self.assertNotEqual(b.identifier,
+                            MatchBlob(b.mag.value.copy()).identifier)
+
+    def test_job_dedup(self):
+        job = Job(measurements=[DemoMeasurement(MatchBlob(np.arange(10.))),
+                                DemoMeasurement(MatchBlob(np.arange(10.)))])
+        self.assertEqual(len(list(job.blobs)), 1)
+
+
+class BlobStoreTestCase(unittest.TestCase):
+    """Test the BlobStore and Job integration."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = BlobStore(os.path.join(self.tmp_dir, 'blobs'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_put_get(self):
+        blob = MatchBlob(np.arange(5.))
+        identifier = self.store.put(blob)
+        self.assertIn(identifier, self.store)
+        blob2 = self.store.get(identifier)
+        self.assertEqual(blob2.identifier, blob.identifier)
+        np.testing.assert_array_equal(blob2.mag, blob.mag)
+
+        with self.assertRaises(RuntimeError):
+            self.store.get('0' * 64)
+
+    def test_job_roundtrip(self):
+        paths = []
+        for i in range(2):
+            job = Job(measurements=[
+                DemoMeasurement(MatchBlob(np.arange(5.)))])
+            path = os.path.join(self.tmp_dir, 'job{0:d}.json'.format(i))
+            job.write_json(path, blob_store=self.store)
+            paths.append(path)
+
+        # The shared blob is only written once
+        n_files = sum(len(files) for _, _, files in os.walk(self.store.root))
+        self.assertEqual(n_files, 1)
+
+        with open(paths[0]) as f:
+            doc = json.load(f)
+        self.assertEqual(doc['blobs'], [])
+        self.assertEqual(len(doc['blob_refs']), 1)
+
+        with self.assertRaises(RuntimeError):
+            Job.from_json(doc)
+
+        job2 = Job.from_json(doc, blob_store=self.store)
+        m2 = list(job2.measurements)[0]
+        np.testing.assert_array_equal(m2.matches.mag, np.arange(5.) * u.mag)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+# See COPYRIGHT file at the top of the source tree.
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, BlobBase,
+                                DeserializedMeasurement, MeasurementCache,
+                                file_fingerprint)
+
+
+METRIC = Metric('Cached', 'Cached measurement', '<')
+
+
+class ValuesBlob(BlobBase):
+    """Example blob cached with its measurement."""
+
+    name = 'values'
+
+    def __init__(self, values):
+        BlobBase.__init__(self)
+        self.register_datum('values', quantity=values * u.mag)
+
+
+class CountingMeasurement(MeasurementBase):
+    """Example measurement that counts how often it is made."""
+
+    calls = 0
+
+    def __init__(self, scale, filter_name=None, spec_name=None):
+        MeasurementBase.__init__(self)
+        CountingMeasurement.calls += 1
+        self.metric = METRIC
+        self.filter_name = filter_name
+        self.spec_name = spec_name
+        self.register_parameter('scale', scale * u.dimensionless_unscaled)
+        self.blob = ValuesBlob(np.arange(5.) * scale)
+        self.quantity = np.sum(self.blob.values)
+
+
+class MeasurementCacheTestCase(unittest.TestCase):
+    """Test MeasurementCache."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        CountingMeasurement.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _measure(self, cache, scale, filter_name=None, spec_name=None,
+                 inputs=None):
+        return cache.measure(CountingMeasurement, METRIC, args=(scale,),
+                             kwargs={'filter_name': filter_name,
+                                     'spec_name': spec_name},
+                             parameters={'scale': scale * u.one},
+                             filter_name=filter_name, spec_name=spec_name,
+                             inputs=inputs)
+
+    def test_measure(self):
+        cache = MeasurementCache(os.path.join(self.root, 'cache'))
+        m = self._measure(cache, 2., filter_name='r', inputs=['a'])
+        self.assertIsInstance(m, CountingMeasurement)
+        self.assertEqual(len(cache), 1)
+
+        cached = self._measure(cache, 2., filter_name='r', inputs=['a'])
+        self.assertIsInstance(cached, DeserializedMeasurement)
+        self.assertEqual(CountingMeasurement.calls, 1)
+        self.assertEqual(cached.quantity, m.quantity)
+        self.assertEqual(cached.identifier, m.identifier)
+        self.assertEqual(cached.parameters['scale'].quantity, 2. * u.one)
+        np.testing.assert_array_equal(cached.blob.values, m.blob.values)
+
+        # Any change of the key's components misses the cache
+        self._measure(cache, 3., filter_name='r', inputs=['a'])
+        self._measure(cache, 2., filter_name='i', inputs=['a'])
+        self._measure(cache, 2., filter_name='r', inputs=['b'])
+        self._measure(cache, 2., filter_name='r', inputs=['a'],
+                      spec_name='design')
+        self.assertEqual(CountingMeasurement.calls, 5)
+
+    def test_key(self):
+        key = MeasurementCache.key_for(METRIC,
+                                       parameters={'scale': 2. * u.one})
+        # Parameters registered on a measurement give the same key
+        m = CountingMeasurement(2.)
+        self.assertEqual(
+            MeasurementCache.key_for(METRIC, parameters=m.parameters), key)
+        other = Metric('Cached', 'Cached measurement', '<=')
+        self.assertNotEqual(
+            MeasurementCache.key_for(other, parameters={'scale': 2. * u.one}),
+            key)
+        self.assertNotEqual(
+            MeasurementCache.key_for(METRIC, parameters={'scale': 2. * u.mag}),
+            key)
+        self.assertEqual(MeasurementCache.key_for_measurement(m), key)
+
+    def test_key_plain_values(self):
+        # Plain numbers are dimensionless
+        self.assertEqual(
+            MeasurementCache.key_for(METRIC, parameters={'scale': 2.}),
+            MeasurementCache.key_for(METRIC,
+                                     parameters={'scale': 2. * u.one}))
+        self.assertEqual(
+            MeasurementCache.key_for(METRIC,
+                                     parameters={'scale': np.float32(0.5)}),
+            MeasurementCache.key_for(METRIC, parameters={'scale': 0.5}))
+        MeasurementCache.key_for(METRIC, parameters={'n': 3, 'name': 'a',
+                                                     'flag': True,
+                                                     'none': None})
+        with self.assertRaises(TypeError):
+            MeasurementCache.key_for(METRIC, parameters={'scale': object()})
+
+    def test_measure_mismatch(self):
+        cache = MeasurementCache(self.root)
+        # The factory makes a measurement of other parameters than those
+        # of the key, which must not be cached under that key.
+        with self.assertRaises(ValueError):
+            cache.measure(CountingMeasurement, METRIC, args=(3.,),
+                          parameters={'scale': 2.})
+        with self.assertRaises(ValueError):
+            cache.measure(CountingMeasurement, METRIC, args=(2.,))
+        self.assertEqual(len(cache), 0)
+        self._measure(cache, 2.)
+        self.assertEqual(len(cache), 1)
+
+    def test_get_missing(self):
+        cache = MeasurementCache(self.root)
+        self.assertNotIn('0' * 64, cache)
+        with self.assertRaises(RuntimeError):
+            cache.get('0' * 64)
+
+    def test_max_entries(self):
+        cache = MeasurementCache(self.root, max_entries=2)
+        keys = []
+        for i, scale in enumerate((1., 2., 3.)):
+            key = cache.put(CountingMeasurement(scale))
+            self.assertEqual(key, cache.key_for(
+                METRIC, parameters={'scale': scale * u.one}))
+            # Make access times distinct
+            os.utime(cache.path_for(key), ns=(i * 10**9, i * 10**9))
+            keys.append(key)
+            if i == 1:
+                # Use the first entry, so that the second is evicted
+                cache.get(keys[0])
+        self.assertEqual(len(cache), 2)
+        self.assertIn(keys[0], cache)
+        self.assertNotIn(keys[1], cache)
+        self.assertIn(keys[2], cache)
+
+        # Entries of other caches are listed by evict
+        other = MeasurementCache(self.root)
+        other.put(CountingMeasurement(4.))
+        self.assertEqual(len(cache), 3)
+        cache.evict()
+        self.assertEqual(len(cache), 2)
+
+    def test_max_bytes(self):
+        cache = MeasurementCache(self.root)
+        key = cache.put(CountingMeasurement(1.))
+        size = os.path.getsize(cache.path_for(key))
+
+        cache = MeasurementCache(self.root, max_bytes=int(1.5 * size))
+        cache.put(CountingMeasurement(1.), inputs=[1])
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_file_fingerprint(self):
+        path = os.path.join(self.root, 'catalog.txt')
+        with open(path, 'w') as f:
+            f.write('1 2 3')
+        fingerprint = file_fingerprint(path)
+        self.assertEqual(fingerprint[:2], [os.path.abspath(path), 5])
+        digest = file_fingerprint(path, content=True)
+        # Content fingerprints do not depend on the path
+        moved = os.path.join(self.root, 'moved.txt')
+        os.rename(path, moved)
+        self.assertEqual(file_fingerprint(moved, content=True), digest)
+        with open(moved, 'w') as f:
+            f.write('1 2 4')
+        self.assertNotEqual(file_fingerprint(moved, content=True), digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+# See COPYRIGHT file at the top of the source tree.
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, Job, Moments,
+                                CatalogConsumer, CatalogStream,
+                                iter_npy_chunks, iter_npz_chunks)
+
+
+class MeanMeasurement(MeasurementBase):
+    """Example measurement of the mean of a column."""
+
+    def __init__(self, name, moments):
+        MeasurementBase.__init__(self)
+        self.metric = Metric(name, 'Mean of a column', '<')
+        moments.finalize_into(self)
+
+
+class MeanConsumer(CatalogConsumer):
+    """Example consumer computing the mean of a column."""
+
+    def __init__(self, metric_name, column, unit):
+        self.metric_name = metric_name
+        self.column = column
+        self.moments = Moments(unit=unit)
+        self.chunk_columns = []
+        self.chunk_sizes = []
+
+    def consume(self, chunk):
+        if isinstance(chunk, dict):
+            self.chunk_columns.append(sorted(chunk))
+        else:
+            self.chunk_columns.append(sorted(chunk.dtype.names))
+        self.chunk_sizes.append(len(chunk[self.column]))
+        self.moments.update(chunk[self.column])
+
+    def finalize(self):
+        return MeanMeasurement(self.metric_name, self.moments)
+
+
+class CatalogStreamTestCase(unittest.TestCase):
+    """Test CatalogStream and chunk readers."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        rng = np.random.RandomState(0)
+        self.catalog = np.zeros(1050, dtype=[('mag', 'f8'), ('ra', 'f8'),
+                                             ('flags', 'i4', (2,))])
+        self.catalog['mag'] = rng.normal(20., 1., size=1050)
+        self.catalog['ra'] = rng.uniform(0., 360., size=1050)
+        self.catalog['flags'] = rng.randint(0, 2, size=(1050, 2))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def _consumers(self, stream):
+        mag = MeanConsumer('MeanMag', 'mag', 'mag')
+        ra = MeanConsumer('MeanRA', 'ra', 'deg')
+        stream.register(mag, columns=['mag'])
+        stream.register(ra, columns=['ra', 'flags'])
+        return mag, ra
+
+    def _check_job(self, job, mag, ra):
+        self.assertAlmostEqual(job.get_measurement('MeanMag').quantity.value,
+                               self.catalog['mag'].mean())
+        self.assertEqual(job.get_measurement('MeanRA').quantity.unit, u.deg)
+        self.assertEqual(mag.chunk_sizes, [500, 500, 50])
+        self.assertEqual(mag.chunk_columns[0], ['mag'])
+        self.assertEqual(ra.chunk_columns[0], ['flags', 'ra'])
+
+    def test_npy(self):
+        path = self._path('catalog.npy')
+        np.save(path, self.catalog)
+        stream = CatalogStream(path, chunk_size=500)
+        mag, ra = self._consumers(stream)
+        self._check_job(stream.run(), mag, ra)
+
+    def test_npz(self):
+        for save in (np.savez, np.savez_compressed):
+            path = self._path('catalog.npz')
+            save(path, mag=self.catalog['mag'], ra=self.catalog['ra'],
+                 flags=self.catalog['flags'], unused=self.catalog['mag'])
+            stream = CatalogStream(path, chunk_size=500)
+            mag, ra = self._consumers(stream)
+            job = Job()
+            self.assertIs(stream.run(job=job), job)
+            self._check_job(job, mag, ra)
+
+    def test_iterable(self):
+        chunks = [self.catalog[:500], self.catalog[500:1000],
+                  self.catalog[1000:]]
+        stream = CatalogStream(chunks)
+        mag, ra = self._consumers(stream)
+        self._check_job(stream.run(), mag, ra)
+
+    def test_all_columns(self):
+        stream = CatalogStream([self.catalog])
+        consumer = MeanConsumer('MeanMag', 'mag', 'mag')
+        stream.register(consumer)
+        stream.run()
+        self.assertEqual(consumer.chunk_columns, [['flags', 'mag', 'ra']])
+
+    def test_npz_chunks(self):
+        path = self._path('columns.npz')
+        np.savez(path, a=np.arange(10), b=np.arange(20.).reshape(10, 2))
+        chunks = list(iter_npz_chunks(path, 4))
+        self.assertEqual([len(c['a']) for c in chunks], [4, 4, 2])
+        np.testing.assert_array_equal(
+            np.concatenate([c['b'] for c in chunks]),
+            np.arange(20.).reshape(10, 2))
+        chunks = list(iter_npz_chunks(path, 4, columns=['a']))
+        self.assertEqual(list(chunks[0]), ['a'])
+        with self.assertRaises(ValueError):
+            list(iter_npz_chunks(path, 4, columns=['c']))
+
+        np.savez(path, a=np.arange(10), b=np.arange(11))
+        with self.assertRaises(ValueError):
+            list(iter_npz_chunks(path, 4))
+
+    def test_npy_chunks(self):
+        path = self._path('plain.npy')
+        np.save(path, np.arange(7.))
+        chunks = list(iter_npy_chunks(path, 3))
+        self.assertEqual([len(c) for c in chunks], [3, 3, 1])
+        self.assertIsInstance(chunks[0], np.ndarray)
+        self.assertNotIsInstance(chunks[0], np.memmap)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+# See COPYRIGHT file at the top of the source tree.
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from lsst.validate.base import (read_job_json, write_synthetic_job,
+                                write_synthetic_metrics_yaml)
+from lsst.validate.base.cli import main
+
+
+class CliTestCase(unittest.TestCase):
+    """Test the validateJob.py command-line tool."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        for name, seed in (('a.json', 1), ('b.json', 2)):
+            write_synthetic_job(self.path(name), n_measurements=4,
+                                n_metrics=2, blob_size=10, seed=seed)
+        write_synthetic_metrics_yaml(self.path('metrics.yaml'), n_metrics=2,
+                                     n_filters=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def run_main(self, *argv):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            status = main(list(argv))
+        return status, stdout.getvalue(), stderr.getvalue()
+
+    def test_summarize(self):
+        status, out, _ = self.run_main('summarize', self.path('a.json'),
+                                       self.path('b.json'), '--jobs', '2',
+                                       '--measurements')
+        self.assertEqual(status, 0)
+        self.assertIn('a.json: 4 measurements of 2 metrics, 4 blobs', out)
+        self.assertIn('filter names: f00, f01', out)
+        self.assertIn('SYN0001      f01', out)
+
+        status, out, _ = self.run_main('summarize', self.path('a.json'),
+                                       '--json')
+        summary = json.loads(out)[0]
+        self.assertEqual(summary['metrics'], ['SYN0000', 'SYN0001'])
+
+    def test_convert(self):
+        out_dir = self.path('out')
+        for fmt in ('json.gz', 'pickle'):
+            status, out, _ = self.run_main('convert', self.path('a.json'),
+                                           '--to', fmt,
+                                           '--output-dir', out_dir)
+            self.assertEqual(status, 0)
+        self.assertEqual(sorted(os.listdir(out_dir)),
+                         ['a.json.gz', 'a.pickle'])
+        doc = read_job_json(os.path.join(out_dir, 'a.pickle'))
+        self.assertEqual(len(doc['measurements']), 4)
+
+        # Pickled inputs must be allowed explicitly
+        status, _, err = self.run_main('summarize',
+                                       os.path.join(out_dir, 'a.pickle'))
+        self.assertEqual(status, 1)
+        self.assertIn('--allow-pickle', err)
+        status, _, _ = self.run_main('summarize',
+                                     os.path.join(out_dir, 'a.pickle'),
+                                     '--allow-pickle')
+        self.assertEqual(status, 0)
+
+        status, _, err = self.run_main('convert', self.path('a.json'),
+                                       '--to', 'sidecar')
+        self.assertEqual(status, 2)
+        status, _, err = self.run_main('convert', self.path('a.json'),
+                                       '--to', 'json')
+        self.assertEqual(status, 1)
+        self.assertIn('would overwrite its input', err)
+
+        store = self.path('store')
+        self.run_main('convert', self.path('a.json'), '--to', 'sidecar',
+                      '--output-dir', self.path('side'), '--blob-store',
+                      store)
+        doc = read_job_json(self.path('side/a.json'))
+        self.assertEqual(len(doc['blob_refs']), 4)
+
+        # Sidecar inputs need their blob store
+        for fmt in ('pickle', 'json.gz'):
+            status, _, err = self.run_main(
+                'convert', self.path('side/a.json'), '--to', fmt,
+                '--output-dir', self.path('plain'))
+            self.assertEqual(status, 1)
+            self.assertIn('set --blob-store', err)
+        self.assertEqual(os.listdir(self.path('plain')), [])
+        status, _, _ = self.run_main(
+            'convert', self.path('side/a.json'), '--to', 'pickle',
+            '--output-dir', self.path('plain'), '--blob-store', store)
+        self.assertEqual(status, 0)
+        doc = read_job_json(self.path('plain/a.pickle'))
+        self.assertEqual(len(doc['blobs']), 4)
+
+    def test_merge(self):
+        status, out, _ = self.run_main('merge', self.path('a.json'),
+                                       self.path('b.json'), '-o',
+                                       self.path('merged.json.gz'))
+        self.assertEqual(status, 0)
+        self.assertIn('8 measurements, 8 blobs', out)
+        doc = read_job_json(self.path('merged.json.gz'))
+        self.assertEqual(len(doc['measurements']), 8)
+
+    def test_score(self):
+        status, out, _ = self.run_main('score', self.path('a.json'),
+                                       self.path('b.json'), '--metrics',
+                                       self.path('metrics.yaml'), '--json',
+                                       '-j', '2')
+        rows = json.loads(out)
+        self.assertEqual(len(rows), 8)
+        # Design specifications are 10 mmag
+        for row in rows:
+            self.assertEqual(row['result'],
+                             'PASS' if row['value'] <= 10. else 'FAIL')
+        self.assertEqual(status, 1 if any(r['result'] == 'FAIL'
+                                          for r in rows) else 0)
+
+        status, out, _ = self.run_main('score', self.path('a.json'),
+                                       '--metrics',
+                                       self.path('metrics.yaml'), '--spec',
+                                       'unknown')
+        self.assertEqual(status, 0)
+        self.assertEqual(out.count('NO SPEC'), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+# See COPYRIGHT file at the top of the source tree.
+import json
+import os
+import threading
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (Datum, Job, Metric, CallCounters,
+                                hot_path_counters, make_synthetic_job,
+                                load_metrics)
+
+
+class HotPathCountersTestCase(unittest.TestCase):
+    """Test the hot_path_counters registry."""
+
+    def setUp(self):
+        hot_path_counters.reset()
+        self.yaml_path = os.path.join(os.path.dirname(__file__),
+                                      'data', 'metrics.yaml')
+
+    def test_disabled(self):
+        original = Job.__dict__['json']
+        self.assertFalse(hot_path_counters.enabled)
+        Job().json
+        self.assertIs(Job.__dict__['json'], original)
+        self.assertEqual(hot_path_counters.snapshot()['Job.json']['calls'], 0)
+
+    def test_job_round_trip(self):
+        job = make_synthetic_job(n_measurements=4, n_metrics=2)
+        with hot_path_counters as counters:
+            doc = json.loads(json.dumps(job.json))
+            Job.from_json(doc)
+        self.assertFalse(hot_path_counters.enabled)
+        snapshot = counters.snapshot()
+        self.assertEqual(list(snapshot), hot_path_counters.names)
+        self.assertEqual(snapshot['Job.json']['calls'], 1)
+        self.assertEqual(snapshot['Job.from_json']['calls'], 1)
+        self.assertGreater(snapshot['Datum.from_json']['calls'], 0)
+        self.assertGreater(snapshot['Datum._rebuild_quantity']['calls'], 4)
+        self.assertGreater(snapshot['Job.from_json']['time'], 0.)
+
+        # Counts are kept after counting stops, until reset
+        Job.from_json(doc)
+        self.assertEqual(
+            hot_path_counters.snapshot()['Job.from_json']['calls'], 1)
+        hot_path_counters.reset()
+        self.assertEqual(
+            hot_path_counters.snapshot()['Job.from_json']['calls'], 0)
+
+    def test_metrics(self):
+        with hot_path_counters:
+            metrics = load_metrics(self.yaml_path)
+            metrics['PA1'].check_spec(4. * u.mmag, 'design', filter_name='r')
+            Datum.from_json(Datum(1., 'mag').json)
+            with hot_path_counters:
+                # Nested contexts do not stop counting
+                pass
+            self.assertTrue(hot_path_counters.enabled)
+        snapshot = hot_path_counters.snapshot()
+        self.assertGreaterEqual(snapshot['Metric.from_yaml']['calls'],
+                                len(metrics))
+        self.assertEqual(snapshot['Metric.check_spec']['calls'], 1)
+        self.assertEqual(snapshot['Metric.get_spec']['calls'], 1)
+        self.assertEqual(snapshot['Datum.from_json']['calls'], 1)
+        # Methods are restored
+        self.assertIsInstance(Metric.__dict__['from_yaml'], classmethod)
+        self.assertEqual(Metric.from_yaml.__name__, 'from_yaml')
+
+    def test_register(self):
+        class Example(object):
+            def method(self):
+                return 42
+
+        counters = CallCounters()
+        counters.register(Example, 'method')
+        self.assertRaises(RuntimeError, counters.register, Example, 'other')
+        with counters:
+            self.assertRaises(RuntimeError, counters.register, Example,
+                              'method')
+            self.assertEqual(Example().method(), 42)
+        self.assertEqual(counters.snapshot()['Example.method']['calls'], 1)
+
+    def test_shared_methods(self):
+        class Example(object):
+            def method(self):
+                return 42
+
+        original = Example.__dict__['method']
+        a = CallCounters()
+        b = CallCounters()
+        for counters in (a, b):
+            counters.register(Example, 'method')
+        a.enable()
+        b.enable()
+        Example().method()
+        a.disable()
+        Example().method()
+        b.disable()
+        Example().method()
+        self.assertIs(Example.__dict__['method'], original)
+        self.assertEqual(a.snapshot()['Example.method']['calls'], 1)
+        self.assertEqual(b.snapshot()['Example.method']['calls'], 2)
+
+    def test_threads(self):
+        class Example(object):
+            def method(self):
+                return 42
+
+        counters = CallCounters()
+        counters.register(Example, 'method')
+        started = threading.Barrier(4)
+        first_done = threading.Event()
+
+        def count(n, first):
+            with counters:
+                with counters:
+                    started.wait()
+                    if not first:
+                        # Counting continues after another thread exits
+                        first_done.wait()
+                    for _ in range(n):
+                        Example().method()
+            if first:
+                first_done.set()
+
+        threads = [threading.Thread(target=count, args=(100, i == 0))
+                   for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(counters.enabled)
+        self.assertEqual(counters.snapshot()['Example.method']['calls'], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
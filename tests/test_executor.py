@@ -0,0 +1,78 @@
+# See COPYRIGHT file at the top of the source tree.
+
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, BlobBase, Job,
+                                MeasurementExecutor)
+
+
+class SquaresBlob(BlobBase):
+    """Example blob made in a worker process."""
+
+    name = 'squares'
+
+    def __init__(self, n):
+        BlobBase.__init__(self)
+        self.register_datum('values', quantity=np.arange(n)**2 * u.mag)
+
+
+class SumMeasurement(MeasurementBase):
+    """Example measurement made in a worker process."""
+
+    def __init__(self, n, filter_name=None):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('Sum', 'Sum of squares', '<')
+        self.filter_name = filter_name
+        self.register_parameter('n', n)
+        self.squares = SquaresBlob(n)
+        self.quantity = np.sum(self.squares.values)
+
+
+def make_all_filters(n):
+    """Factory that returns several measurements."""
+    return [SumMeasurement(n, filter_name=f) for f in ('g', 'r')]
+
+
+class MeasurementExecutorTestCase(unittest.TestCase):
+    """Test MeasurementExecutor."""
+
+    def _check_job(self, job):
+        measurements = list(job.measurements)
+        self.assertEqual([m.parameters['n'].quantity for m in measurements],
+                         [3, 4, 5, 5])
+        self.assertEqual([m.quantity for m in measurements],
+                         [5. * u.mag, 14. * u.mag, 30. * u.mag, 30. * u.mag])
+        self.assertEqual(len(list(job.blobs)), 4)
+        m = job.get_measurement('Sum', filter_name='r')
+        np.testing.assert_array_equal(m.squares.values, np.arange(5)**2 * u.mag)
+
+    def _submit(self, executor):
+        for n in (3, 4):
+            executor.submit(SumMeasurement, n)
+        executor.submit(make_all_filters, 5)
+
+    def test_process_pool(self):
+        executor = MeasurementExecutor(max_workers=2)
+        self._submit(executor)
+        self._check_job(executor.run())
+
+    def test_serial(self):
+        executor = MeasurementExecutor(max_workers=1)
+        self._submit(executor)
+        self._check_job(executor.run())
+
+    def test_existing_job(self):
+        job = Job(measurements=[SumMeasurement(1)])
+        executor = MeasurementExecutor(max_workers=2, chunksize=2)
+        executor.submit(SumMeasurement, 2)
+        self.assertIs(executor.run(job=job), job)
+        self.assertEqual(len(list(job.measurements)), 2)
+        # Submitted measurements are consumed by run
+        self.assertEqual(len(list(executor.run().measurements)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# See COPYRIGHT file at the top of the source tree.
+from datetime import datetime, timedelta
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (JobHistory, Metric, make_synthetic_job,
+                                write_synthetic_job)
+
+
+class JobHistoryTestCase(unittest.TestCase):
+    """Test the SQLite job history store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = []
+        self.times = []
+        start = datetime(2017, 1, 1)
+        for night in range(5):
+            path = self.path('job{0:d}.json'.format(night))
+            write_synthetic_job(path, n_measurements=4, n_metrics=2,
+                                blob_size=5, seed=night)
+            self.paths.append(path)
+            self.times.append(start + timedelta(days=night))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def read_values(self, path, metric_name, filter_name):
+        with open(path) as f:
+            doc = json.load(f)
+        return [(m['value'] * u.Unit(m['unit'])).to_value(u.mmag)
+                for m in doc['measurements']
+                if m['metric']['name'] == metric_name and
+                m['filter_name'] == filter_name]
+
+    def test_ingest_and_query(self):
+        with JobHistory(self.path('history.sqlite3')) as history:
+            count = history.ingest(self.paths, times=self.times,
+                                   batch_size=2)
+            self.assertEqual(count, 20)
+            self.assertEqual(len(history), 20)
+            self.assertEqual(history.sources, self.paths)
+            self.assertEqual(history.metric_names, ['SYN0000', 'SYN0001'])
+
+            values = history.query('SYN0001', filter_name='f01',
+                                   unit='mmag')
+            self.assertEqual(len(values), 5)
+            self.assertTrue(np.all(np.diff(values['time']) > 0))
+            expected = [v for path in self.paths
+                        for v in self.read_values(path, 'SYN0001', 'f01')]
+            np.testing.assert_allclose(values['value'], expected)
+            self.assertEqual(list(values['source']), self.paths)
+
+            # Time ranges include their start and exclude their end
+            values = history.query('SYN0001', start=self.times[1],
+                                   end=self.times[3])
+            self.assertEqual(len(values), 4)
+            self.assertEqual(set(values['source']), set(self.paths[1:3]))
+
+            self.assertEqual(len(history.query('unknown')), 0)
+            self.assertEqual(
+                len(history.query('SYN0001', spec_name='design')), 0)
+
+        # Reopened histories keep ingested jobs, which are not ingested
+        # again.
+        with JobHistory(self.path('history.sqlite3')) as history:
+            self.assertEqual(history.ingest(self.paths, times=self.times), 0)
+            self.assertEqual(len(history), 20)
+
+    def test_units(self):
+        history = JobHistory()
+        history.ingest(self.paths[:1], times=self.times[:1])
+        mmag = history.query('SYN0000', unit='mmag')['value']
+        mag = history.query('SYN0000', unit=u.mag)['value']
+        np.testing.assert_allclose(mag, mmag / 1000.)
+        # By default, the unit of the latest measurement is used
+        np.testing.assert_allclose(history.query('SYN0000')['value'], mmag)
+        self.assertRaises(u.UnitsError, history.query, 'SYN0000',
+                          unit='arcsec')
+        history.close()
+
+    def test_metric_and_blob_refs(self):
+        history = JobHistory()
+        job = make_synthetic_job(n_measurements=2, n_metrics=2,
+                                 blob_size=5, seed=7)
+        history.ingest_json(job.json, 'job', 1.5e9)
+        metric = history.get_metric('SYN0000')
+        self.assertIsInstance(metric, Metric)
+        self.assertEqual(metric.get_spec('design', filter_name='f00')
+                         .quantity, 10 * u.mmag)
+        self.assertRaises(RuntimeError, history.get_metric, 'unknown')
+
+        values = history.query('SYN0000')
+        self.assertEqual(values['time'][0], 1.5e9)
+        m = job.get_measurement('SYN0000', filter_name='f00')
+        self.assertEqual(history.get_blob_refs(values['identifier'][0]),
+                         {'photometry': m.photometry.identifier})
+        self.assertEqual(history.get_blob_refs('unknown'), {})
+        history.close()
+
+    def test_parallel_ingest(self):
+        history = JobHistory()
+        self.assertEqual(history.ingest(self.paths, max_workers=2), 20)
+        # Times default to file modification times
+        self.assertEqual(
+            sorted(history.query('SYN0000')['time']),
+            sorted(os.path.getmtime(path) for path in self.paths
+                   for _ in range(2)))
+        self.assertRaises(ValueError, history.ingest, ['a.json'],
+                          times=[1., 2.])
+        history.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
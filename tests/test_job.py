@@ -3,11 +3,13 @@ import json
 import os
 # I can't use the py.test tmpdir within the unittest framework.
 import tempfile
+import threading
 import unittest
 
 import astropy.units as u
 
-from lsst.validate.base import (MeasurementBase, Metric, Datum, BlobBase, Job)
+from lsst.validate.base import (MeasurementBase, Metric, Datum, BlobBase, Job,
+                                Specification)
 
 
 class DemoBlob(BlobBase):
@@ -78,6 +80,17 @@ class DemoMeasurement(MeasurementBase):
                             description='Quantity extra')
 
 
+class SimpleMeasurement(MeasurementBase):
+
+    def __init__(self, metric, spec_name=None, filter_name=None,
+                 quantity=1. * u.mag):
+        MeasurementBase.__init__(self)
+        self.metric = metric
+        self.spec_name = spec_name
+        self.filter_name = filter_name
+        self.quantity = quantity
+
+
 class JobTestCase(unittest.TestCase):
     """Test Job classes."""
 
@@ -118,3 +131,127 @@ class JobTestCase(unittest.TestCase):
         # Cleanup our temp files
         os.remove(out_file_name)
         os.removedirs(tmp_dir)
+
+
+class JobLookupTestCase(unittest.TestCase):
+    """Test measurement lookup in Job."""
+
+    def setUp(self):
+        specs = [Specification('design', 1., 'mag', filter_names=['r', 'i']),
+                 Specification('minimum', 2., 'mag')]
+        self.pa1 = Metric('PA1', 'PA1', '<', specs=specs)
+        self.pa2 = Metric('PA2', 'PA2', '<',
+                          specs=[Specification('stretch', 1., 'mag')])
+        self.am1 = Metric('AM1', 'AM1', '<')
+        self.job = Job()
+        self.meas = {}
+        for spec_name in ('design', 'minimum'):
+            for filter_name in ('r', 'i'):
+                m = SimpleMeasurement(self.pa2, spec_name, filter_name)
+                self.meas[(spec_name, filter_name)] = m
+                self.job.register_measurement(m)
+        self.pa1_r = SimpleMeasurement(self.pa1, filter_name='r')
+        self.pa1_i = SimpleMeasurement(self.pa1, filter_name='i')
+        self.am1_m = SimpleMeasurement(self.am1, spec_name='design',
+                                       quantity=None)
+        self.job.register_measurement(self.pa1_r)
+        self.job.register_measurement(self.pa1_i)
+        self.job.register_measurement(self.am1_m)
+
+    def test_unique_metric(self):
+        self.assertIs(self.job.get_measurement('AM1'), self.am1_m)
+        self.assertIs(self.job.get_measurement('AM1', spec_name='design'),
+                      self.am1_m)
+
+    def test_filter(self):
+        self.assertIs(self.job.get_measurement('PA1', filter_name='i'),
+                      self.pa1_i)
+        # spec_name must match measurements that have a spec_name
+        with self.assertRaises(RuntimeError):
+            self.job.get_measurement('PA1', spec_name='design',
+                                     filter_name='r')
+
+    def test_spec_and_filter(self):
+        for (spec_name, filter_name), m in self.meas.items():
+            self.assertIs(
+                self.job.get_measurement('PA2', spec_name=spec_name,
+                                         filter_name=filter_name),
+                m)
+
+    def test_not_found(self):
+        with self.assertRaises(RuntimeError):
+            self.job.get_measurement('PA2', spec_name='design')
+        with self.assertRaises(RuntimeError):
+            self.job.get_measurement('PA1')
+        with self.assertRaises(RuntimeError):
+            self.job.get_measurement('PF1')
+
+    def test_duplicate_registration(self):
+        self.job.register_measurement(self.pa1_r)
+        self.assertIs(self.job.get_measurement('PA1', filter_name='r'),
+                      self.pa1_r)
+        self.assertEqual(len(list(self.job.measurements)), 7)
+
+    def test_no_metric(self):
+        class NoMetricMeasurement(MeasurementBase):
+            metric = None
+
+        m = NoMetricMeasurement()
+        self.job.register_measurement(m)
+        self.assertIn(m, list(self.job.measurements))
+        self.assertIs(self.job.get_measurement('PA1', filter_name='i'),
+                      self.pa1_i)
+
+    def test_metric_names(self):
+        self.assertEqual(self.job.metric_names, ['PA2', 'PA1'])
+
+    def test_spec_levels(self):
+        self.assertEqual(self.job.spec_levels,
+                         ['stretch', 'design', 'minimum'])
+
+
+class JobConcurrencyTestCase(unittest.TestCase):
+    """Test concurrent registration into a Job."""
+
+    def test_threaded_registration(self):
+        metric = Metric('Test', 'Test metric', '<')
+        n_threads = 8
+        n_per_thread = 200
+        per_thread = [[SimpleMeasurement(metric) for _ in range(n_per_thread)]
+                      for _ in range(n_threads)]
+        job = Job()
+
+        def produce(measurements):
+            for m in measurements:
+                job.register_measurement(m)
+                # Duplicate registrations are ignored
+                job.register_measurement(m)
+
+        threads = [threading.Thread(target=produce, args=(ms,))
+                   for ms in per_thread]
+        for t in threads:
+            t.start()
+        # Read while producers are running
+        partial = list(job.measurements)
+        for t in threads:
+            t.join()
+
+        merged = list(job.measurements)
+        self.assertGreaterEqual(len(merged), len(partial))
+        self.assertEqual(len(merged), n_threads * n_per_thread)
+        self.assertEqual(len(set(m.identifier for m in merged)), len(merged))
+        self.assertEqual(len(job._pending_buffers), 0)
+
+        # Each producer's measurements keep their registration order
+        position = {m.identifier: i for i, m in enumerate(merged)}
+        for ms in per_thread:
+            indices = [position[m.identifier] for m in ms]
+            self.assertEqual(indices, sorted(indices))
+
+    def test_blobs_registered(self):
+        job = Job()
+        thread = threading.Thread(target=job.register_measurement,
+                                  args=(DemoMeasurement(),))
+        thread.start()
+        thread.join()
+        self.assertEqual(len(list(job.blobs)), 1)
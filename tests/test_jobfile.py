@@ -0,0 +1,105 @@
+# See COPYRIGHT file at the top of the source tree.
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from lsst.validate.base import (BlobStore, Datum, Job, job_file_format,
+                                read_job_json, write_job_json,
+                                merge_job_files, make_synthetic_job)
+
+
+class JobFileTestCase(unittest.TestCase):
+    """Test reading, writing and merging job files."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.doc = make_synthetic_job(n_measurements=4, n_metrics=2,
+                                      blob_size=10, seed=1).json
+        self.doc = json.loads(json.dumps(self.doc))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir, name)
+
+    def test_format(self):
+        self.assertEqual(job_file_format('a/job.json'), 'json')
+        self.assertEqual(job_file_format('job.json.gz'), 'json.gz')
+        self.assertEqual(job_file_format('job.pkl'), 'pickle')
+        self.assertRaises(ValueError, job_file_format, 'job.yaml')
+
+    def test_round_trip(self):
+        for name in ('job.json', 'job.json.gz', 'job.pickle'):
+            write_job_json(self.doc, self.path(name))
+            doc = read_job_json(self.path(name))
+            self.assertEqual(
+                sorted(m['identifier'] for m in doc['measurements']),
+                sorted(m['identifier'] for m in self.doc['measurements']))
+            self.assertEqual(len(doc['blobs']), 4)
+
+    def test_pickle_arrays(self):
+        write_job_json(self.doc, self.path('job.pickle'))
+        with open(self.path('job.pickle'), 'rb') as f:
+            job = pickle.load(f)
+        for blob in job.blobs:
+            # Datums are decoded before pickling
+            self.assertIs(type(blob.datums), dict)
+            for datum in blob.datums.values():
+                self.assertIsInstance(datum, Datum)
+                self.assertIsInstance(datum.quantity.value, np.ndarray)
+
+    def test_sidecar(self):
+        store = BlobStore(self.path('store'))
+        write_job_json(self.doc, self.path('job.json'), blob_store=store)
+        doc = read_job_json(self.path('job.json'))
+        self.assertEqual(doc['blobs'], [])
+        self.assertEqual(len(doc['blob_refs']), 4)
+        doc = read_job_json(self.path('job.json'), blob_store=store)
+        self.assertNotIn('blob_refs', doc)
+        self.assertEqual(len(doc['blobs']), 4)
+        self.assertRaises(ValueError, write_job_json, self.doc,
+                          self.path('job.pickle'), blob_store=store)
+        # Blob references must be resolved before pickling
+        self.assertRaises(ValueError, write_job_json,
+                          read_job_json(self.path('job.json')),
+                          self.path('job.pickle'))
+
+    def test_merge(self):
+        other = json.loads(json.dumps(make_synthetic_job(
+            n_measurements=2, n_metrics=2, blob_size=10, seed=2).json))
+        write_job_json(self.doc, self.path('a.json'))
+        write_job_json(other, self.path('b.json.gz'))
+        counts = merge_job_files(
+            [self.path('a.json'), self.path('b.json.gz'),
+             self.path('a.json')], self.path('merged.json'))
+        # Duplicate measurements and blobs are written once
+        self.assertEqual(counts, {'measurements': 6, 'blobs': 6})
+        with open(self.path('merged.json')) as f:
+            job = Job.from_json(json.load(f))
+        self.assertEqual(len(list(job.measurements)), 6)
+        m = job.get_measurement('SYN0001', filter_name='f01')
+        self.assertEqual(len(m.photometry.mag), 10)
+
+    def test_merge_sidecar(self):
+        store = BlobStore(self.path('store'))
+        write_job_json(self.doc, self.path('a.json'), blob_store=store)
+        self.assertRaises(RuntimeError, merge_job_files,
+                          [self.path('a.json')], self.path('merged.json'))
+        # A failed merge leaves no output
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)),
+                         ['a.json', 'store'])
+        merge_job_files([self.path('a.json')], self.path('merged.json'),
+                        blob_store=store)
+        with open(self.path('merged.json')) as f:
+            job = Job.from_json(json.load(f), blob_store=store)
+        self.assertEqual(len(list(job.blobs)), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
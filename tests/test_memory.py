@@ -0,0 +1,104 @@
+# See COPYRIGHT file at the top of the source tree.
+import json
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (BlobBase, Job, MeasurementBase, Metric,
+                                JobMemoryReport, make_synthetic_job)
+
+
+class ArrayBlob(BlobBase):
+    """Example blob holding an array."""
+
+    name = 'ArrayBlob'
+
+    def __init__(self, values):
+        BlobBase.__init__(self)
+        self.register_datum('values', quantity=values * u.mag)
+
+
+class ExtraMeasurement(MeasurementBase):
+    """Example measurement with an array extra."""
+
+    def __init__(self, extra, blob=None, filter_name='r'):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('Example', 'Example metric', '<')
+        self.filter_name = filter_name
+        self.register_extra('values', quantity=extra)
+        if blob is not None:
+            self.blob = blob
+        self.quantity = 1. * u.mag
+
+
+class JobMemoryReportTestCase(unittest.TestCase):
+    """Test JobMemoryReport."""
+
+    def test_attribution(self):
+        blob = ArrayBlob(np.zeros(100000))
+        m = ExtraMeasurement(np.zeros(10000) * u.mag, blob=blob)
+        report = Job(measurements=[m]).memory_report()
+        self.assertIsInstance(report, JobMemoryReport)
+
+        top = report.top(2)
+        self.assertEqual(top[0].path,
+                         'blobs/ArrayBlob:{0}/datums/values'.format(
+                             blob.identifier))
+        self.assertEqual(top[0].kind, 'datum')
+        self.assertGreaterEqual(top[0].nbytes, 800000)
+        self.assertLess(top[0].nbytes, 802000)
+        self.assertEqual(top[1].path, 'measurements/Example[r]/extras/values')
+        self.assertGreaterEqual(top[1].nbytes, 80000)
+
+        owners = report.top_owners()
+        self.assertEqual(owners[0][0],
+                         'blobs/ArrayBlob:{0}'.format(blob.identifier))
+        # The linked blob is not counted again with the measurement
+        self.assertLess(report.owners['measurements/Example[r]'], 100000)
+        self.assertEqual(report.total_bytes, sum(report.owners.values()))
+
+    def test_shared_buffers(self):
+        values = np.zeros(100000) * u.mag
+        # Views of the same buffer, in two measurements
+        m1 = ExtraMeasurement(values[:50000], filter_name='g')
+        m2 = ExtraMeasurement(values[50000:], filter_name='r')
+        report = Job(measurements=[m1, m2]).memory_report()
+        e1, e2 = report.top(2, kind='extra')
+        self.assertGreaterEqual(e1.nbytes, 800000)
+        self.assertEqual(e1.shared_bytes, 0)
+        self.assertLess(e2.nbytes, 1000)
+        self.assertEqual(e2.shared_bytes, 800000)
+        self.assertLess(report.total_bytes, 1000000)
+
+    def test_format_and_json(self):
+        job = make_synthetic_job(n_measurements=6, n_metrics=3,
+                                 blob_size=1000, n_blobs=2)
+        report = job.memory_report()
+        text = report.format(n=3)
+        self.assertIn('Job memory: {0:,d} bytes'.format(report.total_bytes),
+                      text)
+        self.assertEqual(len(text.splitlines()), 12)
+
+        # Small datums are listed, rather than the larger objects holding
+        # them
+        job = make_synthetic_job(n_measurements=6, n_metrics=3,
+                                 blob_size=10, n_blobs=2)
+        datum_lines = job.memory_report().format(n=3).splitlines()[-3:]
+        self.assertTrue(all(' datum ' in line for line in datum_lines))
+        doc = json.loads(json.dumps(report.json))
+        self.assertEqual(len(doc['entries']), len(report.entries))
+
+    def test_deserialized_job(self):
+        job = make_synthetic_job(n_measurements=2, n_metrics=2,
+                                 blob_size=1000)
+        job2 = Job.from_json(json.loads(json.dumps(job.json)))
+        report = job2.memory_report()
+        self.assertEqual(len(report.top(None, kind='datum')), 4)
+        # Counting does not decode lazily deserialized datums
+        blob = list(job2.blobs)[0]
+        self.assertIsInstance(blob.datums._items['mag'], dict)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,7 +15,7 @@ class MetricTestCase(unittest.TestCase):
         yaml_path = os.path.join(os.path.dirname(__file__),
                                  'data', 'metrics.yaml')
         with open(yaml_path) as f:
-            self.metric_doc = yaml.load(f)
+            self.metric_doc = yaml.load(f, Loader=yaml.Loader)
 
     def tearDown(self):
         pass
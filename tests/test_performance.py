@@ -0,0 +1,130 @@
+# See COPYRIGHT file at the top of the source tree.
+import os
+import json
+import shutil
+import tempfile
+import threading
+import tracemalloc
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, Job,
+                                MeasurementExecutor, PerformanceMonitor,
+                                instrument)
+
+
+class AllocatingMeasurement(MeasurementBase):
+    """Example measurement that allocates a temporary array."""
+
+    def __init__(self, n, filter_name=None):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('Alloc', 'Allocating measurement', '<')
+        self.filter_name = filter_name
+        values = np.ones(n)
+        self.quantity = values.sum() * u.mag
+
+
+class PerformanceMonitorTestCase(unittest.TestCase):
+    """Test PerformanceMonitor and Job performance records."""
+
+    def test_monitor(self):
+        with PerformanceMonitor() as monitor:
+            m = AllocatingMeasurement(100000)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertGreater(monitor.wall_time, 0.)
+        self.assertGreaterEqual(monitor.cpu_time, 0.)
+        # The temporary array is 800 kB
+        self.assertGreaterEqual(monitor.peak_memory, 800000)
+        self.assertGreater(monitor.max_rss, 0)
+
+        self.assertIsNone(m.performance)
+        monitor.attach(m)
+        self.assertEqual(m.performance['peak_memory'], monitor.peak_memory)
+
+    def test_no_memory_tracing(self):
+        with PerformanceMonitor(trace_memory=False) as monitor:
+            AllocatingMeasurement(10)
+        self.assertIsNone(monitor.peak_memory)
+        self.assertIsNotNone(monitor.wall_time)
+
+    def test_nested_tracing(self):
+        tracemalloc.start()
+        try:
+            with PerformanceMonitor() as monitor:
+                AllocatingMeasurement(100000)
+            # The monitor does not stop tracing it did not start
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+        self.assertGreaterEqual(monitor.peak_memory, 800000)
+
+    def test_concurrent_monitors(self):
+        # Monitors overlapping in threads share tracing, which only stops
+        # once the last one exits.
+        entered = threading.Barrier(3)
+        monitors = []
+
+        def run(n):
+            with PerformanceMonitor() as monitor:
+                entered.wait()
+                AllocatingMeasurement(n)
+                entered.wait()
+            monitors.append(monitor)
+
+        threads = [threading.Thread(target=run, args=(n,))
+                   for n in (100000, 200000, 300000)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(len(monitors), 3)
+        for monitor in monitors:
+            self.assertGreaterEqual(monitor.peak_memory, 800000)
+
+    def test_instrument(self):
+        m = instrument(AllocatingMeasurement, args=(10,),
+                       kwargs={'filter_name': 'r'})
+        self.assertEqual(m.filter_name, 'r')
+        self.assertEqual(set(m.performance),
+                         {'wall_time', 'cpu_time', 'peak_memory', 'max_rss'})
+
+    def test_executor(self):
+        executor = MeasurementExecutor(max_workers=2, instrument=True)
+        executor.submit(AllocatingMeasurement, 10)
+        executor.submit(AllocatingMeasurement, 20)
+        job = executor.run()
+        for m in job.measurements:
+            self.assertGreater(m.performance['wall_time'], 0.)
+
+        executor = MeasurementExecutor(max_workers=1)
+        executor.submit(AllocatingMeasurement, 10)
+        m = list(executor.run().measurements)[0]
+        self.assertIsNone(m.performance)
+
+    def test_job_json(self):
+        instrumented = instrument(AllocatingMeasurement, args=(10,))
+        job = Job(measurements=[instrumented, AllocatingMeasurement(5)])
+        doc = job.json
+        self.assertEqual(list(doc['performance']), [instrumented.identifier])
+        self.assertNotIn('performance', doc['measurements'][0])
+        self.assertNotIn('performance', Job().json)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'job.json')
+            job.write_json(path)
+            with open(path) as f:
+                job2 = Job.from_json(json.load(f))
+        finally:
+            shutil.rmtree(tmp_dir)
+        measurements = list(job2.measurements)
+        self.assertEqual(measurements[0].performance,
+                         instrumented.performance)
+        self.assertIsNone(measurements[1].performance)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# See COPYRIGHT file at the top of the source tree.
+
+import os
+import pickle
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, Datum, BlobBase, Job,
+                                GrowableArrayDatum, DeserializedBlob,
+                                load_metrics)
+
+
+class ArrayBlob(BlobBase):
+    """Example blob with an array."""
+
+    name = 'array'
+
+    def __init__(self, n):
+        BlobBase.__init__(self)
+        self.register_datum('values', quantity=np.arange(n, dtype=float) * u.mag,
+                            description='Values')
+        self.register_growable_datum('grown', unit='arcsec')
+        self.datums['grown'].append(np.arange(3.) * u.arcsec)
+
+
+class ArrayMeasurement(MeasurementBase):
+    """Example measurement with a linked blob."""
+
+    def __init__(self, blob):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('Test', 'Test metric', '<')
+        self.spec_name = 'design'
+        self.register_parameter('n', 10)
+        self.register_extra('extra', 3. * u.arcsec, description='An extra')
+        self.blob = blob
+        self.raw = np.ones(5)
+        self.quantity = 2. * u.mag
+
+
+class PickleTestCase(unittest.TestCase):
+    """Test pickling of validate_base objects."""
+
+    def roundtrip(self, obj, protocol=pickle.HIGHEST_PROTOCOL):
+        return pickle.loads(pickle.dumps(obj, protocol=protocol))
+
+    def test_datum(self):
+        d = Datum(np.arange(4) * u.mag, label='mags', description='Mags')
+        d2 = self.roundtrip(d)
+        self.assertIsInstance(d2, Datum)
+        np.testing.assert_array_equal(d2.quantity, d.quantity)
+        self.assertEqual(d2.quantity.dtype, d.quantity.dtype)
+        self.assertEqual(d2.label, 'mags')
+        self.assertEqual(d2.description, 'Mags')
+
+        for value in ('string', True, 42, None, 5. * u.mag):
+            self.assertEqual(self.roundtrip(Datum(value)).quantity, value)
+
+    def test_growable_datum(self):
+        d = GrowableArrayDatum(unit='mag', capacity=100)
+        d.append(np.arange(3.) * u.mag)
+        d2 = self.roundtrip(d)
+        self.assertIsInstance(d2, GrowableArrayDatum)
+        self.assertEqual(d2.capacity, 3)
+        d2.append(3. * u.mag)
+        np.testing.assert_array_equal(d2.quantity, np.arange(4.) * u.mag)
+
+    def test_measurement(self):
+        m = ArrayMeasurement(ArrayBlob(10))
+        m2 = self.roundtrip(m)
+        self.assertIsInstance(m2, ArrayMeasurement)
+        self.assertEqual(m2.identifier, m.identifier)
+        self.assertEqual(m2.quantity, m.quantity)
+        self.assertEqual(m2.n, 10)
+        self.assertEqual(m2.extra, 3. * u.arcsec)
+        self.assertEqual(m2.spec_name, 'design')
+        self.assertEqual(m2.metric.name, 'Test')
+        np.testing.assert_array_equal(m2.raw, m.raw)
+        self.assertEqual(m2.blob.identifier, m.blob.identifier)
+        np.testing.assert_array_equal(m2.blob.values, m.blob.values)
+        # Attribute setters still work after unpickling
+        m2.n = 20
+        self.assertEqual(m2.parameters['n'].quantity, 20)
+
+    def test_deserialized_blob(self):
+        blob = DeserializedBlob.from_json(ArrayBlob(5).json)
+        blob2 = self.roundtrip(blob)
+        np.testing.assert_array_equal(blob2.values, np.arange(5.) * u.mag)
+
+    def test_metric(self):
+        yaml_path = os.path.join(os.path.dirname(__file__),
+                                 'data', 'metrics.yaml')
+        metrics = load_metrics(yaml_path)
+        for name, metric in metrics.items():
+            metric2 = self.roundtrip(metric)
+            self.assertEqual(metric2.json, metric.json)
+        af1 = self.roundtrip(metrics['AF1'])
+        self.assertEqual(
+            af1.get_spec_dependency('design', 'AD1').quantity,
+            metrics['AF1'].get_spec_dependency('design', 'AD1').quantity)
+
+    def test_job(self):
+        blob = ArrayBlob(10)
+        job = Job(measurements=[ArrayMeasurement(blob),
+                                ArrayMeasurement(blob)])
+        job2 = self.roundtrip(job)
+        measurements = list(job2.measurements)
+        self.assertEqual(len(measurements), 2)
+        self.assertEqual(len(list(job2.blobs)), 1)
+        # Shared blobs remain shared
+        self.assertIs(measurements[0].blob, measurements[1].blob)
+        self.assertEqual(job2.metric_names, ['Test'])
+        job2.register_measurement(ArrayMeasurement(blob))
+        self.assertEqual(len(list(job2.measurements)), 3)
+
+    def test_out_of_band_buffers(self):
+        n = 100000
+        job = Job(measurements=[ArrayMeasurement(ArrayBlob(n))])
+        buffers = []
+        data = pickle.dumps(job, protocol=5, buffer_callback=buffers.append)
+        self.assertLess(len(data), n * 8)
+        self.assertTrue(any(b.raw().nbytes == n * 8 for b in buffers))
+
+        job2 = pickle.loads(data, buffers=buffers)
+        m2 = list(job2.measurements)[0]
+        np.testing.assert_array_equal(m2.blob.values,
+                                      np.arange(n, dtype=float) * u.mag)
+
+
+if __name__ == "__main__":
+    unittest.main()
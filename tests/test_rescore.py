@@ -0,0 +1,93 @@
+# See COPYRIGHT file at the top of the source tree.
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (SCORE_PASS, SCORE_FAIL, SCORE_NO_SPEC,
+                                read_measurement_values, rescore,
+                                rescore_files, synthetic_metrics,
+                                make_synthetic_job, write_synthetic_job)
+
+
+class RescoreTestCase(unittest.TestCase):
+    """Test bulk re-scoring of job files."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.metrics = synthetic_metrics(n_metrics=3, n_filters=2)
+        self.paths = []
+        for seed in range(3):
+            path = os.path.join(self.tmp_dir, 'job{0:d}.json'.format(seed))
+            write_synthetic_job(path, n_measurements=6, n_metrics=3,
+                                seed=seed)
+            self.paths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_read_values(self):
+        values = read_measurement_values(self.paths[0])
+        self.assertEqual(len(values), 6)
+        self.assertEqual(set(values['metric']),
+                         {'SYN0000', 'SYN0001', 'SYN0002'})
+        self.assertTrue(np.all(np.isfinite(values['value'])))
+
+    def test_matches_check_spec(self):
+        job = make_synthetic_job(n_measurements=6, n_metrics=3, seed=4)
+        path = os.path.join(self.tmp_dir, 'job.json')
+        job.write_json(path)
+        scores = rescore(read_measurement_values(path), self.metrics)
+        by_id = {}
+        for m in job.measurements:
+            by_id[(m.metric.name, m.filter_name)] = self.metrics[
+                m.metric.name].check_spec(m.quantity, 'design',
+                                          filter_name=m.filter_name)
+        for row in scores:
+            passed = by_id[(row['metric'], row['filter_name'])]
+            self.assertEqual(row['score'],
+                             SCORE_PASS if passed else SCORE_FAIL)
+            self.assertFalse(np.isnan(row['threshold']))
+
+    def test_no_spec(self):
+        values = read_measurement_values(self.paths[0])
+        values['metric'][0] = 'UNKNOWN'
+        values['value'][1] = np.nan
+        values['unit'][2] = 'arcsec'
+        scores = rescore(values, self.metrics)
+        self.assertEqual(list(scores['score'][:3]), [SCORE_NO_SPEC] * 3)
+        self.assertTrue(np.all(np.isnan(scores['threshold'][:3])))
+        self.assertTrue(np.all(scores['score'][3:] != SCORE_NO_SPEC))
+
+        scores = rescore(values, self.metrics, spec_name='unknown')
+        self.assertTrue(np.all(scores['score'] == SCORE_NO_SPEC))
+
+    def test_unit_conversion(self):
+        values = read_measurement_values(self.paths[0])
+        spec = self.metrics[values['metric'][0]].get_spec(
+            'design', filter_name=values['filter_name'][0])
+        in_mag = values.copy()
+        in_mag['value'] = (values['value'] * u.Unit(values['unit'][0])).to(
+            u.mag).value
+        in_mag['unit'] = 'mag'
+        scores = rescore(values, self.metrics)
+        scores_mag = rescore(in_mag, self.metrics)
+        np.testing.assert_array_equal(scores['score'], scores_mag['score'])
+        self.assertAlmostEqual(scores_mag['threshold'][0],
+                               spec.quantity.to_value(u.mag))
+
+    def test_rescore_files(self):
+        serial = rescore_files(self.paths, self.metrics)
+        parallel = rescore_files(self.paths, self.metrics, max_workers=2)
+        self.assertEqual(len(serial), 18)
+        self.assertEqual(list(serial['path']), list(parallel['path']))
+        np.testing.assert_array_equal(serial['score'], parallel['score'])
+        self.assertEqual(list(serial['path'][:6]), [self.paths[0]] * 6)
+        self.assertEqual(len(rescore_files([], self.metrics)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+# See COPYRIGHT file at the top of the source tree.
+import os
+import threading
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, MeasurementScheduler, Job,
+                                ValidateDependencyError, load_metrics)
+
+
+METRICS = load_metrics(os.path.join(os.path.dirname(__file__),
+                                    'data', 'metrics.yaml'))
+
+
+class ScaledMeasurement(MeasurementBase):
+    """Example measurement whose value is the sum of its upstream
+    measurements plus an offset.
+    """
+
+    def __init__(self, metric_name, offset, filter_name=None, upstream=None,
+                 log=None):
+        MeasurementBase.__init__(self)
+        self.metric = METRICS[metric_name]
+        self.filter_name = filter_name
+        total = offset
+        for m in upstream.measurements:
+            total += m.quantity.value
+        if log is not None:
+            log.append((metric_name, threading.current_thread().name))
+        self.quantity = total * u.Unit(self.metric.specs[0].unit)
+
+
+def fail(upstream=None):
+    """Producer that raises."""
+    return 1 / 0
+
+
+class MeasurementSchedulerTestCase(unittest.TestCase):
+    """Test MeasurementScheduler."""
+
+    def test_dependencies(self):
+        scheduler = MeasurementScheduler(METRICS)
+        self.assertEqual(scheduler.get_dependencies('AF1'), ['AD1'])
+        self.assertEqual(scheduler.get_dependencies('PA1'), [])
+
+        scheduler.add('AF1', ScaledMeasurement, args=('AF1', 1.))
+        # Dependencies without producers are not part of the graph
+        self.assertEqual(scheduler.graph, {'AF1': []})
+        # AD1 specifications depend on AF1 too; measure AD1 first
+        scheduler.add('AD1', ScaledMeasurement, args=('AD1', 1.),
+                      depends_on=[])
+        self.assertEqual(scheduler.graph, {'AF1': ['AD1'], 'AD1': []})
+        self.assertEqual(scheduler.order(), ['AD1', 'AF1'])
+
+    def test_run(self):
+        log = []
+        scheduler = MeasurementScheduler(METRICS, max_workers=4)
+        for filter_name in ('r', 'i'):
+            scheduler.add('AF1', ScaledMeasurement, args=('AF1', 1.),
+                          kwargs={'filter_name': filter_name, 'log': log})
+        scheduler.add('AD1', ScaledMeasurement, args=('AD1', 10.),
+                      kwargs={'filter_name': 'r', 'log': log},
+                      depends_on=[])
+        scheduler.add('AD1', ScaledMeasurement, args=('AD1', 20.),
+                      kwargs={'filter_name': 'i', 'log': log})
+        scheduler.add('PA1', ScaledMeasurement, args=('PA1', 5.),
+                      kwargs={'log': log})
+        job = scheduler.run()
+
+        self.assertEqual(len(list(job.measurements)), 5)
+        # AF1 producers run after both AD1 producers, and see both
+        self.assertEqual([name for name, _ in log][-2:], ['AF1', 'AF1'])
+        self.assertEqual(
+            job.get_measurement('AF1', filter_name='r').quantity.value, 31.)
+        self.assertEqual(job.get_measurement('PA1').quantity.value, 5.)
+        # Producers are consumed by run
+        self.assertEqual(scheduler.graph, {})
+
+    def test_existing_job(self):
+        job = Job(measurements=[ScaledMeasurement('AD1', 3., upstream=Job())])
+        scheduler = MeasurementScheduler(list(METRICS.values()))
+        scheduler.add('AF1', ScaledMeasurement, args=('AF1', 1.))
+        self.assertIs(scheduler.run(job=job), job)
+        self.assertEqual(job.get_measurement('AF1').quantity.value, 4.)
+
+    def test_cycle(self):
+        scheduler = MeasurementScheduler(METRICS)
+        # AF1 and AD1 specifications depend on each other
+        scheduler.add('AF1', ScaledMeasurement, args=('AF1', 1.))
+        scheduler.add('AD1', ScaledMeasurement, args=('AD1', 1.))
+        with self.assertRaises(ValidateDependencyError):
+            scheduler.order()
+        with self.assertRaises(ValidateDependencyError):
+            scheduler.run()
+
+    def test_depends_on(self):
+        scheduler = MeasurementScheduler(METRICS)
+        scheduler.add('PA2', ScaledMeasurement, args=('PA2', 1.),
+                      depends_on=[])
+        scheduler.add('PF1', ScaledMeasurement, args=('PF1', 1.))
+        self.assertEqual(scheduler.order(), ['PA2', 'PF1'])
+        job = scheduler.run()
+        self.assertEqual(job.get_measurement('PF1').quantity.value, 2.)
+
+    def test_unknown_metric(self):
+        scheduler = MeasurementScheduler(METRICS)
+        with self.assertRaises(RuntimeError):
+            scheduler.add('XYZ', ScaledMeasurement)
+
+    def test_error(self):
+        scheduler = MeasurementScheduler(METRICS)
+        scheduler.add('PA1', fail)
+        scheduler.add('PA2', ScaledMeasurement, args=('PA2', 1.),
+                      depends_on=['PA1'])
+        with self.assertRaises(ZeroDivisionError):
+            scheduler.run()
+
+
+if __name__ == "__main__":
+    unittest.main()
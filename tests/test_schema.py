@@ -0,0 +1,112 @@
+# See COPYRIGHT file at the top of the source tree.
+import pickle
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, BlobBase, Job,
+                                ParameterField, ExtraField, BlobField)
+
+
+class MatchesBlob(BlobBase):
+    """Example blob linked through a BlobField."""
+
+    name = 'matches'
+
+    def __init__(self):
+        BlobBase.__init__(self)
+        self.register_datum('mag', quantity=np.arange(3.) * u.mag)
+
+
+class DeclaredMeasurement(MeasurementBase):
+    """Example measurement with declared fields."""
+
+    metric = Metric('Declared', 'Measurement with declared fields', '<')
+
+    n_shuffles = ParameterField(50, description='Number of shuffles')
+    mode = ParameterField('fast', label='Mode')
+    rms = ExtraField(description='RMS of the matches')
+    matches = BlobField()
+
+    def __init__(self, n_shuffles=None):
+        MeasurementBase.__init__(self)
+        if n_shuffles is not None:
+            self.n_shuffles = n_shuffles
+        self.matches = MatchesBlob()
+        self.rms = np.std(self.matches.mag)
+        self.quantity = self.n_shuffles * u.mag
+
+
+class SubclassedMeasurement(DeclaredMeasurement):
+    """Example measurement inheriting declared fields."""
+
+    mode = 'not a field'
+    threshold = ParameterField(2. * u.mag)
+
+
+class SchemaTestCase(unittest.TestCase):
+    """Test declarative measurement fields."""
+
+    def test_registration(self):
+        m = DeclaredMeasurement()
+        self.assertEqual(m.n_shuffles, 50)
+        self.assertEqual(m.parameters['n_shuffles'].description,
+                         'Number of shuffles')
+        self.assertEqual(m.parameters['n_shuffles'].label, 'n_shuffles')
+        self.assertEqual(m.parameters['mode'].label, 'Mode')
+        self.assertEqual(m.extras['rms'].quantity, m.rms)
+        self.assertIs(m.blobs['matches'], m.matches)
+        self.assertEqual(m.quantity, 50 * u.mag)
+
+    def test_set(self):
+        m = DeclaredMeasurement(n_shuffles=10)
+        self.assertEqual(m.parameters['n_shuffles'].quantity, 10)
+        m.mode = 'slow'
+        self.assertEqual(m.parameters['mode'].quantity, 'slow')
+        # Declared and registered attributes share the same storage
+        m.parameters['mode'].quantity = 'exact'
+        self.assertEqual(m.mode, 'exact')
+        # Instances do not share values
+        self.assertEqual(DeclaredMeasurement().mode, 'fast')
+
+    def test_class_access(self):
+        self.assertIsInstance(DeclaredMeasurement.n_shuffles, ParameterField)
+        self.assertEqual(sorted(DeclaredMeasurement._schema_fields),
+                         ['matches', 'mode', 'n_shuffles', 'rms'])
+
+    def test_inheritance(self):
+        m = SubclassedMeasurement()
+        self.assertEqual(m.mode, 'not a field')
+        self.assertNotIn('mode', m.parameters)
+        self.assertEqual(m.threshold, 2. * u.mag)
+        self.assertEqual(sorted(m.parameters), ['n_shuffles', 'threshold'])
+
+    def test_dynamic_registration(self):
+        m = DeclaredMeasurement()
+        m.register_parameter('extra_param', 3)
+        self.assertEqual(m.extra_param, 3)
+        m.extra_param = 4
+        self.assertEqual(m.parameters['extra_param'].quantity, 4)
+
+    def test_unset_blob(self):
+        m = DeclaredMeasurement.__new__(DeclaredMeasurement)
+        MeasurementBase.__init__(m)
+        with self.assertRaises(AttributeError):
+            m.matches
+
+    def test_serialization(self):
+        m = DeclaredMeasurement()
+        job = Job.from_json(Job(measurements=[m]).json)
+        m2 = job.get_measurement('Declared')
+        self.assertEqual(m2.n_shuffles, 50)
+        self.assertEqual(m2.rms, m.rms)
+        np.testing.assert_array_equal(m2.matches.mag, m.matches.mag)
+
+        m3 = pickle.loads(pickle.dumps(m))
+        self.assertEqual(m3.n_shuffles, 50)
+        self.assertIs(m3.blobs['matches'], m3.matches)
+
+
+if __name__ == "__main__":
+    unittest.main()
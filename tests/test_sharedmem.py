@@ -0,0 +1,176 @@
+# See COPYRIGHT file at the top of the source tree.
+
+import gc
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from multiprocessing import shared_memory
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, Metric, BlobBase, Datum,
+                                MeasurementExecutor, SharedArrayDatum)
+from lsst.validate.base.sharedmem import _handing_over_segments
+
+
+class SharedBlob(BlobBase):
+    """Example blob with a shared memory datum."""
+
+    name = 'shared'
+
+    def __init__(self, n):
+        BlobBase.__init__(self)
+        self.register_datum('residual', quantity=np.arange(n, dtype=float) * u.mas,
+                            description='Residuals', shared_memory=True)
+
+
+class SharedMeasurement(MeasurementBase):
+    """Example measurement with a shared memory blob."""
+
+    def __init__(self, n):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('Test', 'Test metric', '<')
+        self.residuals = SharedBlob(n)
+        self.quantity = np.median(self.residuals.residual)
+
+
+def _segment_exists(name):
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    return True
+
+
+class SharedArrayDatumTestCase(unittest.TestCase):
+    """Test SharedArrayDatum."""
+
+    def test_datum(self):
+        d = SharedArrayDatum(np.arange(5) * u.mag, label='mags')
+        self.assertIsNotNone(d.segment_name)
+        np.testing.assert_array_equal(d.quantity, np.arange(5) * u.mag)
+        self.assertEqual(d.label, 'mags')
+
+        d2 = pickle.loads(pickle.dumps(d))
+        self.assertIsInstance(d2, SharedArrayDatum)
+        self.assertEqual(d2.segment_name, d.segment_name)
+        # Both datums view the same memory
+        d.quantity[0] = 10. * u.mag
+        self.assertEqual(d2.quantity[0], 10. * u.mag)
+
+        name = d.segment_name
+        d.release()
+        d2.release()
+        self.assertFalse(_segment_exists(name))
+        # Values remain usable after release
+        self.assertEqual(d.quantity[0], 10. * u.mag)
+        # ...and are pickled by value
+        d3 = pickle.loads(pickle.dumps(d))
+        self.assertIs(type(d3), Datum)
+        np.testing.assert_array_equal(d3.quantity, d.quantity)
+
+    def test_empty(self):
+        d = SharedArrayDatum.empty(4, unit='arcsec', dtype=np.float32)
+        d.quantity[:] = np.arange(4) * u.arcsec
+        self.assertEqual(d.quantity.dtype, np.float32)
+        d2 = pickle.loads(pickle.dumps(d))
+        np.testing.assert_array_equal(d2.quantity, np.arange(4) * u.arcsec)
+        d.release()
+
+    def test_scalar(self):
+        d = SharedArrayDatum(5. * u.mag)
+        self.assertIsNone(d.segment_name)
+        self.assertEqual(pickle.loads(pickle.dumps(d)).quantity, 5. * u.mag)
+
+    def test_blob_attribute(self):
+        blob = SharedBlob(3)
+        name = blob.datums['residual'].segment_name
+        blob.residual = np.arange(6.) * u.mas
+        self.assertFalse(_segment_exists(name))
+        np.testing.assert_array_equal(blob.residual, np.arange(6.) * u.mas)
+        blob.datums['residual'].release()
+
+    def test_garbage_collected(self):
+        d = SharedArrayDatum(np.arange(5.) * u.mag)
+        name = d.segment_name
+        values = d.quantity
+        del d
+        gc.collect()
+        # The owner's segment is removed; arrays viewing it stay valid
+        self.assertFalse(_segment_exists(name))
+        np.testing.assert_array_equal(values[1:3], [1., 2.] * u.mag)
+
+    def test_pickle_keeps_ownership(self):
+        d = SharedArrayDatum(np.arange(5.) * u.mag)
+        name = d.segment_name
+        data = pickle.dumps(d)
+        d2 = pickle.loads(data)
+        d3 = pickle.loads(data)
+        # Unpickled datums do not remove the segment
+        del d2
+        gc.collect()
+        self.assertTrue(_segment_exists(name))
+        np.testing.assert_array_equal(d3.quantity, np.arange(5.) * u.mag)
+        del d
+        gc.collect()
+        self.assertFalse(_segment_exists(name))
+
+    def test_hand_over(self):
+        d = SharedArrayDatum(np.arange(5.) * u.mag)
+        name = d.segment_name
+        with _handing_over_segments():
+            data = pickle.dumps(d)
+        del d
+        gc.collect()
+        # The pickled segment is kept for the unpickled datum
+        self.assertTrue(_segment_exists(name))
+        d2 = pickle.loads(data)
+        np.testing.assert_array_equal(d2.quantity, np.arange(5.) * u.mag)
+        del d2
+        gc.collect()
+        self.assertFalse(_segment_exists(name))
+
+
+class SharedMemoryExecutorTestCase(unittest.TestCase):
+    """Test returning shared memory blobs from worker processes."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_executor(self):
+        executor = MeasurementExecutor(max_workers=2)
+        for n in (11, 21):
+            executor.submit(SharedMeasurement, n)
+        job = executor.run()
+
+        blobs = list(job.blobs)
+        names = [b.datums['residual'].segment_name for b in blobs]
+        self.assertTrue(all(_segment_exists(name) for name in names))
+        np.testing.assert_array_equal(blobs[1].residual,
+                                      np.arange(21.) * u.mas)
+
+        job.write_json(os.path.join(self.tmp_dir, 'job.json'))
+        self.assertFalse(any(_segment_exists(name) for name in names))
+        np.testing.assert_array_equal(blobs[1].residual,
+                                      np.arange(21.) * u.mas)
+
+    def test_job_context(self):
+        executor = MeasurementExecutor(max_workers=2)
+        executor.submit(SharedMeasurement, 11)
+        with executor.run() as job:
+            blob, = job.blobs
+            name = blob.datums['residual'].segment_name
+            self.assertTrue(_segment_exists(name))
+        self.assertFalse(_segment_exists(name))
+        np.testing.assert_array_equal(blob.residual, np.arange(11.) * u.mas)
+
+
+if __name__ == "__main__":
+    unittest.main()
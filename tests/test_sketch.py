@@ -0,0 +1,181 @@
+# See COPYRIGHT file at the top of the source tree.
+import json
+import pickle
+import unittest
+
+import numpy as np
+import astropy.units as u
+
+from lsst.validate.base import (BlobBase, MeasurementBase, Metric, Job,
+                                Datum, KllSketch, QuantileSketchDatum)
+
+
+class ResidualsBlob(BlobBase):
+    """Example blob with a sketch of residuals."""
+
+    name = 'residuals'
+
+    def __init__(self, chunks):
+        BlobBase.__init__(self)
+        self.register_sketch_datum('dist', unit='mas', label='Distance')
+        for chunk in chunks:
+            self.datums['dist'].update(chunk)
+
+
+class ResidualMeasurement(MeasurementBase):
+    """Example measurement with a sketch extra."""
+
+    def __init__(self, values):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('AM1', 'Median residual', '<=')
+        self.register_extra('dist_sketch',
+                            datum=QuantileSketchDatum(unit='mas', seed=1))
+        self.extras['dist_sketch'].update(values)
+        self.quantity = self.extras['dist_sketch'].quantile(0.5)
+
+
+class KllSketchTestCase(unittest.TestCase):
+    """Test KllSketch."""
+
+    def setUp(self):
+        self.values = np.random.RandomState(3).lognormal(size=100000)
+
+    def _check_quantiles(self, sketch, values):
+        quantiles = np.array([0.01, 0.1, 0.25, 0.5, 0.68, 0.9, 0.99])
+        estimates = sketch.quantile(quantiles)
+        # Ranks of the estimates in the full data
+        ranks = np.searchsorted(np.sort(values), estimates) / len(values)
+        np.testing.assert_allclose(ranks, quantiles,
+                                   atol=2 * sketch.normalized_rank_error)
+
+    def test_accuracy(self):
+        sketch = KllSketch(k=200, seed=0)
+        for chunk in np.array_split(self.values, 50):
+            sketch.update(chunk)
+        self.assertEqual(sketch.count, len(self.values))
+        self.assertLess(sketch.size, 3 * 200 + 50)
+        self._check_quantiles(sketch, self.values)
+        self.assertEqual(sketch.quantile(0.), self.values.min())
+        self.assertEqual(sketch.quantile(1.), self.values.max())
+        self.assertAlmostEqual(sketch.rank(np.median(self.values)), 0.5,
+                               delta=2 * sketch.normalized_rank_error)
+
+    def test_merge(self):
+        shards = [KllSketch(seed=i) for i in range(8)]
+        for shard, chunk in zip(shards, np.array_split(self.values, 8)):
+            shard.update(chunk)
+        merged = KllSketch(seed=0)
+        for shard in shards:
+            merged.merge(shard)
+        merged.merge(KllSketch())
+        self.assertEqual(merged.count, len(self.values))
+        self._check_quantiles(merged, self.values)
+
+    def test_small(self):
+        sketch = KllSketch()
+        self.assertTrue(np.isnan(sketch.quantile(0.5)))
+        sketch.update([3., 1., np.nan, 2.])
+        self.assertEqual(sketch.count, 3)
+        self.assertEqual(sketch.quantile(0.5), 2.)
+        with self.assertRaises(ValueError):
+            sketch.quantile(1.5)
+        with self.assertRaises(ValueError):
+            KllSketch(k=2)
+
+    def test_json(self):
+        sketch = KllSketch(seed=0)
+        sketch.update(self.values)
+        doc = json.loads(json.dumps(sketch.json))
+        sketch2 = KllSketch.from_json(doc)
+        np.testing.assert_array_equal(sketch2.quantile([0.1, 0.5, 0.9]),
+                                      sketch.quantile([0.1, 0.5, 0.9]))
+        empty = KllSketch.from_json(KllSketch().json)
+        self.assertEqual(empty.count, 0)
+
+
+class QuantileSketchDatumTestCase(unittest.TestCase):
+    """Test QuantileSketchDatum."""
+
+    def setUp(self):
+        self.values = np.random.RandomState(4).normal(10., 2., size=20000)
+
+    def test_datum(self):
+        datum = QuantileSketchDatum(unit='mas', seed=0)
+        datum.update(self.values[:10000] * u.mas)
+        datum.update(self.values[10000:] / 1000. * u.arcsec)
+        self.assertEqual(datum.count, 20000)
+        self.assertEqual(datum.quantity.unit, u.mas)
+        self.assertAlmostEqual(datum.quantity.value, 10., delta=0.1)
+        self.assertAlmostEqual(datum.rank(10. * u.mas), 0.5, delta=0.03)
+
+        other = QuantileSketchDatum(unit='arcsec')
+        other.update([0.1, 0.2])
+        datum.merge(other)
+        self.assertEqual(datum.quantile(1.), 200. * u.mas)
+
+        datum.quantity = [1., 2., 3.] * u.arcsec
+        self.assertEqual(datum.count, 3)
+        self.assertEqual(datum.quantity, 2. * u.arcsec)
+
+    def test_json(self):
+        datum = QuantileSketchDatum(unit='mas', label='dist', seed=0)
+        datum.update(self.values)
+        doc = json.loads(json.dumps(datum.json))
+        self.assertEqual(doc['unit'], 'mas')
+        self.assertAlmostEqual(doc['value'], datum.quantity.value)
+        # Much smaller than the values
+        self.assertLess(len(json.dumps(doc)), len(json.dumps(
+            self.values.tolist())) / 10)
+
+        datum2 = Datum.from_json(doc)
+        self.assertIsInstance(datum2, QuantileSketchDatum)
+        self.assertEqual(datum2.label, 'dist')
+        self.assertEqual(datum2.quantile(0.9), datum.quantile(0.9))
+        self.assertIsNone(QuantileSketchDatum().json['value'])
+
+    def test_pickle(self):
+        datum = QuantileSketchDatum(unit='mas', seed=0)
+        datum.update(self.values)
+        datum2 = pickle.loads(pickle.dumps(datum))
+        self.assertEqual(datum2.quantile(0.68), datum.quantile(0.68))
+
+    def test_content_hash(self):
+        # Sketches with equal medians but different values are distinct
+        # blobs.
+        class SketchBlob(ResidualsBlob):
+            content_addressed = True
+
+        a = SketchBlob([[0., 5., 10.]])
+        b = SketchBlob([[4., 5., 6.]])
+        self.assertEqual(a.dist, b.dist)
+        self.assertNotEqual(a.identifier, b.identifier)
+        self.assertEqual(a.identifier, SketchBlob([[0., 5., 10.]]).identifier)
+        job = Job(blobs=[a, b])
+        self.assertEqual(len(list(job.blobs)), 2)
+
+    def test_job(self):
+        # Per-tract jobs combined into survey-wide quantiles
+        chunks = np.array_split(self.values, 4)
+        jobs = []
+        for tract_chunks in (chunks[:2], chunks[2:]):
+            m = ResidualMeasurement(np.concatenate(tract_chunks))
+            m.residuals = ResidualsBlob(tract_chunks)
+            job = Job(measurements=[m])
+            jobs.append(Job.from_json(json.loads(json.dumps(job.json))))
+
+        survey = QuantileSketchDatum(unit='mas')
+        extras = QuantileSketchDatum(unit='mas')
+        for job in jobs:
+            m = job.get_measurement('AM1')
+            survey.merge(m.residuals.datums['dist'])
+            extras.merge(m.extras['dist_sketch'])
+        for datum in (survey, extras):
+            self.assertEqual(datum.count, len(self.values))
+            self.assertAlmostEqual(datum.quantile(0.5).value,
+                                   np.median(self.values), delta=0.1)
+        self.assertEqual(jobs[0].get_measurement('AM1').residuals.dist.unit,
+                         u.mas)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# See COPYRIGHT file at the top of the source tree.
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (Job, load_metrics, synthetic_metrics,
+                                synthetic_metrics_doc,
+                                write_synthetic_metrics_yaml,
+                                make_synthetic_job, write_synthetic_job)
+
+
+class SyntheticMetricsTestCase(unittest.TestCase):
+    """Test synthetic metric definitions."""
+
+    def test_doc(self):
+        doc = synthetic_metrics_doc(n_metrics=6, n_filters=2,
+                                    dependency_depth=2)
+        self.assertEqual(list(doc)[:2], ['SYN0000', 'SYN0001'])
+        # Chains of 3 metrics
+        self.assertNotIn('dependencies', doc['SYN0000']['specs'][0])
+        self.assertEqual(doc['SYN0002']['specs'][0]['dependencies'][0],
+                         'SYN0001')
+        self.assertNotIn('dependencies', doc['SYN0003']['specs'][0])
+
+    def test_metrics(self):
+        metrics = synthetic_metrics(n_metrics=4, n_filters=3,
+                                    dependency_depth=3)
+        metric = metrics['SYN0003']
+        self.assertEqual(set(metric.get_spec_names(filter_name='f02')),
+                         {'design', 'minimum', 'stretch'})
+        self.assertTrue(metric.check_spec(5 * u.mmag, 'design',
+                                          filter_name='f00'))
+        dep = metric.get_spec_dependency('design', 'SYN0002',
+                                         filter_name='f00')
+        # Design value of SYN0002
+        self.assertEqual(dep.quantity, 10. * u.mmag)
+        threshold = metric.get_spec_dependency('design', 'threshold',
+                                               filter_name='f00')
+        self.assertEqual(threshold.quantity, 1. * u.mmag)
+        self.assertEqual(metric.p1.quantity, 2. * u.arcsec)
+
+    def test_yaml(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'metrics.yaml')
+            write_synthetic_metrics_yaml(path, n_metrics=5,
+                                         dependency_depth=1)
+            metrics = load_metrics(path)
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(list(metrics),
+                         list(synthetic_metrics(n_metrics=5)))
+        self.assertEqual(metrics['SYN0001'].json,
+                         synthetic_metrics(n_metrics=5, dependency_depth=1)[
+                             'SYN0001'].json)
+
+
+class SyntheticJobTestCase(unittest.TestCase):
+    """Test synthetic jobs."""
+
+    def test_job(self):
+        job = make_synthetic_job(n_measurements=25, n_metrics=10,
+                                 blob_size=100, n_blobs=5)
+        measurements = list(job.measurements)
+        self.assertEqual(len(measurements), 25)
+        self.assertEqual(len(list(job.blobs)), 5)
+        m = job.get_measurement('SYN0004', filter_name='f02')
+        self.assertEqual(m.num_random_shuffles, 50)
+        self.assertEqual(len(m.photometry.mag), 100)
+        self.assertEqual(set(m.extras), {'extra0', 'extra1'})
+
+    def test_deterministic(self):
+        kwargs = dict(n_measurements=12, n_metrics=4, blob_size=10, seed=3)
+        doc1 = json.dumps(make_synthetic_job(**kwargs).json, sort_keys=True)
+        doc2 = json.dumps(make_synthetic_job(**kwargs).json, sort_keys=True)
+        self.assertEqual(doc1, doc2)
+        kwargs['seed'] = 4
+        doc3 = json.dumps(make_synthetic_job(**kwargs).json, sort_keys=True)
+        self.assertNotEqual(doc1, doc3)
+
+    def test_write(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'job.json')
+            job = write_synthetic_job(path, n_measurements=8, n_metrics=4,
+                                      blob_size=10)
+            with open(path) as f:
+                job2 = Job.from_json(json.load(f))
+        finally:
+            shutil.rmtree(tmp_dir)
+        self.assertEqual(len(list(job2.measurements)), 8)
+        self.assertEqual(
+            job2.get_measurement('SYN0001', filter_name='f01').quantity,
+            job.get_measurement('SYN0001', filter_name='f01').quantity)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+# See COPYRIGHT file at the top of the source tree.
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import astropy.units as u
+
+from lsst.validate.base import (MeasurementBase, MeasurementExecutor,
+                                MeasurementScheduler, Metric, Job, Tracer,
+                                get_tracer, make_synthetic_job)
+
+
+class TracedMeasurement(MeasurementBase):
+    """Example measurement, picklable for worker processes."""
+
+    def __init__(self, value, filter_name=None, upstream=None):
+        MeasurementBase.__init__(self)
+        self.metric = Metric('Traced', 'Traced measurement', '<')
+        self.filter_name = filter_name
+        self.quantity = value * u.mag
+
+
+class MetriclessMeasurement(MeasurementBase):
+    """Example measurement without a metric."""
+
+    metric = None
+
+    def __init__(self, value):
+        MeasurementBase.__init__(self)
+        self.quantity = value * u.mag
+
+
+class TracerTestCase(unittest.TestCase):
+    """Test Tracer and the spans recorded by the library."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_inactive(self):
+        self.assertIsNone(get_tracer())
+        tracer = Tracer()
+        Job(measurements=[TracedMeasurement(1.)]).json
+        self.assertEqual(tracer.events, [])
+
+    def test_span(self):
+        with Tracer() as tracer:
+            self.assertIs(get_tracer(), tracer)
+            with Tracer() as inner:
+                self.assertIs(get_tracer(), inner)
+            self.assertIs(get_tracer(), tracer)
+            with tracer.span('outer', 'user', size=3):
+                with tracer.span('inner'):
+                    pass
+        self.assertIsNone(get_tracer())
+        inner, outer = tracer.events
+        self.assertEqual(outer['name'], 'outer')
+        self.assertEqual(outer['ph'], 'X')
+        self.assertEqual(outer['args'], {'size': 3})
+        self.assertEqual(inner['cat'], 'user')
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'],
+                                inner['ts'] + inner['dur'])
+
+    def test_job_spans(self):
+        job = make_synthetic_job(n_measurements=4, n_metrics=2)
+        path = os.path.join(self.tmp_dir, 'job.json')
+        with Tracer() as tracer:
+            job.write_json(path)
+            with open(path) as f:
+                Job.from_json(json.load(f))
+        names = [(e['name'], e['cat']) for e in tracer.events]
+        self.assertIn(('Job.json', 'serialize'), names)
+        self.assertIn(('Job.write_json', 'write'), names)
+        self.assertIn(('Job.from_json', 'serialize'), names)
+        self.assertIn(('merge registered objects', 'register'), names)
+
+        # Lookups with nothing to merge are not traced
+        with Tracer() as tracer:
+            for _ in range(10):
+                job.get_measurement('SYN0000', filter_name='f00')
+        self.assertEqual(tracer.events, [])
+
+    def test_executor(self):
+        for max_workers in (1, 2):
+            executor = MeasurementExecutor(max_workers=max_workers)
+            for i in range(3):
+                executor.submit(TracedMeasurement, float(i))
+            with Tracer() as tracer:
+                job = executor.run()
+            self.assertEqual(len(list(job.measurements)), 3)
+            spans = [e for e in tracer.events if e['cat'] == 'measure']
+            self.assertEqual(len(spans), 3)
+            self.assertEqual(spans[0]['name'], 'TracedMeasurement')
+            self.assertEqual(spans[0]['args'],
+                             {'metrics': ['Traced'], 'measurements': 1})
+            pids = set(e['pid'] for e in spans)
+            if max_workers == 1:
+                self.assertEqual(pids, {os.getpid()})
+            else:
+                self.assertNotIn(os.getpid(), pids)
+
+        # Measurements need not have a metric
+        executor = MeasurementExecutor(max_workers=1)
+        executor.submit(MetriclessMeasurement, 1.)
+        with Tracer() as tracer:
+            executor.run()
+        span, = [e for e in tracer.events if e['cat'] == 'measure']
+        self.assertEqual(span['args'], {'metrics': [], 'measurements': 1})
+
+        # Without a tracer, tasks return measurements only
+        executor.submit(TracedMeasurement, 1.)
+        self.assertEqual(len(list(executor.run().measurements)), 1)
+
+    def test_scheduler(self):
+        scheduler = MeasurementScheduler([Metric('Traced', 'Traced', '<')],
+                                         max_workers=2)
+        scheduler.add('Traced', TracedMeasurement, args=(1.,))
+        with Tracer() as tracer:
+            scheduler.run()
+        spans = [e for e in tracer.events if e['cat'] == 'measure']
+        self.assertEqual(len(spans), 1)
+
+    def test_write(self):
+        with Tracer() as tracer:
+            with tracer.span('work'):
+                pass
+        path = os.path.join(self.tmp_dir, 'trace.json')
+        tracer.write(path)
+        with open(path) as f:
+            doc = json.load(f)
+        self.assertEqual(doc['displayTimeUnit'], 'ms')
+        metadata = [e for e in doc['traceEvents'] if e['ph'] == 'M']
+        self.assertEqual(set(e['name'] for e in metadata),
+                         {'process_name', 'thread_name'})
+        self.assertEqual(doc['traceEvents'][-1]['name'], 'work')
+
+
+if __name__ == "__main__":
+    unittest.main()